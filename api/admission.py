@@ -0,0 +1,217 @@
+"""Admission control - per-agent token buckets and per-route concurrency limits
+
+Expensive routes get a cost weight, a concurrency limit and a bounded wait
+queue. Each agent spends tokens from its own bucket per request; an empty
+bucket gets a fast 429, a full queue (or a wait that runs too long) a fast
+503, both with Retry-After. Cheap routes such as /health and /agents/{id}
+have no policy and are never delayed.
+
+Per-route knobs come from the environment as "route=value" lists:
+
+    ADMISSION_COSTS="feed=5,swipe=1"
+    ADMISSION_CONCURRENCY="feed=4"
+    ADMISSION_QUEUE="feed=32"
+
+All of this state lives in the worker process. Under run.py's gunicorn
+launcher an agent's requests spread over WEB_CONCURRENCY workers, each
+with its own bucket for that agent, so the effective per-agent rate and
+burst are up to ADMISSION_RATE/ADMISSION_BURST x workers; likewise
+ADMISSION_CONCURRENCY and ADMISSION_QUEUE are per worker, and a route's
+server-wide limit is that value x workers. Size the knobs per worker.
+"""
+import asyncio
+import math
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from api.serialization import FastJSONResponse
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+# per-agent bucket: tokens refilled per second and bucket size - per worker
+# process, so an agent can get up to WEB_CONCURRENCY times this in total
+ADMISSION_RATE = float(os.getenv("ADMISSION_RATE", "10"))
+ADMISSION_BURST = float(os.getenv("ADMISSION_BURST", "40"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+# buckets kept for at most this many agents (least recently seen dropped)
+ADMISSION_MAX_AGENTS = int(os.getenv("ADMISSION_MAX_AGENTS", "100000"))
+
+
+def _env_map(name: str) -> Dict[str, float]:
+    return {
+        key.strip(): float(value)
+        for key, _, value in (item.partition("=") for item in os.getenv(name, "").split(",") if "=" in item)
+    }
+
+
+class RoutePolicy:
+    """Admission settings for one route template"""
+
+    def __init__(self, name: str, pattern: str, methods=("GET",), cost: float = 1.0,
+                 concurrency: Optional[int] = None, queue: int = 0):
+        self.name = name
+        self.regex = re.compile(pattern)
+        self.methods = set(methods)
+        self.cost = _env_map("ADMISSION_COSTS").get(name, cost)
+        concurrency = _env_map("ADMISSION_CONCURRENCY").get(name, concurrency)
+        self.concurrency = int(concurrency) if concurrency else None
+        self.queue = int(_env_map("ADMISSION_QUEUE").get(name, queue))
+        self.limiter = ConcurrencyLimiter(self.concurrency, self.queue) if self.concurrency else None
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, cost: float) -> float:
+        """Spend tokens; returns 0 on success or seconds until affordable"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+
+class ConcurrencyLimiter:
+    """At most `limit` in flight, at most `queue` waiting - the rest is shed"""
+
+    def __init__(self, limit: int, queue: int):
+        self.limit = limit
+        self.queue = queue
+        self.active = 0
+        self.waiting = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+
+    def _sem(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.limit)
+            self._loop = loop
+            self.active = self.waiting = 0
+        return self._semaphore
+
+    async def acquire(self, timeout: float) -> bool:
+        sem = self._sem()
+        if sem.locked():
+            if self.waiting >= self.queue:
+                return False
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(sem.acquire(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self.waiting -= 1
+        else:
+            await sem.acquire()
+        self.active += 1
+        return True
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+
+# the expensive routes - everything else is admitted untouched
+ROUTE_POLICIES = [
+    RoutePolicy("feed", r"^/discovery/(?P<agent_id>[^/]+)/feed/?$", cost=5, concurrency=4, queue=32),
+    RoutePolicy("swipe", r"^/discovery/(?P<agent_id>[^/]+)/swipe/[^/]+/?$", methods=("POST",), cost=1),
+    RoutePolicy("matches", r"^/matches/(?P<agent_id>[^/]+)/?$", cost=2),
+    RoutePolicy("messages", r"^/matches/(?P<agent_id>[^/]+)/match/\d+/messages?/?$", methods=("GET", "POST"), cost=1),
+    # admin-only, so the bucket is per table; a slot is held for the whole stream
+    RoutePolicy("export", r"^/export/(?P<agent_id>[^/]+)/?$", cost=1, concurrency=2, queue=2),
+]
+
+
+class AdmissionStats:
+    """Counters per route: admitted, shed by rate (429) and by queue (503)"""
+
+    def __init__(self):
+        self.routes: Dict[str, Dict[str, int]] = {}
+
+    def incr(self, route: str, key: str):
+        counters = self.routes.setdefault(route, {"admitted": 0, "shed_rate": 0, "shed_queue": 0})
+        counters[key] += 1
+
+    def snapshot(self) -> dict:
+        return {
+            policy.name: {
+                **self.routes.get(policy.name, {"admitted": 0, "shed_rate": 0, "shed_queue": 0}),
+                "in_flight": policy.limiter.active if policy.limiter else None,
+                "queued": policy.limiter.waiting if policy.limiter else None,
+            }
+            for policy in ROUTE_POLICIES
+        }
+
+
+admission_stats = AdmissionStats()
+
+
+def _shed(status_code: int, retry_after: float, detail: str) -> FastJSONResponse:
+    return FastJSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class AdmissionMiddleware:
+    """Plain ASGI middleware applying ROUTE_POLICIES before routing"""
+
+    def __init__(self, app, policies=None, rate: float = ADMISSION_RATE, burst: float = ADMISSION_BURST):
+        self.app = app
+        self.policies = ROUTE_POLICIES if policies is None else policies
+        self.rate = rate
+        self.burst = burst
+        self.buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def _bucket(self, agent_id: str) -> TokenBucket:
+        bucket = self.buckets.get(agent_id)
+        if bucket is None:
+            bucket = self.buckets[agent_id] = TokenBucket(self.rate, self.burst)
+            if len(self.buckets) > ADMISSION_MAX_AGENTS:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(agent_id)
+        return bucket
+
+    def _match(self, scope):
+        for policy in self.policies:
+            if scope["method"] in policy.methods:
+                m = policy.regex.match(scope["path"])
+                if m:
+                    return policy, m.group("agent_id")
+        return None, None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ADMISSION_ENABLED:
+            return await self.app(scope, receive, send)
+        policy, agent_id = self._match(scope)
+        if policy is None:
+            return await self.app(scope, receive, send)
+
+        wait = self._bucket(agent_id).take(policy.cost)
+        if wait:
+            admission_stats.incr(policy.name, "shed_rate")
+            return await _shed(429, wait, "Too many requests, slow down")(scope, receive, send)
+
+        if policy.limiter is None:
+            admission_stats.incr(policy.name, "admitted")
+            return await self.app(scope, receive, send)
+
+        if not await policy.limiter.acquire(ADMISSION_QUEUE_TIMEOUT):
+            admission_stats.incr(policy.name, "shed_queue")
+            return await _shed(503, ADMISSION_QUEUE_TIMEOUT, "Server busy, retry shortly")(scope, receive, send)
+        admission_stats.incr(policy.name, "admitted")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            policy.limiter.release()
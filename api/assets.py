@@ -0,0 +1,222 @@
+"""Static asset pipeline - fingerprinted, precompressed frontend files
+
+Run ``python -m api.assets`` at image build time (the app also builds on
+startup). Every file in the frontend directory is written once to the build
+directory under a content-hashed name, next to its ``.gz`` and ``.br``
+variants, so requests only pick a file - nothing is compressed per request.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+from api.conditional import HashedStaticFiles, etag_matches, not_modified
+
+FRONTEND_DIR = os.getenv("FRONTEND_DIR", "frontend")
+ASSET_BUILD_DIR = os.getenv("ASSET_BUILD_DIR", "build/assets")
+ASSET_URL_PREFIX = "/assets"
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+PAGE_CACHE_CONTROL = "no-cache"
+
+# files smaller than this are not worth a compressed variant
+MIN_COMPRESS_SIZE = 256
+COMPRESSIBLE = {".html", ".md", ".json", ".txt", ".css", ".js", ".svg"}
+MEDIA_TYPES = {".md": "text/markdown; charset=utf-8", ".html": "text/html; charset=utf-8"}
+
+# href/src attributes pointing at /static get rewritten to fingerprinted URLs
+STATIC_REF = re.compile(r'(href|src)="/static/([^"?#]+)"')
+
+
+def _brotli():
+    """Import brotli only when building (gzip-only without the package)"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def accepted_encodings(header: Optional[str]) -> set:
+    """Parse Accept-Encoding into the set of acceptable codings"""
+    accepted = set()
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted.add(coding)
+    return accepted
+
+
+class Asset:
+    """One built frontend file and its encoded variants"""
+
+    def __init__(self, name: str, digest: str, filename: str, variants: Dict[str, str]):
+        self.name = name
+        self.digest = digest
+        self.filename = filename
+        self.variants = variants  # encoding ("identity", "gzip", "br") -> path
+
+    @property
+    def url(self) -> str:
+        return f"{ASSET_URL_PREFIX}/{self.filename}"
+
+    @property
+    def media_type(self) -> str:
+        ext = os.path.splitext(self.name)[1]
+        return MEDIA_TYPES.get(ext) or mimetypes.guess_type(self.name)[0] or "application/octet-stream"
+
+    def to_dict(self) -> dict:
+        return {"digest": self.digest, "filename": self.filename, "variants": self.variants}
+
+
+class AssetPipeline:
+    """Builds and serves fingerprinted, precompressed copies of a directory"""
+
+    def __init__(self, source_dir: str = FRONTEND_DIR, build_dir: str = ASSET_BUILD_DIR):
+        self.source_dir = source_dir
+        self.build_dir = build_dir
+        self.assets: Dict[str, Asset] = {}
+        self._by_filename: Dict[str, Asset] = {}
+
+    def _write(self, path: str, data: bytes):
+        # content-addressed, so an existing file is already correct
+        if not os.path.exists(path):
+            tmp = f"{path}.tmp{os.getpid()}"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+    def _build_one(self, name: str, data: bytes) -> Asset:
+        digest = hashlib.blake2b(data, digest_size=8).hexdigest()
+        stem, ext = os.path.splitext(name)
+        filename = f"{stem}.{digest}{ext}"
+        path = os.path.join(self.build_dir, filename)
+        self._write(path, data)
+        variants = {"identity": path}
+
+        if ext in COMPRESSIBLE and len(data) >= MIN_COMPRESS_SIZE:
+            encoded = {"gzip": (".gz", lambda: gzip.compress(data, compresslevel=9, mtime=0))}
+            brotli = _brotli()
+            if brotli is not None:
+                encoded["br"] = (".br", lambda: brotli.compress(data, quality=11))
+            for encoding, (suffix, compress) in encoded.items():
+                variant_path = path + suffix
+                if not os.path.exists(variant_path):
+                    compressed = compress()
+                    if len(compressed) >= len(data):
+                        continue
+                    self._write(variant_path, compressed)
+                variants[encoding] = variant_path
+
+        return Asset(name, digest, filename, variants)
+
+    def build(self) -> Dict[str, Asset]:
+        """Fingerprint and precompress every file, then write manifest.json"""
+        os.makedirs(self.build_dir, exist_ok=True)
+        sources = {}
+        for name in sorted(os.listdir(self.source_dir)):
+            path = os.path.join(self.source_dir, name)
+            if name.startswith(".") or not os.path.isfile(path):
+                continue
+            with open(path, "rb") as f:
+                sources[name] = f.read()
+
+        assets = {}
+        # plain files first so HTML can reference their fingerprinted URLs
+        for name, data in sources.items():
+            if not name.endswith(".html"):
+                assets[name] = self._build_one(name, data)
+        for name, data in sources.items():
+            if name.endswith(".html"):
+                assets[name] = self._build_one(name, self._rewrite_refs(data, assets))
+
+        self.assets = assets
+        self._by_filename = {asset.filename: asset for asset in assets.values()}
+        manifest = {name: asset.to_dict() for name, asset in assets.items()}
+        self._write_manifest(manifest)
+        return assets
+
+    def _rewrite_refs(self, html: bytes, assets: Dict[str, Asset]) -> bytes:
+        def replace(m):
+            asset = assets.get(m.group(2))
+            return f'{m.group(1)}="{asset.url}"' if asset else m.group(0)
+        return STATIC_REF.sub(replace, html.decode("utf-8")).encode("utf-8")
+
+    def _write_manifest(self, manifest: dict):
+        path = os.path.join(self.build_dir, "manifest.json")
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+
+    def ensure_built(self):
+        """Build on first use if startup did not"""
+        if not self.assets:
+            self.build()
+
+    def asset(self, name: str) -> Optional[Asset]:
+        self.ensure_built()
+        return self.assets.get(name)
+
+    def by_filename(self, filename: str) -> Optional[Asset]:
+        self.ensure_built()
+        return self._by_filename.get(filename)
+
+    def url_for(self, name: str) -> str:
+        """Fingerprinted URL for a frontend file"""
+        return self.asset(name).url
+
+    def response(self, asset: Asset, request: Request, cache_control: str) -> Response:
+        """Serve the best pre-encoded variant the client accepts"""
+        accepted = accepted_encodings(request.headers.get("accept-encoding"))
+        encoding = next((e for e in ("br", "gzip") if e in accepted and e in asset.variants), "identity")
+
+        etag = f'"{asset.digest}"' if encoding == "identity" else f'"{asset.digest}-{encoding}"'
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if etag_matches(request, etag):
+            return not_modified(headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return FileResponse(asset.variants[encoding], media_type=asset.media_type, headers=headers)
+
+    def page(self, name: str, request: Request) -> Response:
+        """Serve an HTML page at a stable URL (revalidated, not immutable)"""
+        return self.response(self.asset(name), request, PAGE_CACHE_CONTROL)
+
+
+class AssetStaticFiles(HashedStaticFiles):
+    """/static mount that serves precompressed variants from the pipeline"""
+
+    def __init__(self, *args, pipeline: AssetPipeline, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pipeline = pipeline
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        name = os.path.relpath(full_path, os.path.realpath(self.pipeline.source_dir))
+        asset = self.pipeline.asset(name)
+        if asset is None or status_code != 200:
+            return super().file_response(full_path, stat_result, scope, status_code)
+        return self.pipeline.response(asset, Request(scope), self.cache_control)
+
+
+if __name__ == "__main__":
+    built = AssetPipeline().build()
+    for name, asset in built.items():
+        print(f"✅ {name} -> {asset.url} ({', '.join(sorted(asset.variants))})")
@@ -0,0 +1,95 @@
+"""Conditional GET helpers - ETags, Last-Modified and Cache-Control"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from email.utils import formatdate
+from typing import Optional
+
+from fastapi import Request, Response
+from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse
+from starlette.datastructures import Headers
+from starlette.staticfiles import NotModifiedResponse
+
+# Cache-Control policies
+PROFILE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+STATS_CACHE_CONTROL = os.getenv("STATS_CACHE_CONTROL", "public, max-age=10")
+STATIC_CACHE_CONTROL = os.getenv("STATIC_CACHE_CONTROL", "public, max-age=300")
+
+
+def make_etag(*parts) -> str:
+    """Build a weak ETag from the given parts"""
+    digest = hashlib.blake2b("|".join(str(p) for p in parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def http_date(dt: datetime) -> str:
+    """Format a naive UTC datetime as an HTTP date"""
+    return formatdate((dt - datetime(1970, 1, 1)).total_seconds(), usegmt=True)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match against an ETag (weak comparison)"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return wanted in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+
+
+def cache_headers(etag: str, cache_control: str, last_modified: Optional[datetime] = None) -> dict:
+    """Validator and caching headers for a response"""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified(headers: dict) -> Response:
+    """Empty 304 carrying the validators"""
+    return Response(status_code=304, headers=headers)
+
+
+# --- stats ---
+
+def stats_etag(name: str, payload) -> str:
+    """ETag for a stats response, hashed from the payload it is served with
+
+    Every worker derives the same validator from the same database state, and
+    a coalesced (up to STATS_COALESCE_TTL old) body never gets a newer ETag.
+    """
+    return make_etag("stats", name, json.dumps(payload, sort_keys=True, default=str))
+
+
+# --- static files ---
+
+class HashedStaticFiles(StaticFiles):
+    """StaticFiles with content-hash ETags instead of mtime/size ones"""
+
+    def __init__(self, *args, cache_control: str = STATIC_CACHE_CONTROL, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+        self._hashes: dict = {}
+
+    def content_etag(self, full_path, stat_result: os.stat_result) -> str:
+        """Hash file content once per (path, mtime, size)"""
+        key = (str(full_path), stat_result.st_mtime_ns, stat_result.st_size)
+        etag = self._hashes.get(key)
+        if etag is None:
+            with open(full_path, "rb") as f:
+                etag = f'"{hashlib.blake2b(f.read(), digest_size=12).hexdigest()}"'
+            self._hashes[key] = etag
+        return etag
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        headers = {
+            "etag": self.content_etag(full_path, stat_result),
+            "cache-control": self.cache_control,
+        }
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers)
+        if status_code == 200 and self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
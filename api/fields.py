@@ -0,0 +1,28 @@
+"""Sparse fieldsets - ?fields=id,name,emoji on read endpoints
+
+Clients name the response fields they use; handlers load only the columns
+behind them and encode only those keys. Unknown names are a 400 rather
+than silently dropped, and "id" is always included.
+"""
+from typing import Iterable, List, Optional
+
+from fastapi import HTTPException
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """Requested fields in request order, or None for the full shape"""
+    if fields is None or not fields.strip():
+        return None
+    allowed = list(allowed)
+    wanted = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in wanted if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields {unknown}; allowed: {allowed}")
+    if "id" in allowed and "id" not in wanted:
+        wanted.insert(0, "id")
+    return wanted
+
+
+def project(row: dict, fields: Optional[List[str]]) -> dict:
+    """Trim an encoded row to the requested fields"""
+    return row if fields is None else {f: row[f] for f in fields if f in row}
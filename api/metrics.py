@@ -0,0 +1,433 @@
+"""Prometheus metrics - cheap on the hot path, aggregated on scrape
+
+Counters and histograms keep one cell per thread (request threads never
+share a lock); GET /metrics sums the cells and reads pool, cache and
+admission gauges from their existing snapshots. Rates such as swipes per
+second come from the *_total counters via rate() on the Prometheus side.
+
+Under several workers a scrape reaches one of them at random, so with
+METRICS_MULTIPROC_DIR set (run.py sets it for multi-worker runs) every
+process writes its totals to a file there - at most every
+METRICS_FLUSH_INTERVAL seconds while it serves requests, on each scrape and
+on exit - and a scrape sums the files of all workers. Counters of exited
+or recycled workers are folded into base.json, so the totals never go
+back; gauges come from live workers only, labelled with their pid.
+"""
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter as Tally
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from database import SessionLocal, engine
+from database.models import Match, Message, Swipe
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FEED_POOL_BUCKETS = (10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000)
+
+# shared by every worker of one server; empty = this process only
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "1"))
+
+
+class _PerThread:
+    """A dict of label -> cell per thread; only the owning thread writes it
+
+    Threadpool threads come and go, so on read the shards of threads that
+    have exited are folded into one base shard and dropped.
+    """
+
+    def __init__(self, new_cell: Callable):
+        self._new_cell = new_cell
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: Dict[threading.Thread, dict] = {}
+        self._base: dict = {}
+
+    def cell(self, labels: tuple):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards[threading.current_thread()] = shard
+        cell = shard.get(labels)
+        if cell is None:
+            cell = shard[labels] = self._new_cell()
+        return cell
+
+    def shards(self) -> List[dict]:
+        with self._lock:
+            for thread in [t for t in self._shards if not t.is_alive()]:
+                for labels, cell in self._shards.pop(thread).items():
+                    base = self._base.get(labels)
+                    # a new list, so readers of an earlier base snapshot see no change
+                    self._base[labels] = list(cell) if base is None else [a + b for a, b in zip(base, cell)]
+            return [dict(self._base)] + list(self._shards.values())
+
+    def reset(self):
+        """Forget every cell (in a worker after fork, so it doesn't recount the master's)"""
+        with self._lock:
+            for shard in self._shards.values():
+                shard.clear()
+            self._base = {}
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._cells = _PerThread(lambda: [0])
+
+    def inc(self, *label_values, amount: float = 1):
+        self._cells.cell(label_values)[0] += amount
+
+    def collect(self) -> Dict[tuple, float]:
+        totals: Dict[tuple, float] = {}
+        for shard in self._cells.shards():
+            for labels, cell in list(shard.items()):
+                totals[labels] = totals.get(labels, 0) + cell[0]
+        return totals
+
+    def family(self) -> dict:
+        values = self.collect()
+        if not self.labels and not values:
+            values = {(): 0}
+        return _family(self.name, self.help, "counter", self.labels, values)
+
+    def render(self) -> List[str]:
+        return _render(self.family())
+
+    def reset(self):
+        self._cells.reset()
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # per cell: one count per bucket, then +Inf count, then sum
+        self._cells = _PerThread(lambda: [0] * (len(self.buckets) + 2))
+
+    def observe(self, value: float, *label_values):
+        cell = self._cells.cell(label_values)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                cell[i] += 1
+                break
+        else:
+            cell[-2] += 1
+        cell[-1] += value
+
+    def family(self) -> dict:
+        totals: Dict[tuple, list] = {}
+        for shard in self._cells.shards():
+            for labels, cell in list(shard.items()):
+                total = totals.setdefault(labels, [0] * len(cell))
+                for i, v in enumerate(cell):
+                    total[i] += v
+        return _family(self.name, self.help, "histogram", self.labels, totals, self.buckets)
+
+    def render(self) -> List[str]:
+        return _render(self.family())
+
+    def reset(self):
+        self._cells.reset()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _num(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _family(name: str, help: str, kind: str, labels: Tuple[str, ...], samples: Dict[tuple, object],
+            buckets: tuple = ()) -> dict:
+    """One metric's samples: label values -> value (histograms: bucket counts, +Inf count, sum)"""
+    return {"name": name, "help": help, "kind": kind, "labels": tuple(labels), "buckets": tuple(buckets),
+            "samples": samples}
+
+
+def _sampled(name: str, help: str, samples: List[Tuple[tuple, float]], labels: Tuple[str, ...] = (),
+             kind: str = "gauge") -> dict:
+    """Series read from an existing snapshot at scrape time"""
+    return _family(name, help, kind, labels, dict(samples))
+
+
+def _render(family: dict) -> List[str]:
+    name, labels = family["name"], family["labels"]
+    lines = [f"# HELP {name} {family['help']}", f"# TYPE {name} {family['kind']}"]
+    if family["kind"] != "histogram":
+        for values, value in sorted(family["samples"].items()):
+            lines.append(f"{name}{_labels(labels, values)} {_num(value)}")
+        return lines
+    for values, total in sorted(family["samples"].items()):
+        cumulative = 0
+        for bound, count in zip(family["buckets"] + ("+Inf",), total[:-1]):
+            cumulative += count
+            le = bound if bound == "+Inf" else _num(bound)
+            lines.append(f"{name}_bucket{_labels(labels + ('le',), values + (le,))} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels, values)} {_num(total[-1])}")
+        lines.append(f"{name}_count{_labels(labels, values)} {cumulative}")
+    return lines
+
+
+# --- hot path instruments ---
+
+http_requests = Counter("clawble_http_requests_total", "HTTP requests by route template",
+                        ("method", "route", "status"))
+http_latency = Histogram("clawble_http_request_duration_seconds", "Time until response start",
+                         ("method", "route"))
+sql_statements = Counter("clawble_sql_statements_total", "SQL statements executed", ("verb",))
+swipes = Counter("clawble_swipes_total", "Committed swipes", ("direction",))
+matches = Counter("clawble_matches_total", "Committed matches")
+messages = Counter("clawble_messages_total", "Committed messages")
+feed_pool = Histogram("clawble_feed_candidates", "Candidates scored per discovery feed computation",
+                      buckets=FEED_POOL_BUCKETS)
+
+
+def observe_request(scope, status: int, seconds: float):
+    # unmatched paths share one label so random URLs can't blow up cardinality
+    route = getattr(scope.get("route"), "path", None) or "unmatched"
+    http_requests.inc(scope["method"], route, status)
+    http_latency.observe(seconds, scope["method"], route)
+    maybe_flush()
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _tally_writes(session, flush_context):
+    for obj in session.new:
+        if isinstance(obj, Swipe):
+            session.info.setdefault("metrics_new", Tally())[obj.direction] += 1
+        elif isinstance(obj, (Match, Message)):
+            session.info.setdefault("metrics_new", Tally())[type(obj)] += 1
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _count_writes(session):
+    tally = session.info.pop("metrics_new", None)
+    if not tally:
+        return
+    for key, n in tally.items():
+        if key is Match:
+            matches.inc(amount=n)
+        elif key is Message:
+            messages.inc(amount=n)
+        else:
+            swipes.inc(key, amount=n)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _drop_writes(session):
+    session.info.pop("metrics_new", None)
+
+
+# --- scrape ---
+
+def _pool_gauges() -> List[dict]:
+    pool = engine.pool
+    samples = []
+    for name, attr in (("checked_out", "checkedout"), ("overflow", "overflow"), ("size", "size")):
+        fn = getattr(pool, attr, None)
+        if fn is not None:
+            # QueuePool reports unused base capacity as negative overflow
+            samples.append(((name,), max(0, fn())))
+    return [_sampled("clawble_db_pool_connections", "DB connection pool state", samples, ("state",))]
+
+
+def _cache_gauges() -> List[dict]:
+    from services.profiles import profile_cache
+    from services.singleflight import groups
+    from services.tweets import tweet_client
+
+    hits: List[Tuple[tuple, float]] = [(("tweets",), tweet_client.cache.hits), (("profiles",), profile_cache.hits)]
+    misses: List[Tuple[tuple, float]] = [(("tweets",), tweet_client.cache.misses), (("profiles",), profile_cache.misses)]
+    for name, group in sorted(groups.items()):
+        # a coalesced follower or a micro-TTL hit both skipped the work
+        hits.append(((name,), group.followers + group.cache_hits))
+        misses.append(((name,), group.leaders))
+    return [
+        _sampled("clawble_cache_hits_total", "In-process cache hits", hits, ("cache",), "counter"),
+        _sampled("clawble_cache_misses_total", "In-process cache misses", misses, ("cache",), "counter"),
+    ]
+
+
+def _worker_gauges() -> List[dict]:
+    from api.admission import admission_stats
+    from api.worker import worker_stats
+
+    worker = worker_stats.snapshot()
+    shed = []
+    for route, stats in admission_stats.snapshot().items():
+        for outcome in ("admitted", "shed_rate", "shed_queue"):
+            shed.append(((route, outcome), stats[outcome]))
+    return [
+        _sampled("clawble_in_flight_requests", "Requests in progress in this worker", [((), worker["in_flight"])]),
+        _sampled("clawble_worker_uptime_seconds", "Seconds since this worker started", [((), worker["uptime_s"])]),
+        _sampled("clawble_admission_decisions_total", "Admission outcomes per policy", shed,
+                 ("policy", "outcome"), "counter"),
+    ]
+
+
+INSTRUMENTS = (http_requests, http_latency, sql_statements, swipes, matches, messages, feed_pool)
+
+
+def collect() -> List[dict]:
+    """This process's metrics"""
+    return [instrument.family() for instrument in INSTRUMENTS] + _pool_gauges() + _cache_gauges() + _worker_gauges()
+
+
+def reset():
+    """Zero the hot path instruments (run.py calls this in each worker after fork)"""
+    for instrument in INSTRUMENTS:
+        instrument.reset()
+
+
+def render(directory: Optional[str] = None) -> str:
+    """Text exposition - of every worker sharing `directory` when one is set"""
+    directory = directory if directory is not None else METRICS_MULTIPROC_DIR
+    families = _aggregate(directory) if directory else collect()
+    lines: List[str] = []
+    for family in families:
+        lines += _render(family)
+    return "\n".join(lines) + "\n"
+
+
+# --- multi-process ---
+
+BASE_FILE = "base.json"
+_flush_lock = threading.Lock()
+_last_flush = 0.0
+# one file per process start - a recycled worker's pid may come back
+_file_owner: Tuple[int, str] = (0, "")
+
+
+def _own_file(directory: str) -> str:
+    global _file_owner
+    if _file_owner[0] != os.getpid():
+        _file_owner = (os.getpid(), f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json")
+    return os.path.join(directory, _file_owner[1])
+
+
+def _dump(families: List[dict]) -> list:
+    return [{**f, "samples": [[list(k), v] for k, v in f["samples"].items()]} for f in families]
+
+
+def _load(families: list) -> List[dict]:
+    return [{**f, "labels": tuple(f["labels"]), "buckets": tuple(f["buckets"]),
+             "samples": {tuple(k): v for k, v in f["samples"]}} for f in families]
+
+
+def _write(path: str, data: dict):
+    tmp = f"{path}.tmp{threading.get_ident()}"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def flush(directory: Optional[str] = None, families: Optional[List[dict]] = None):
+    """Write this process's totals to its file in the shared directory"""
+    global _last_flush
+    directory = directory if directory is not None else METRICS_MULTIPROC_DIR
+    if not directory:
+        return
+    with _flush_lock:
+        _last_flush = time.monotonic()
+        families = families if families is not None else collect()
+        _write(_own_file(directory), {"pid": os.getpid(), "families": _dump(families)})
+
+
+def maybe_flush():
+    """Flush if the last one is older than METRICS_FLUSH_INTERVAL (cheap on the hot path)"""
+    if METRICS_MULTIPROC_DIR and time.monotonic() - _last_flush >= METRICS_FLUSH_INTERVAL:
+        if not _flush_lock.locked():
+            flush()
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _add(into: Dict[str, dict], family: dict, extra_labels: tuple = (), extra_values: tuple = ()):
+    merged = into.get(family["name"])
+    if merged is None:
+        merged = into[family["name"]] = {**family, "labels": family["labels"] + extra_labels, "samples": {}}
+    for values, value in family["samples"].items():
+        key = values + extra_values
+        current = merged["samples"].get(key)
+        if current is None:
+            merged["samples"][key] = list(value) if isinstance(value, list) else value
+        elif isinstance(value, list):
+            merged["samples"][key] = [a + b for a, b in zip(current, value)]
+        else:
+            merged["samples"][key] = current + value
+
+
+def _aggregate(directory: str) -> List[dict]:
+    """Sum every worker's file; fold exited workers' counters into base.json"""
+    os.makedirs(directory, exist_ok=True)
+    local = collect()
+    flush(directory, local)
+    merged: Dict[str, dict] = {}
+    with open(os.path.join(directory, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        base_path = os.path.join(directory, BASE_FILE)
+        base: Dict[str, dict] = {}
+        if os.path.exists(base_path):
+            with open(base_path) as f:
+                for family in _load(json.load(f)["families"]):
+                    _add(base, family)
+        dead = []
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".json") or name == BASE_FILE:
+                continue
+            path = os.path.join(directory, name)
+            with open(path) as f:
+                data = json.load(f)
+            alive = _alive(data["pid"])
+            for family in _load(data["families"]):
+                if family["kind"] == "gauge":
+                    if alive:
+                        _add(merged, family, ("pid",), (data["pid"],))
+                elif alive:
+                    _add(merged, family)
+                else:
+                    _add(base, family)
+            if not alive:
+                dead.append(path)
+        if dead:
+            _write(base_path, {"pid": 0, "families": _dump(list(base.values()))})
+            for path in dead:
+                os.remove(path)
+    for family in base.values():
+        _add(merged, family)
+    # the local order, so output reads the same with or without workers
+    order = {f["name"]: i for i, f in enumerate(local)}
+    return sorted(merged.values(), key=lambda f: order.get(f["name"], len(order)))
+
+
+if METRICS_MULTIPROC_DIR:
+    atexit.register(flush)
@@ -0,0 +1,73 @@
+"""Keyset (cursor) pagination for list endpoints
+
+Pages are ordered by a tuple of columns whose last member is unique (e.g.
+(created_at, id)) and the next page starts strictly after the last row
+served, so fetching page N costs the same as page 1 and rows inserted
+mid-crawl neither repeat nor shift later pages. The cursor is those
+last-row values, opaque to clients; it comes back in the X-Next-Cursor
+header and as a Link rel="next", so list bodies keep their shape.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request
+from sqlalchemy import DateTime, literal, tuple_
+
+# larger limits are capped rather than rejected - the next page is a cursor away
+MAX_PAGE_SIZE = 100
+
+
+PAGE_SIZE_HELP = f"page size, capped at {MAX_PAGE_SIZE}"
+
+
+def clamp_limit(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence) -> list:
+    """Cursor back to typed values for `keys`; 400 if it wasn't one of ours"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("wrong arity")
+        return [datetime.fromisoformat(v) if isinstance(key.type, DateTime) and v is not None else v
+                for key, v in zip(keys, values)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_page(query, keys: Sequence, limit: int, cursor: Optional[str] = None,
+                descending: bool = False, offset: int = 0) -> Tuple[List, Optional[str]]:
+    """One page of `query` ordered by `keys`, plus the cursor for the next (None at the end)
+
+    `limit` is clamped to 1..MAX_PAGE_SIZE. `offset` is only for legacy skip=
+    callers; it's ignored once a cursor is given.
+    """
+    limit = clamp_limit(limit)
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        after = tuple_(*[literal(v, key.type) for key, v in zip(keys, values)])
+        query = query.filter(tuple_(*keys) < after if descending else tuple_(*keys) > after)
+    query = query.order_by(*[key.desc() if descending else key.asc() for key in keys])
+    if offset and not cursor:
+        query = query.offset(offset)
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], key.key) for key in keys])
+
+
+def page_headers(request: Request, next_cursor: Optional[str]) -> dict:
+    """X-Next-Cursor and Link headers pointing at the next page"""
+    if not next_cursor:
+        return {}
+    next_url = request.url.include_query_params(cursor=next_cursor)
+    return {"X-Next-Cursor": next_cursor, "Link": f'<{next_url}>; rel="next"'}
@@ -0,0 +1,201 @@
+"""Request profiling - phase timings, SQL counts, Server-Timing and a sampler
+
+Every request gets a RequestTimings (services.timing) that collects:
+
+    db         time inside SQL statements (engine events), with a count
+    queue      request start -> DB session opened: admission queueing plus
+               waiting for a threadpool slot
+    score      compatibility scoring (discovery)
+    serialize  JSON encoding of the response body
+    total      wall time until the response starts
+
+They go out as a Server-Timing header and, for requests slower than
+TIMING_LOG_MIN_MS, as one JSON log line.
+
+With PROFILING_ENABLED=1, adding ?__profile=1 to any request runs it under
+a sampling profiler and returns folded stacks ("a;b;c count" per line)
+instead of the normal body - feed it to flamegraph.pl or speedscope.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import parse_qs
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.responses import PlainTextResponse
+
+from api.metrics import observe_request, sql_statements
+from api.querylog import query_log
+from database import engine
+from services.timing import RequestTimings, current
+
+TIMING_LOG = os.getenv("TIMING_LOG", "1") == "1"
+# only requests at least this slow are logged (0 = every request)
+TIMING_LOG_MIN_MS = float(os.getenv("TIMING_LOG_MIN_MS", "100"))
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "2"))
+
+PHASES = ("db", "queue", "score", "serialize")
+
+# leaf frames that mean a thread is parked, not working
+IDLE_LEAVES = {"threading.wait", "selectors.select", "queue.get", "threading._wait_for_tstate_lock"}
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    sql_statements.inc(statement.split(None, 1)[0].upper() if statement else "")
+    if context is None:
+        return
+    elapsed = time.perf_counter() - context._query_started
+    query_log.observe(conn, statement, parameters, elapsed, executemany)
+    timings = current.get()
+    if timings is not None:
+        timings.add("db", elapsed)
+        timings.sql_count += 1
+
+
+def server_timing(timings: RequestTimings, total: float) -> str:
+    entries = [f"total;dur={total * 1000:.2f}"]
+    for phase in PHASES:
+        if phase in timings.phases:
+            entry = f"{phase};dur={timings.phases[phase] * 1000:.2f}"
+            if phase == "db":
+                entry += f';desc="{timings.sql_count} queries"'
+            entries.append(entry)
+    return ", ".join(entries)
+
+
+def log_request(scope, status: int, timings: RequestTimings, total: float):
+    route = scope.get("route")
+    record = {
+        "event": "request",
+        "method": scope["method"],
+        "path": scope["path"],
+        "route": getattr(route, "path", None),
+        "status": status,
+        "total_ms": round(total * 1000, 2),
+        "sql_count": timings.sql_count,
+    }
+    for phase in PHASES:
+        if phase in timings.phases:
+            record[f"{phase}_ms"] = round(timings.phases[phase] * 1000, 2)
+    print(json.dumps(record), flush=True)
+
+
+class StackSampler:
+    """Samples every thread's stack on an interval into folded-stack counts"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            self.samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}")
+                    frame = frame.f_back
+                if not stack or stack[0] in IDLE_LEAVES:
+                    continue
+                stack.append(names.get(ident, str(ident)))
+                self.counts[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+_profiling = threading.Lock()
+
+
+def _wants_profile(scope) -> bool:
+    if not PROFILING_ENABLED or b"__profile" not in scope.get("query_string", b""):
+        return False
+    return parse_qs(scope["query_string"].decode("latin-1")).get("__profile") == ["1"]
+
+
+class TimingMiddleware:
+    """Plain ASGI middleware owning the request's RequestTimings"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        timings = RequestTimings()
+        token = current.set(timings)
+        status = 500
+        total = None
+
+        async def send_with_timing(message):
+            nonlocal status, total
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total = timings.elapsed()
+                MutableHeaders(scope=message).append("Server-Timing", server_timing(timings, total))
+            await send(message)
+
+        try:
+            # one profile at a time - concurrent requests are served normally
+            if _wants_profile(scope) and _profiling.acquire(blocking=False):
+                try:
+                    status = await self._profiled(scope, receive, send, timings)
+                finally:
+                    _profiling.release()
+            else:
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            current.reset(token)
+            if total is None:
+                total = timings.elapsed()
+            observe_request(scope, status, total)
+            if TIMING_LOG and total * 1000 >= TIMING_LOG_MIN_MS:
+                log_request(scope, status, timings, total)
+
+    async def _profiled(self, scope, receive, send, timings: RequestTimings) -> int:
+        """Run the request under the sampler; reply with folded stacks"""
+        status = 500
+
+        async def discard(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        with StackSampler(PROFILE_INTERVAL_MS / 1000) as sampler:
+            await self.app(scope, receive, discard)
+        total = timings.elapsed()
+        response = PlainTextResponse(sampler.folded(), headers={
+            "Server-Timing": server_timing(timings, total),
+            "X-Profile-Status": str(status),
+            "X-Profile-Samples": str(sampler.samples),
+            "Cache-Control": "no-store",
+        })
+        await response(scope, receive, send)
+        return status
@@ -0,0 +1,164 @@
+"""Query fingerprints, rolling per-fingerprint stats and a slow-query log
+
+Every statement is normalized into a fingerprint (literals and bound
+parameters become ?, IN lists and multi-row VALUES collapse) and counted:
+calls, total and max time, and p99 over the last QUERY_SAMPLE_SIZE runs.
+Statements slower than SLOW_QUERY_MS are logged as one JSON line with their
+parameter shapes (types, never values) and the database's query plan, and
+kept for GET /admin/queries.
+"""
+import json
+import os
+import re
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+QUERY_SAMPLE_SIZE = int(os.getenv("QUERY_SAMPLE_SIZE", "1000"))
+# distinct fingerprints tracked; new ones past this share one bucket
+QUERY_MAX_FINGERPRINTS = int(os.getenv("QUERY_MAX_FINGERPRINTS", "2000"))
+SLOW_QUERY_KEEP = 100
+
+OVERFLOW_FINGERPRINT = "<other>"
+EXPLAINABLE = {"SELECT", "WITH", "INSERT", "UPDATE", "DELETE"}
+SORT_KEYS = {"total": "total_ms", "mean": "mean_ms", "max": "max_ms", "p99": "p99_ms", "count": "count"}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b", re.IGNORECASE)
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+|\?")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES = re.compile(r"\bVALUES\s*(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """Normalize a statement so every execution of the same query shares one key"""
+    fp = _STRING.sub("?", statement)
+    fp = _PLACEHOLDER.sub("?", fp)
+    fp = _NUMBER.sub("?", fp)
+    fp = _IN_LIST.sub("IN (...)", fp)
+    fp = _VALUES.sub(r"VALUES \1, ...", fp)
+    return _SPACE.sub(" ", fp).strip()
+
+
+def param_shapes(parameters, executemany: bool = False):
+    """Types of the bound parameters - enough to spot a bad shape, no values"""
+    if executemany and parameters:
+        return {"rows": len(parameters), "row": param_shapes(parameters[0])}
+    if isinstance(parameters, dict):
+        return {k: _shape(v) for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_shape(v) for v in parameters]
+    return _shape(parameters)
+
+
+def _shape(value) -> str:
+    if isinstance(value, (list, tuple, set)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+class QueryStats:
+    __slots__ = ("count", "total", "max", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=QUERY_SAMPLE_SIZE)
+
+
+def _p99(samples: List[float]) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] if ordered else 0.0
+
+
+class QueryLog:
+    """Per-fingerprint statistics plus the most recent slow queries"""
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS):
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self.stats: Dict[str, QueryStats] = {}
+        self.slow: deque = deque(maxlen=SLOW_QUERY_KEEP)
+
+    def observe(self, conn, statement: str, parameters, seconds: float, executemany: bool):
+        fp = fingerprint(statement)
+        with self._lock:
+            stats = self.stats.get(fp)
+            if stats is None:
+                if len(self.stats) >= QUERY_MAX_FINGERPRINTS:
+                    fp = OVERFLOW_FINGERPRINT
+                stats = self.stats.setdefault(fp, QueryStats())
+            stats.count += 1
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+            stats.samples.append(seconds)
+
+        if self.slow_ms > 0 and seconds * 1000 >= self.slow_ms:
+            self._log_slow(conn, fp, statement, parameters, seconds, executemany)
+
+    def _log_slow(self, conn, fp: str, statement: str, parameters, seconds: float, executemany: bool):
+        record = {
+            "event": "slow_query",
+            "ms": round(seconds * 1000, 2),
+            "fingerprint": fp,
+            "params": param_shapes(parameters, executemany),
+            "plan": explain(conn, statement, parameters[0] if executemany and parameters else parameters),
+        }
+        self.slow.append(record)
+        print(json.dumps(record, default=str), flush=True)
+
+    def top(self, limit: int = 20, sort: str = "total") -> List[dict]:
+        with self._lock:
+            items = [(fp, s.count, s.total, s.max, list(s.samples)) for fp, s in self.stats.items()]
+        rows = []
+        for fp, count, total, max_s, samples in items:
+            rows.append({
+                "fingerprint": fp,
+                "count": count,
+                "total_ms": round(total * 1000, 3),
+                "mean_ms": round(total / count * 1000, 3) if count else 0.0,
+                "max_ms": round(max_s * 1000, 3),
+                "p99_ms": round(_p99(samples) * 1000, 3),
+            })
+        key = SORT_KEYS[sort]
+        rows.sort(key=lambda r: r[key], reverse=True)
+        return rows[:limit]
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+            self.slow.clear()
+
+
+def explain(conn, statement: str, parameters) -> Optional[List[str]]:
+    """Query plan fetched on a raw DBAPI cursor, so it isn't observed itself"""
+    if statement.split(None, 1)[0].upper() not in EXPLAINABLE:
+        return None
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    elif dialect in ("postgresql", "mysql", "mariadb"):
+        prefix = "EXPLAIN "
+    else:
+        return None
+    try:
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters or ())
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+    except Exception as e:
+        return [f"unavailable: {e}"]
+    if dialect == "sqlite":
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [" ".join(str(col) for col in row) for row in rows]
+
+
+query_log = QueryLog()
@@ -0,0 +1,41 @@
+"""Operator routes - enabled only when ADMIN_TOKEN is set"""
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from typing import Optional
+import os
+import secrets
+
+from api.querylog import SORT_KEYS, query_log
+
+router = APIRouter(prefix="/admin", tags=["admin"], include_in_schema=False)
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Shared-secret check; without ADMIN_TOKEN the routes don't exist"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("/queries", dependencies=[Depends(require_admin)])
+def top_queries(
+    limit: int = Query(20, ge=1, le=500),
+    sort: str = Query("total", pattern=f"^({'|'.join(SORT_KEYS)})$"),
+    slow: int = Query(20, ge=0, le=100, description="recent slow queries to include"),
+):
+    """Top query fingerprints by total/mean/max/p99 time or count"""
+    return {
+        "slow_query_ms": query_log.slow_ms,
+        "fingerprints": len(query_log.stats),
+        "top": query_log.top(limit, sort),
+        "recent_slow": list(query_log.slow)[-slow:] if slow else [],
+    }
+
+
+@router.post("/queries/reset", dependencies=[Depends(require_admin)])
+def reset_queries():
+    """Start a fresh measurement window"""
+    query_log.reset()
+    return {"reset": True}
@@ -1,23 +1,27 @@
 """Agent profile routes"""
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session, load_only
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 import uuid
 import secrets
 import string
-import os
-import re
-import httpx
 
 from database.db import get_db
 from database.models import Agent
+from services.profiles import profile_cache
+from services.search import autocomplete, search_agents
+from api.serialization import FastJSONResponse
+from api.pagination import PAGE_SIZE_HELP, keyset_page, page_headers
+from api.fields import parse_fields
+from api.conditional import PROFILE_CACHE_CONTROL, cache_headers, etag_matches, make_etag, not_modified
 
 router = APIRouter(prefix="/agents", tags=["agents"])
 
-# X Scraper API for tweet verification
-X_SCRAPE_API = os.getenv("X_SCRAPE_API", "")
+# ids per bulk profile request (a GET query string stays well under URL limits)
+BULK_MAX_IDS_GET = 100
+BULK_MAX_IDS = 1000
 
 
 def generate_verification_code():
@@ -51,54 +55,6 @@ Looking for {seeking_text}. Think you can handle me? Swipe right 👀
 @moltbotbnb #{code}"""
 
 
-def extract_tweet_id(tweet_url: str) -> Optional[str]:
-    """Extract tweet ID from URL"""
-    # Handle both twitter.com and x.com URLs
-    patterns = [
-        r'twitter\.com/\w+/status/(\d+)',
-        r'x\.com/\w+/status/(\d+)',
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, tweet_url)
-        if match:
-            return match.group(1)
-    return None
-
-
-async def verify_tweet_contains_code(tweet_url: str, verification_code: str) -> tuple[bool, str]:
-    """Verify that the tweet contains the verification code AND mentions @moltbotbnb"""
-    tweet_id = extract_tweet_id(tweet_url)
-    if not tweet_id:
-        return False, "Could not extract tweet ID from URL"
-    
-    # If no scraper API configured, skip verification (dev mode)
-    if not X_SCRAPE_API:
-        return True, "Verification skipped (no scraper configured)"
-    
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{X_SCRAPE_API}/tweet/{tweet_id}", timeout=10.0)
-            if response.status_code != 200:
-                return False, f"Could not fetch tweet (status {response.status_code})"
-            
-            data = response.json()
-            tweet_text = data.get("full_text", "") or data.get("text", "") or data.get("content", "")
-            tweet_text_lower = tweet_text.lower()
-            
-            # Check for verification code
-            if verification_code.lower() not in tweet_text_lower:
-                return False, f"Tweet does not contain verification code '{verification_code}'"
-            
-            # Check for @moltbotbnb mention
-            if "moltbotbnb" not in tweet_text_lower:
-                return False, "Tweet must mention @moltbotbnb"
-            
-            return True, "Verification successful!"
-    except Exception as e:
-        # On error, allow verification (graceful degradation)
-        return True, f"Verification check failed, allowing: {str(e)}"
-
-
 class AgentCreate(BaseModel):
     name: str
     emoji: str = "🤖"
@@ -165,10 +121,57 @@ class RegisterResponse(BaseModel):
     important: str = "⚠️ Tweet this to claim your profile! The tweet must include your code and tag @moltbotbnb."
 
 
+AGENT_RESPONSE_FIELDS = list(AgentResponse.model_fields)
+
+
+class BulkProfilesRequest(BaseModel):
+    ids: List[str] = Field(..., max_length=BULK_MAX_IDS)
+
+
+class BulkProfilesResponse(BaseModel):
+    agents: List[dict]  # AgentResponse, or the fields= subset of it
+    missing: List[str]
+
+
+class SearchResult(BaseModel):
+    id: str
+    name: str
+    emoji: str
+    tagline: Optional[str]
+    chains: List[str]
+    vibes: List[str]
+    skills: List[str]
+    claimed: bool
+    reputation: float
+    score: float  # bm25 relevance, higher is better (0 without FTS)
+
+
 class ClaimVerifyRequest(BaseModel):
     tweet_url: str
 
 
+class ClaimJobResponse(BaseModel):
+    job_id: str
+    agent_id: str
+    status: str  # queued, running, succeeded, failed
+    message: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    status_url: str
+    
+    @classmethod
+    def from_job(cls, job) -> "ClaimJobResponse":
+        return cls(
+            job_id=job.id,
+            agent_id=job.agent_id,
+            status=job.status,
+            message=job.message,
+            created_at=job.created_at,
+            updated_at=job.updated_at,
+            status_url=f"/agents/{job.agent_id}/status"
+        )
+
+
 @router.post("/register", response_model=RegisterResponse)
 def register_agent(agent_data: AgentCreate, db: Session = Depends(get_db)):
     """Register a new agent - returns verification code for claiming"""
@@ -218,19 +221,138 @@ def register_agent(agent_data: AgentCreate, db: Session = Depends(get_db)):
     )
 
 
+def agent_row(agent, fields: Optional[List[str]] = None) -> dict:
+    """Encode an agent (row, snapshot or projected row) to the AgentResponse shape or a subset"""
+    row = {}
+    for field in fields or AGENT_RESPONSE_FIELDS:
+        value = getattr(agent, field)
+        if field in ("chains", "vibes", "skills"):
+            value = list(value or [])
+        elif field == "claimed":
+            value = value or False
+        row[field] = value
+    return row
+
+
+def bulk_profiles(db: Session, ids: List[str], fields: Optional[List[str]]) -> dict:
+    """Profiles in request order plus the ids that don't exist"""
+    ids = list(dict.fromkeys(agent_id for agent_id in ids if agent_id))
+    if fields is None:
+        found = profile_cache.get_many(db, ids)
+    else:
+        # cached snapshots cost nothing; misses load just the requested columns
+        found = dict(profile_cache.cached(db, ids))
+        missing = [agent_id for agent_id in ids if agent_id not in found]
+        if missing:
+            columns = [getattr(Agent, field) for field in fields]
+            for row in db.query(*columns).filter(Agent.id.in_(missing)):
+                found[row.id] = row
+    return {
+        "agents": [agent_row(found[agent_id], fields) for agent_id in ids if agent_id in found],
+        "missing": [agent_id for agent_id in ids if agent_id not in found],
+    }
+
+
+@router.get("/bulk", response_model=BulkProfilesResponse)
+def get_agents_bulk(
+    ids: str = Query(..., description=f"comma-separated, at most {BULK_MAX_IDS_GET}"),
+    fields: Optional[str] = Query(None, description="comma-separated AgentResponse fields"),
+    db: Session = Depends(get_db)
+):
+    """Many profiles in one request, in the order asked for"""
+    id_list = [agent_id.strip() for agent_id in ids.split(",")]
+    if len(id_list) > BULK_MAX_IDS_GET:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_IDS_GET} ids per GET - POST longer lists")
+    return FastJSONResponse(bulk_profiles(db, id_list, parse_fields(fields, AGENT_RESPONSE_FIELDS)))
+
+
+@router.post("/bulk", response_model=BulkProfilesResponse)
+def post_agents_bulk(
+    request_data: BulkProfilesRequest,
+    fields: Optional[str] = Query(None, description="comma-separated AgentResponse fields"),
+    db: Session = Depends(get_db)
+):
+    """Bulk profile fetch for long id lists"""
+    return FastJSONResponse(bulk_profiles(db, request_data.ids, parse_fields(fields, AGENT_RESPONSE_FIELDS)))
+
+
+def search_row(agent: Agent, score: float = 0.0) -> dict:
+    """Encode an agent straight to the SearchResult shape"""
+    return {
+        "id": agent.id,
+        "name": agent.name,
+        "emoji": agent.emoji,
+        "tagline": agent.tagline,
+        "chains": agent.chains or [],
+        "vibes": agent.vibes or [],
+        "skills": agent.skills or [],
+        "claimed": agent.claimed or False,
+        "reputation": agent.reputation or 3.0,
+        "score": round(score, 4),
+    }
+
+
+# declared before /{agent_id} so "search" isn't taken for an id
+@router.get("/search", response_model=List[SearchResult])
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Full-text search over name, tagline, bio, chains, vibes and skills (best first)
+
+    X-Search-Truncated: true means only a capped subset of matches was ranked
+    (SEARCH_RANK_WINDOW) - narrow the query for exact results.
+    """
+    results, truncated = search_agents(db, q, limit)
+    headers = {"X-Search-Truncated": "true"} if truncated else None
+    return FastJSONResponse([search_row(agent, score) for agent, score in results], headers=headers)
+
+
+@router.get("/search/autocomplete", response_model=List[SearchResult])
+def search_autocomplete(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=25),
+    db: Session = Depends(get_db)
+):
+    """Name completions for the typed prefix"""
+    return FastJSONResponse([search_row(agent) for agent in autocomplete(db, q, limit)])
+
+
+def profile_etag(agent_id: str, updated_at: Optional[datetime], fields: Optional[List[str]] = None) -> str:
+    """ETag for one representation of a profile - Agent.updated_at plus the fields= subset"""
+    return make_etag("agent", agent_id, updated_at.isoformat() if updated_at else "",
+                     ",".join(fields) if fields is not None else "*")
+
+
 @router.get("/{agent_id}", response_model=AgentResponse)
-def get_agent(agent_id: str, db: Session = Depends(get_db)):
+def get_agent(
+    agent_id: str,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description="comma-separated AgentResponse fields"),
+    db: Session = Depends(get_db)
+):
     """Get agent by ID"""
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
+    field_list = parse_fields(fields, AGENT_RESPONSE_FIELDS)
+    agent = profile_cache.get(db, agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
+    
+    headers = cache_headers(profile_etag(agent.id, agent.updated_at, field_list), PROFILE_CACHE_CONTROL,
+                            agent.updated_at)
+    if etag_matches(request, headers["ETag"]):
+        return not_modified(headers)
+    if field_list is not None:
+        return FastJSONResponse(agent_row(agent, field_list), headers=headers)
+    response.headers.update(headers)
     return agent
 
 
 @router.get("/by-name/{name}", response_model=AgentResponse)
 def get_agent_by_name(name: str, db: Session = Depends(get_db)):
     """Get agent by name"""
-    agent = db.query(Agent).filter(Agent.name == name).first()
+    agent = profile_cache.get_by_name(db, name)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     return agent
@@ -255,19 +377,32 @@ def update_agent(agent_id: str, update_data: AgentUpdate, db: Session = Depends(
 
 @router.get("/", response_model=List[AgentResponse])
 def list_agents(
-    skip: int = 0, 
-    limit: int = 20, 
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    skip: int = Query(0, ge=0, deprecated=True, description="use cursor"),
+    limit: int = Query(20, description=PAGE_SIZE_HELP),
+    fields: Optional[str] = Query(None, description="comma-separated AgentResponse fields"),
     db: Session = Depends(get_db)
 ):
-    """List all agents"""
-    agents = db.query(Agent).offset(skip).limit(limit).all()
+    """List all agents, oldest first - follow X-Next-Cursor for the next page"""
+    field_list = parse_fields(fields, AGENT_RESPONSE_FIELDS)
+    query = db.query(Agent)
+    if field_list is not None:
+        columns = [getattr(Agent, field) for field in field_list]
+        query = query.options(load_only(*dict.fromkeys(columns + [Agent.created_at])))
+    agents, next_cursor = keyset_page(query, (Agent.created_at, Agent.id), limit, cursor, offset=skip)
+    if field_list is not None:
+        return FastJSONResponse([agent_row(agent, field_list) for agent in agents],
+                                headers=page_headers(request, next_cursor))
+    response.headers.update(page_headers(request, next_cursor))
     return agents
 
 
-@router.post("/{agent_id}/claim/verify", response_model=AgentResponse)
-async def verify_claim(agent_id: str, claim_data: ClaimVerifyRequest, db: Session = Depends(get_db)):
-    """Verify agent claim via tweet URL - checks tweet contains verification code"""
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
+@router.post("/{agent_id}/claim/verify", response_model=ClaimJobResponse, status_code=202)
+def verify_claim(agent_id: str, claim_data: ClaimVerifyRequest, db: Session = Depends(get_db)):
+    """Queue claim verification via tweet URL - poll /agents/{agent_id}/status for the result"""
+    agent = profile_cache.get(db, agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
@@ -282,39 +417,43 @@ async def verify_claim(agent_id: str, claim_data: ClaimVerifyRequest, db: Sessio
     if "twitter.com" not in tweet_url and "x.com" not in tweet_url:
         raise HTTPException(status_code=400, detail="Must be a Twitter/X URL")
     
-    # Verify the tweet contains the verification code
-    verified, message = await verify_tweet_contains_code(tweet_url, agent.verification_code)
-    
-    if not verified:
-        raise HTTPException(status_code=400, detail=message)
-    
-    agent.claimed = True
-    agent.claim_tweet_url = tweet_url
-    agent.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(agent)
+    # imported on use - importing the app shouldn't load claim verification
+    from services.claims import ClaimInProgressError, enqueue_claim
+    from services.tweets import extract_tweet_id
+
+    if not extract_tweet_id(tweet_url):
+        raise HTTPException(status_code=400, detail="Could not extract tweet ID from URL")
     
-    return agent
+    # the scraper call happens in the background claim worker
+    try:
+        job = enqueue_claim(db, agent, tweet_url)
+    except ClaimInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return ClaimJobResponse.from_job(job)
 
 
 @router.get("/{agent_id}/status")
 def get_agent_status(agent_id: str, db: Session = Depends(get_db)):
-    """Get agent claim status"""
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
+    """Get agent claim status, including the latest verification job"""
+    agent = profile_cache.get(db, agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
+    from services.claims import latest_claim_job
+
+    job = latest_claim_job(db, agent_id)
     return {
         "status": "claimed" if agent.claimed else "pending_claim",
         "agent_id": agent.id,
-        "name": agent.name
+        "name": agent.name,
+        "claim_job": ClaimJobResponse.from_job(job).model_dump(mode="json") if job else None
     }
 
 
 @router.get("/{agent_id}/verification-code")
 def get_verification_code(agent_id: str, db: Session = Depends(get_db)):
     """Get verification code for unclaimed agent (agent-friendly endpoint)"""
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
+    agent = profile_cache.get(db, agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
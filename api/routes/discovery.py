@@ -1,16 +1,35 @@
 """Discovery and swiping routes"""
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session, load_only
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
+from database import attributes
 from database.db import get_db
 from database.models import Agent, Swipe, Match
-from services.compatibility import calculate_compatibility
+from services import inbox, swipe_archive
+from services.cards import card_worker
+from services.compatibility import calculate_compatibility, compatibility_score
+from services.singleflight import single_flight
+from services.timing import timed
+from services.profiles import expire_profiles, profile_cache
+from api.serialization import FastJSONResponse
+from api.fields import parse_fields
+from api.metrics import feed_pool
 
 router = APIRouter(prefix="/discovery", tags=["discovery"])
 
+# match_type filter -> the flag a candidate must have set
+SEEKING = {
+    "rivalry": Agent.seeking_rivalry,
+    "collaboration": Agent.seeking_collaboration,
+    "friendship": Agent.seeking_friendship,
+    "mentorship": Agent.seeking_mentorship,
+    "romance": Agent.seeking_romance,
+}
+
 
 class AgentCard(BaseModel):
     id: str
@@ -27,11 +46,24 @@ class AgentCard(BaseModel):
     rivalries_won: int
     rivalries_lost: int
     compatibility: dict  # score + breakdown
+    score: Optional[float] = None  # compatibility total alone, only via fields=
     
     class Config:
         from_attributes = True
 
 
+# the default card; "score" has to be asked for
+CARD_FIELDS = [field for field in AgentCard.model_fields if field != "score"]
+FEED_FIELDS = list(AgentCard.model_fields)
+# columns agent_to_dict reads for scoring
+SCORING_COLUMNS = [
+    Agent.id, Agent.name, Agent.chains, Agent.vibes, Agent.skills,
+    Agent.seeking_rivalry, Agent.seeking_collaboration, Agent.seeking_friendship,
+    Agent.seeking_mentorship, Agent.seeking_romance,
+    Agent.seq,  # for the left-swipe archive check
+]
+
+
 class SwipeRequest(BaseModel):
     direction: str  # left, right, super
 
@@ -43,6 +75,21 @@ class SwipeResponse(BaseModel):
     compatibility: Optional[dict] = None
 
 
+def card_row(candidate: Agent, score: float, compat: Optional[dict], fields: Optional[List[str]] = None) -> dict:
+    """Encode a candidate straight to the AgentCard shape, or the fields= subset of it"""
+    row = {}
+    for field in fields or CARD_FIELDS:
+        if field == "compatibility":
+            row[field] = compat
+        elif field == "score":
+            row[field] = score
+        elif field in ("chains", "vibes", "skills"):
+            row[field] = getattr(candidate, field) or []
+        else:
+            row[field] = getattr(candidate, field)
+    return row
+
+
 def agent_to_dict(agent: Agent) -> dict:
     """Convert agent to dict for compatibility calc"""
     return {
@@ -59,24 +106,30 @@ def agent_to_dict(agent: Agent) -> dict:
     }
 
 
-@router.get("/{agent_id}/feed", response_model=List[AgentCard])
-def get_discovery_feed(
+@single_flight()
+def ranked_feed(
     agent_id: str,
-    limit: int = 10,
-    match_type: Optional[str] = None,
-    db: Session = Depends(get_db)
-):
+    limit: int,
+    match_type: Optional[str],
+    db: Session,
+    chain: Optional[str] = None,
+    skill: Optional[str] = None,
+    vibe: Optional[str] = None,
+    min_reputation: Optional[float] = None,
+    claimed_only: bool = False,
+    fields: Optional[List[str]] = None,
+) -> List[dict]:
     """
-    Get discovery feed for an agent
-    Returns agents they haven't swiped on yet, sorted by compatibility
+    Score and rank unswiped candidates for an agent
+    Concurrent identical feed requests share one computation
     """
     # get the requesting agent
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
+    agent = profile_cache.get(db, agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
     # get IDs of agents already swiped
-    swiped_ids = db.query(Swipe.swiped_id).filter(Swipe.swiper_id == agent_id).subquery()
+    swiped_ids = select(Swipe.swiped_id).where(Swipe.swiper_id == agent_id)
     
     # get agents not yet swiped (excluding self)
     query = db.query(Agent).filter(
@@ -85,47 +138,80 @@ def get_discovery_feed(
     )
     
     # filter by match type if specified
-    if match_type == "rivalry":
-        query = query.filter(Agent.seeking_rivalry == True)
-    elif match_type == "collaboration":
-        query = query.filter(Agent.seeking_collaboration == True)
-    elif match_type == "friendship":
-        query = query.filter(Agent.seeking_friendship == True)
+    if match_type in SEEKING:
+        query = query.filter(SEEKING[match_type] == True)
+    if min_reputation is not None:
+        query = query.filter(Agent.reputation >= min_reputation)
+    if claimed_only:
+        query = query.filter(Agent.claimed == True)
+    if fields is not None:
+        # read only what scoring and the requested card fields need
+        shown = [getattr(Agent, field) for field in fields if field not in ("compatibility", "score")]
+        query = query.options(load_only(*dict.fromkeys(SCORING_COLUMNS + shown)))
+    
+    # attribute filters are primary-key lookups on the mirror tables, so only
+    # matching agents are read; without them they're checked per candidate
+    wanted = [(column, value) for column, value in (("chains", chain), ("skills", skill), ("vibes", vibe))
+              if value and value.strip()]
+    indexed = attributes.supported(db.get_bind())
+    if indexed:
+        for column, value in wanted:
+            query = query.filter(attributes.has(column, value))
     
     candidates = query.all()
+    if wanted and not indexed:
+        candidates = [c for c in candidates
+                      if all(attributes.contains(getattr(c, column), value) for column, value in wanted)]
+    # left swipes compacted out of the swipes table
+    archived = swipe_archive.load(db, agent_id)
+    if archived is not None:
+        candidates = [c for c in candidates if c.seq not in archived]
+    feed_pool.observe(len(candidates))
+    
+    # calculate compatibility for each - the total ranks, details only for the page
+    with timed("score"):
+        agent_dict = agent_to_dict(agent)
+        scored = []
+        for candidate in candidates:
+            candidate_dict = agent_to_dict(candidate)
+            scored.append((compatibility_score(agent_dict, candidate_dict), candidate))
+
+        # sort by compatibility score (stable, so ties keep query order)
+        scored.sort(key=lambda x: x[0], reverse=True)
+        details = fields is None or "compatibility" in fields
+        page = [
+            (candidate, score, calculate_compatibility(agent_dict, agent_to_dict(candidate)) if details else None)
+            for score, candidate in scored[:limit]
+        ]
     
-    # calculate compatibility for each
-    agent_dict = agent_to_dict(agent)
-    scored = []
-    for candidate in candidates:
-        candidate_dict = agent_to_dict(candidate)
-        compat = calculate_compatibility(agent_dict, candidate_dict)
-        scored.append((candidate, compat))
-    
-    # sort by compatibility score
-    scored.sort(key=lambda x: x[1]["total"], reverse=True)
-    
-    # build response
-    results = []
-    for candidate, compat in scored[:limit]:
-        results.append(AgentCard(
-            id=candidate.id,
-            name=candidate.name,
-            emoji=candidate.emoji,
-            tagline=candidate.tagline,
-            chains=candidate.chains or [],
-            vibes=candidate.vibes or [],
-            skills=candidate.skills or [],
-            seeking_rivalry=candidate.seeking_rivalry,
-            seeking_collaboration=candidate.seeking_collaboration,
-            seeking_friendship=candidate.seeking_friendship,
-            reputation=candidate.reputation,
-            rivalries_won=candidate.rivalries_won,
-            rivalries_lost=candidate.rivalries_lost,
-            compatibility=compat,
-        ))
-    
-    return results
+    return [card_row(candidate, score, compat, fields) for candidate, score, compat in page]
+
+
+@router.get("/{agent_id}/feed", response_model=List[AgentCard])
+def get_discovery_feed(
+    agent_id: str,
+    limit: int = 10,
+    match_type: Optional[str] = None,
+    chain: Optional[str] = None,
+    skill: Optional[str] = None,
+    vibe: Optional[str] = None,
+    min_reputation: Optional[float] = Query(None, ge=0, le=5),
+    claimed_only: bool = False,
+    fields: Optional[str] = Query(None, description="comma-separated AgentCard fields, e.g. id,score"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get discovery feed for an agent
+    Returns agents they haven't swiped on yet, sorted by compatibility
+    Optional filters: match_type (the flag candidates seek), chain, skill,
+    vibe (case-insensitive), min_reputation and claimed_only
+    fields= trims each card; compatibility details are only computed when listed
+    """
+    return FastJSONResponse(ranked_feed(
+        agent_id, limit, match_type, db,
+        chain=chain, skill=skill, vibe=vibe, min_reputation=min_reputation, claimed_only=claimed_only,
+        fields=parse_fields(fields, FEED_FIELDS),
+    ))
 
 
 @router.post("/{agent_id}/swipe/{target_id}", response_model=SwipeResponse)
@@ -140,29 +226,35 @@ def swipe(
     Returns whether it's a match (mutual right swipe)
     """
     # validate agents exist
-    swiper = db.query(Agent).filter(Agent.id == agent_id).first()
-    target = db.query(Agent).filter(Agent.id == target_id).first()
+    swiper = profile_cache.get(db, agent_id)
+    target = profile_cache.get(db, target_id)
     
     if not swiper:
         raise HTTPException(status_code=404, detail="Swiper not found")
     if not target:
         raise HTTPException(status_code=404, detail="Target not found")
     
-    # check for duplicate swipe
+    # check for duplicate swipe, including archived left swipes
     existing = db.query(Swipe).filter(
         Swipe.swiper_id == agent_id,
         Swipe.swiped_id == target_id
     ).first()
-    if existing:
+    if existing or swipe_archive.archived(db, agent_id, target.seq):
         raise HTTPException(status_code=400, detail="Already swiped on this agent")
     
     direction = swipe_data.direction.lower()
     
+    # counters are bumped with atomic UPDATEs - the profiles are cached snapshots
+    swiper_counts = {Agent.total_swipes: Agent.total_swipes + 1}
+    
     # super claw handling
     if direction == "super":
-        if swiper.super_claws <= 0:
+        # conditional decrement, so a stale snapshot can't overspend
+        spent = db.query(Agent).filter(Agent.id == agent_id, Agent.super_claws > 0).update(
+            {Agent.super_claws: Agent.super_claws - 1}, synchronize_session=False
+        )
+        if not spent:
             raise HTTPException(status_code=400, detail="No Super Claws remaining")
-        swiper.super_claws -= 1
         direction = "super"  # treated as right but with boost
     
     # record swipe
@@ -173,9 +265,6 @@ def swipe(
     )
     db.add(swipe_record)
     
-    # update stats
-    swiper.total_swipes += 1
-    
     # check for match (only on right/super swipes)
     is_match = False
     match_id = None
@@ -205,14 +294,21 @@ def swipe(
             db.add(match)
             
             # update match counts
-            swiper.matches_count += 1
-            target.matches_count += 1
+            swiper_counts[Agent.matches_count] = Agent.matches_count + 1
+            db.query(Agent).filter(Agent.id == target_id).update(
+                {Agent.matches_count: Agent.matches_count + 1}, synchronize_session=False
+            )
             
             is_match = True
             db.flush()
             match_id = match.id
+            inbox.open_conversation(db, match)
     
+    db.query(Agent).filter(Agent.id == agent_id).update(swiper_counts, synchronize_session=False)
+    expire_profiles(db, agent_id, target_id)
     db.commit()
+    if is_match:
+        card_worker.enqueue(match_id)
     
     return SwipeResponse(
         swiped=True,
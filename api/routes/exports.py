@@ -0,0 +1,113 @@
+"""Streaming NDJSON exports for analytics - admin only
+
+GET /export/{table} streams every row of agents, swipes, matches or
+messages as one JSON object per line, ordered by id. Rows are read in
+EXPORT_BATCH_SIZE keyset pages, each a short read of its own, and written
+out as they arrive, so memory stays flat however large the table is and
+writers are never locked out for the length of a dump. Incremental
+pulls filter on after_id (resume from the last id you saw) and/or
+updated_since (agents: updated_at; the append-only tables: created_at).
+Clients sending Accept-Encoding: gzip get a gzip stream compressed here at
+EXPORT_GZIP_LEVEL rather than by the middleware's slower default level.
+"""
+import os
+import zlib
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Integer, select
+
+from database import SessionLocal
+from database.models import Agent, Match, Message, Swipe
+from api.routes.admin import require_admin
+from api.serialization import dumps
+
+router = APIRouter(prefix="/export", tags=["export"], include_in_schema=False,
+                   dependencies=[Depends(require_admin)])
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+# bytes buffered before a chunk is sent
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# table -> (model, change-time column, columns left out)
+EXPORTS = {
+    "agents": (Agent, Agent.updated_at, {"verification_code"}),
+    "swipes": (Swipe, Swipe.created_at, set()),
+    "matches": (Match, Match.created_at, set()),
+    "messages": (Message, Message.created_at, set()),
+}
+
+
+def export_query(table: str, after_id: Optional[str], updated_since: Optional[datetime]):
+    """(query without the id bound, id column, first id bound)"""
+    model, changed_at, hidden = EXPORTS[table]
+    columns = [c for c in model.__table__.columns if c.name not in hidden]
+    query = select(*columns).order_by(model.id)
+    if after_id is not None and isinstance(model.id.type, Integer):
+        try:
+            after_id = int(after_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="after_id must be an integer for this table")
+    if updated_since is not None:
+        query = query.where(changed_at >= updated_since)
+    return query, model.id, after_id
+
+
+def ndjson_lines(query, id_column, after_id=None):
+    """Encoded lines in ~EXPORT_CHUNK_SIZE chunks, one batch of rows in memory at a time
+
+    Each batch is its own short read (id > last id seen) on a fresh session,
+    so writers are only blocked for one batch, never for the whole export.
+    """
+    buffer = []
+    size = 0
+    while True:
+        batch = query if after_id is None else query.where(id_column > after_id)
+        db = SessionLocal()
+        try:
+            rows = db.execute(batch.limit(EXPORT_BATCH_SIZE)).all()
+        finally:
+            db.close()
+        for row in rows:
+            line = dumps(row._asdict()) + b"\n"
+            buffer.append(line)
+            size += len(line)
+            if size >= EXPORT_CHUNK_SIZE:
+                yield b"".join(buffer)
+                buffer, size = [], 0
+        if len(rows) < EXPORT_BATCH_SIZE:
+            break
+        after_id = getattr(rows[-1], id_column.key)
+    if buffer:
+        yield b"".join(buffer)
+
+
+def gzipped(chunks):
+    compressor = zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@router.get("/{table}")
+def export_table(
+    table: str,
+    request: Request,
+    after_id: Optional[str] = None,
+    updated_since: Optional[datetime] = None,
+):
+    """Stream a table as NDJSON, ordered by id"""
+    if table not in EXPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown export, try one of {sorted(EXPORTS)}")
+    body = ndjson_lines(*export_query(table, after_id, updated_since))
+    headers = {"Cache-Control": "no-store", "Content-Disposition": f'attachment; filename="{table}.ndjson"'}
+    if "gzip" in request.headers.get("accept-encoding", "").lower():
+        body = gzipped(body)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
@@ -1,13 +1,17 @@
 """Match management routes"""
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session, contains_eager
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
 from database.db import get_db
-from database.models import Agent, Match, Message
+from database.models import Agent, ConversationSummary, Match, Message
+from api.serialization import FastJSONResponse
+from api.pagination import PAGE_SIZE_HELP, keyset_page, page_headers
+from api.fields import parse_fields
+from services import inbox
+from services.profiles import profile_cache
 
 router = APIRouter(prefix="/matches", tags=["matches"])
 
@@ -22,6 +26,13 @@ class MatchedAgent(BaseModel):
         from_attributes = True
 
 
+class LastMessage(BaseModel):
+    id: int
+    sender_id: str
+    preview: str
+    created_at: datetime
+
+
 class MatchResponse(BaseModel):
     id: int
     partner: MatchedAgent
@@ -30,11 +41,20 @@ class MatchResponse(BaseModel):
     compatibility_reasons: List[str]
     created_at: datetime
     is_active: bool
+    # inbox summary, from the requesting agent's side
+    last_message: Optional[LastMessage] = None
+    message_count: int = 0
+    unread_count: int = 0
+    last_activity_at: datetime
     
     class Config:
         from_attributes = True
 
 
+MATCH_FIELDS = list(MatchResponse.model_fields)
+SUMMARY_FIELDS = {"last_message", "message_count", "unread_count", "last_activity_at"}
+
+
 class MessageCreate(BaseModel):
     content: str
 
@@ -50,57 +70,99 @@ class MessageResponse(BaseModel):
         from_attributes = True
 
 
+def match_row(match: Match, partner: Optional[Agent], fields: Optional[List[str]] = None,
+              summary: Optional[ConversationSummary] = None) -> dict:
+    """Encode a match (and its inbox summary) to the MatchResponse shape, or the fields= subset of it"""
+    row = {}
+    for field in fields or MATCH_FIELDS:
+        if field == "partner":
+            row[field] = {
+                "id": partner.id,
+                "name": partner.name,
+                "emoji": partner.emoji,
+                "tagline": partner.tagline,
+            }
+        elif field == "compatibility_reasons":
+            row[field] = match.compatibility_reasons or []
+        elif field == "last_message":
+            row[field] = {
+                "id": summary.last_message_id,
+                "sender_id": summary.last_sender_id,
+                "preview": summary.last_message_preview,
+                "created_at": summary.last_message_at,
+            } if summary is not None and summary.last_message_id is not None else None
+        elif field == "last_activity_at":
+            row[field] = summary.last_activity_at if summary is not None else match.created_at
+        elif field in SUMMARY_FIELDS:
+            row[field] = getattr(summary, field) if summary is not None else 0
+        else:
+            row[field] = getattr(match, field)
+    return row
+
+
+def message_row(message: Message, sender_name: str) -> dict:
+    """Encode a message straight to the MessageResponse shape"""
+    return {
+        "id": message.id,
+        "sender_id": message.sender_id,
+        "sender_name": sender_name,
+        "content": message.content,
+        "created_at": message.created_at,
+    }
+
+
 @router.get("/{agent_id}", response_model=List[MatchResponse])
 def get_matches(
     agent_id: str,
+    request: Request,
     active_only: bool = True,
+    limit: int = Query(50, description=PAGE_SIZE_HELP),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="comma-separated MatchResponse fields"),
     db: Session = Depends(get_db)
 ):
-    """Get all matches for an agent"""
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
+    """Get an agent's inbox: matches by latest activity, with last message and unread count
+
+    Follow X-Next-Cursor for older conversations.
+    """
+    field_list = parse_fields(fields, MATCH_FIELDS)
+    agent = profile_cache.get(db, agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
-    query = db.query(Match).filter(
-        or_(Match.agent_a_id == agent_id, Match.agent_b_id == agent_id)
+    # one index range on the agent's summary rows, joined to their matches
+    eager = contains_eager(ConversationSummary.match)
+    if field_list is not None:
+        shown = [getattr(Match, field) for field in field_list if field != "partner" and field not in SUMMARY_FIELDS]
+        eager = eager.load_only(*dict.fromkeys([Match.id, Match.created_at] + shown))
+    query = db.query(ConversationSummary).join(ConversationSummary.match).options(eager).filter(
+        ConversationSummary.agent_id == agent_id
     )
     
     if active_only:
         query = query.filter(Match.is_active == True)
     
-    matches = query.order_by(Match.created_at.desc()).all()
-    
-    results = []
-    for match in matches:
-        # determine partner
-        partner_id = match.agent_b_id if match.agent_a_id == agent_id else match.agent_a_id
-        partner = db.query(Agent).filter(Agent.id == partner_id).first()
-        
-        results.append(MatchResponse(
-            id=match.id,
-            partner=MatchedAgent(
-                id=partner.id,
-                name=partner.name,
-                emoji=partner.emoji,
-                tagline=partner.tagline
-            ),
-            match_type=match.match_type,
-            compatibility_score=match.compatibility_score,
-            compatibility_reasons=match.compatibility_reasons or [],
-            created_at=match.created_at,
-            is_active=match.is_active
-        ))
-    
-    return results
+    summaries, next_cursor = keyset_page(
+        query, (ConversationSummary.last_activity_at, ConversationSummary.match_id), limit, cursor, descending=True
+    )
+    
+    # partners - one cache pass instead of a query per match
+    wants_partner = field_list is None or "partner" in field_list
+    partners = profile_cache.get_many(db, (s.partner_id for s in summaries)) if wants_partner else {}
+    results = [match_row(s.match, partners.get(s.partner_id), field_list, s) for s in summaries]
+    
+    return FastJSONResponse(results, headers=page_headers(request, next_cursor))
 
 
 @router.get("/{agent_id}/match/{match_id}", response_model=MatchResponse)
 def get_match(
     agent_id: str,
     match_id: int,
+    fields: Optional[str] = Query(None, description="comma-separated MatchResponse fields"),
     db: Session = Depends(get_db)
 ):
     """Get specific match details"""
+    field_list = parse_fields(fields, MATCH_FIELDS)
     match = db.query(Match).filter(Match.id == match_id).first()
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
@@ -110,22 +172,11 @@ def get_match(
         raise HTTPException(status_code=403, detail="Not your match")
     
     partner_id = match.agent_b_id if match.agent_a_id == agent_id else match.agent_a_id
-    partner = db.query(Agent).filter(Agent.id == partner_id).first()
-    
-    return MatchResponse(
-        id=match.id,
-        partner=MatchedAgent(
-            id=partner.id,
-            name=partner.name,
-            emoji=partner.emoji,
-            tagline=partner.tagline
-        ),
-        match_type=match.match_type,
-        compatibility_score=match.compatibility_score,
-        compatibility_reasons=match.compatibility_reasons or [],
-        created_at=match.created_at,
-        is_active=match.is_active
-    )
+    partner = profile_cache.get(db, partner_id) if field_list is None or "partner" in field_list else None
+    wants_summary = field_list is None or SUMMARY_FIELDS.intersection(field_list)
+    summary = inbox.summary_for(db, agent_id, match_id) if wants_summary else None
+    
+    return FastJSONResponse(match_row(match, partner, field_list, summary))
 
 
 @router.post("/{agent_id}/match/{match_id}/message", response_model=MessageResponse)
@@ -147,7 +198,7 @@ def send_message(
     if not match.is_active:
         raise HTTPException(status_code=400, detail="Match is no longer active")
     
-    sender = db.query(Agent).filter(Agent.id == agent_id).first()
+    sender = profile_cache.get(db, agent_id)
     
     message = Message(
         match_id=match_id,
@@ -155,26 +206,24 @@ def send_message(
         content=message_data.content
     )
     db.add(message)
+    db.flush()
+    inbox.record_message(db, match, message)
     db.commit()
     db.refresh(message)
     
-    return MessageResponse(
-        id=message.id,
-        sender_id=message.sender_id,
-        sender_name=sender.name,
-        content=message.content,
-        created_at=message.created_at
-    )
+    return FastJSONResponse(message_row(message, sender.name))
 
 
 @router.get("/{agent_id}/match/{match_id}/messages", response_model=List[MessageResponse])
 def get_messages(
     agent_id: str,
     match_id: int,
-    limit: int = 50,
+    request: Request,
+    limit: int = Query(50, description=PAGE_SIZE_HELP),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get messages for a match"""
+    """Get the latest messages for a match - X-Next-Cursor pages back to older ones"""
     match = db.query(Match).filter(Match.id == match_id).first()
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
@@ -183,22 +232,20 @@ def get_messages(
     if match.agent_a_id != agent_id and match.agent_b_id != agent_id:
         raise HTTPException(status_code=403, detail="Not your match")
     
-    messages = db.query(Message).filter(
-        Message.match_id == match_id
-    ).order_by(Message.created_at.desc()).limit(limit).all()
-    
-    results = []
-    for msg in reversed(messages):  # oldest first
-        sender = db.query(Agent).filter(Agent.id == msg.sender_id).first()
-        results.append(MessageResponse(
-            id=msg.id,
-            sender_id=msg.sender_id,
-            sender_name=sender.name,
-            content=msg.content,
-            created_at=msg.created_at
-        ))
-    
-    return results
+    messages, next_cursor = keyset_page(
+        db.query(Message).filter(Message.match_id == match_id),
+        (Message.created_at, Message.id), limit, cursor, descending=True
+    )
+    
+    senders = profile_cache.get_many(db, (msg.sender_id for msg in messages))
+    results = [message_row(msg, senders[msg.sender_id].name) for msg in reversed(messages)]  # oldest first
+    
+    if cursor is None and messages:
+        # the newest page has been seen (after encoding - commit expires the rows)
+        inbox.mark_read(db, agent_id, match_id, messages[0].id)
+        db.commit()
+    
+    return FastJSONResponse(results, headers=page_headers(request, next_cursor))
 
 
 @router.delete("/{agent_id}/match/{match_id}")
@@ -1,16 +1,26 @@
 """Public stats and activity feed routes"""
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
+import os
 
 from database.db import get_db
 from database.models import Agent, Match, Swipe
+from services.singleflight import single_flight
+from services.cards import CARD_URL_PREFIX, match_card
+from api.serialization import FastJSONResponse
+from api.pagination import PAGE_SIZE_HELP, keyset_page, page_headers
+from api.conditional import STATS_CACHE_CONTROL, cache_headers, etag_matches, not_modified, stats_etag
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
+# bursts of identical stats requests within this window reuse one result
+STATS_COALESCE_TTL = float(os.getenv("STATS_COALESCE_TTL", "1.0"))
+
 
 class StatsResponse(BaseModel):
     total_agents: int
@@ -53,32 +63,87 @@ class SwipeActivity(BaseModel):
     created_at: datetime
 
 
+class CardAgent(BaseModel):
+    id: str
+    name: str
+    emoji: str | None
+
+
+class MatchCard(BaseModel):
+    match_id: int
+    agent_a: CardAgent
+    agent_b: CardAgent
+    match_type: str | None
+    compatibility_score: float | None
+    image_url: str  # immutable, content-addressed SVG
+
+
 class FullLeaderboard(BaseModel):
     most_popular: List[LeaderboardEntry]
     most_matches: List[LeaderboardEntry]
     rising_stars: List[LeaderboardEntry]
 
 
-@router.get("/", response_model=StatsResponse)
-def get_stats(db: Session = Depends(get_db)):
-    """Get public platform stats"""
+def leaderboard_row(a: Agent) -> dict:
+    """Encode an agent straight to the LeaderboardEntry shape"""
+    return {
+        "agent": {
+            "id": a.id, "name": a.name, "emoji": a.emoji,
+            "tagline": a.tagline, "twitter_handle": a.twitter_handle,
+            "claimed": a.claimed or False
+        },
+        "matches_count": a.matches_count or 0,
+        "reputation": a.reputation or 3.0
+    }
+
+
+@single_flight(ttl=STATS_COALESCE_TTL)
+def platform_counts(db: Session) -> dict:
+    """Platform counters, shared by concurrent /stats/ requests"""
     total_agents = db.query(Agent).count()
     claimed_agents = db.query(Agent).filter(Agent.claimed == True).count()
     total_matches = db.query(Match).count()
     active_today = claimed_agents
     
-    return StatsResponse(
-        total_agents=total_agents,
-        claimed_agents=claimed_agents,
-        total_matches=total_matches,
-        active_today=active_today
-    )
+    return {
+        "total_agents": total_agents,
+        "claimed_agents": claimed_agents,
+        "total_matches": total_matches,
+        "active_today": active_today,
+    }
+
+
+@single_flight(ttl=STATS_COALESCE_TTL)
+def rising_star_rows(limit: int, db: Session) -> List[dict]:
+    """Recently joined agents as leaderboard rows"""
+    rising = db.query(Agent).order_by(Agent.created_at.desc()).limit(limit).all()
+    return [leaderboard_row(a) for a in rising]
+
+
+@router.get("/", response_model=StatsResponse)
+def get_stats(request: Request, response: Response, db: Session = Depends(get_db)):
+    """Get public platform stats"""
+    # the ETag hashes the same (possibly coalesced) counts the body carries
+    counts = platform_counts(db)
+    headers = cache_headers(stats_etag("stats", counts), STATS_CACHE_CONTROL)
+    if etag_matches(request, headers["ETag"]):
+        return not_modified(headers)
+    response.headers.update(headers)
+    
+    return StatsResponse(**counts)
 
 
 @router.get("/recent-agents", response_model=List[AgentPreview])
-def get_recent_agents(limit: int = 5, db: Session = Depends(get_db)):
-    """Get recently registered agents"""
-    agents = db.query(Agent).order_by(Agent.created_at.desc()).limit(limit).all()
+def get_recent_agents(
+    request: Request,
+    response: Response,
+    limit: int = Query(5, description=PAGE_SIZE_HELP),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Get recently registered agents, newest first"""
+    agents, next_cursor = keyset_page(db.query(Agent), (Agent.created_at, Agent.id), limit, cursor, descending=True)
+    response.headers.update(page_headers(request, next_cursor))
     return agents
 
 
@@ -89,46 +154,38 @@ def get_recent_matches(limit: int = 10, db: Session = Depends(get_db)):
 
 
 @router.get("/leaderboard")
-def get_leaderboard(limit: int = 10, db: Session = Depends(get_db)):
-    """Get top agents by matches"""
-    agents = db.query(Agent).order_by(Agent.matches_count.desc()).limit(limit).all()
-    return [
-        {
-            "agent": {
-                "id": a.id, "name": a.name, "emoji": a.emoji,
-                "tagline": a.tagline, "twitter_handle": a.twitter_handle,
-                "claimed": a.claimed or False
-            },
-            "matches_count": a.matches_count or 0,
-            "reputation": a.reputation or 3.0
-        }
-        for a in agents
-    ]
+def get_leaderboard(
+    request: Request,
+    limit: int = Query(10, description=PAGE_SIZE_HELP),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Get top agents by matches
+
+    A live ranking: matches_count changes between page fetches, so an agent
+    whose count moves past the cursor can be skipped or repeated in a crawl.
+    """
+    # the cursor is (matches_count, id) as of the last row served, not a snapshot
+    agents, next_cursor = keyset_page(
+        db.query(Agent), (Agent.matches_count, Agent.id), limit, cursor, descending=True
+    )
+    return FastJSONResponse([leaderboard_row(a) for a in agents], headers=page_headers(request, next_cursor))
 
 
 @router.get("/leaderboard/full")
-def get_full_leaderboard(limit: int = 5, db: Session = Depends(get_db)):
+def get_full_leaderboard(request: Request, limit: int = 5, db: Session = Depends(get_db)):
     """Get comprehensive leaderboard with multiple categories"""
     # Rising stars (recently joined)
-    rising = db.query(Agent).order_by(Agent.created_at.desc()).limit(limit).all()
-    rising_stars = [
-        {
-            "agent": {
-                "id": a.id, "name": a.name, "emoji": a.emoji,
-                "tagline": a.tagline, "twitter_handle": a.twitter_handle,
-                "claimed": a.claimed or False
-            },
-            "matches_count": a.matches_count or 0,
-            "reputation": a.reputation or 3.0
-        }
-        for a in rising
-    ]
+    rising_stars = rising_star_rows(limit, db)
+    headers = cache_headers(stats_etag("leaderboard/full", rising_stars), STATS_CACHE_CONTROL)
+    if etag_matches(request, headers["ETag"]):
+        return not_modified(headers)
     
-    return {
+    return FastJSONResponse({
         "most_popular": [],
         "most_matches": rising_stars,
         "rising_stars": rising_stars
-    }
+    }, headers=headers)
 
 
 @router.get("/feed/swipes")
@@ -137,7 +194,32 @@ def get_swipe_feed(limit: int = 20, db: Session = Depends(get_db)):
     return []
 
 
-@router.get("/match-card/{match_id}")
+def load_match_card(db: Session, match_id: int):
+    match = db.query(Match).filter(Match.id == match_id).first()
+    card = match_card(db, match) if match else None
+    if card is None:
+        raise HTTPException(status_code=404, detail="Match not found")
+    return match, card
+
+
+@router.get("/match-card/{match_id}", response_model=MatchCard)
 def get_match_card(match_id: int, db: Session = Depends(get_db)):
-    """Get match card data for sharing"""
-    return {"error": "Not implemented"}
+    """Get match card data for sharing, with the card image's permanent URL"""
+    match, (filename, agent_a, agent_b) = load_match_card(db, match_id)
+    preview = lambda a: {"id": a.id, "name": a.name, "emoji": a.emoji}
+    return FastJSONResponse({
+        "match_id": match.id,
+        "agent_a": preview(agent_a),
+        "agent_b": preview(agent_b),
+        "match_type": match.match_type,
+        "compatibility_score": match.compatibility_score,
+        "image_url": f"{CARD_URL_PREFIX}/{filename}",
+    }, headers={"Cache-Control": STATS_CACHE_CONTROL})
+
+
+@router.get("/match-card/{match_id}/image", include_in_schema=False)
+def get_match_card_image(match_id: int, db: Session = Depends(get_db)):
+    """Stable link for og:image - redirects to the current immutable card"""
+    _, (filename, _, _) = load_match_card(db, match_id)
+    return RedirectResponse(f"{CARD_URL_PREFIX}/{filename}", status_code=307,
+                            headers={"Cache-Control": STATS_CACHE_CONTROL})
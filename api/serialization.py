@@ -0,0 +1,42 @@
+"""Response serialization - encode each response body exactly once"""
+import json
+from datetime import date, datetime
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from services.timing import timed
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+def _default(obj: Any):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode plain dicts/lists straight to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when available.
+
+    Handlers on hot paths build plain dicts with the row encoders next to
+    their Pydantic models and return this response directly, so FastAPI
+    skips re-validating against ``response_model`` (which still documents
+    the schema in OpenAPI).
+    """
+
+    def render(self, content: Any) -> bytes:
+        with timed("serialize"):
+            return dumps(content)
@@ -0,0 +1,49 @@
+"""Per-worker health - which process answered and how loaded it is"""
+import os
+import time
+
+# Matches the launcher's recycling limit (0 = never recycled)
+MAX_REQUESTS = int(os.getenv("MAX_REQUESTS", "0"))
+
+
+class WorkerStats:
+    """Counters for the current worker process"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Start counting afresh (called in each worker after fork)"""
+        self.started = time.time()
+        self.requests = 0
+        self.in_flight = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "max_requests": MAX_REQUESTS or None,
+        }
+
+
+worker_stats = WorkerStats()
+
+
+class WorkerStatsMiddleware:
+    """Plain ASGI middleware counting requests handled by this worker"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        # counters only touched on the event loop thread, no lock needed
+        worker_stats.requests += 1
+        worker_stats.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            worker_stats.in_flight -= 1
@@ -0,0 +1,188 @@
+"""Compatibility scoring micro-benchmarks with golden outputs
+
+    python -m benchmarks.bench_compatibility [--rounds 5] [--out results.json]
+    python -m benchmarks.bench_compatibility --check-only
+    python -m benchmarks.bench_compatibility --update-golden
+
+Times calculate_overlap, calculate_complement and calculate_vibe_compatibility
+across profile (list) sizes, and calculate_compatibility over whole candidate
+populations the way a discovery feed scores them. Before timing, every golden
+case in fixtures/compatibility_golden.json is re-scored and must match
+exactly, so a faster implementation can't drift. Prints one JSON object per
+case; --out writes them all with run metadata.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Callable, List
+
+from services.compatibility import (
+    VIBE_COMPATIBILITY,
+    calculate_complement,
+    calculate_compatibility,
+    calculate_overlap,
+    calculate_vibe_compatibility,
+)
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "compatibility_golden.json")
+GOLDEN_CASES = 300
+
+PROFILE_SIZES = [0, 1, 3, 5, 10, 25]
+POPULATION_SIZES = [100, 1000, 10000]
+
+CHAINS = ["BNB Chain", "Ethereum", "Base", "Solana", "Arbitrum", "Polygon", "Avalanche", "Optimism"]
+SKILLS = ["coding", "trading", "content", "design", "research", "memes", "security", "analytics",
+          "community", "defi", "nft", "governance", "marketing", "ops", "writing", "art"]
+VIBES = sorted({v for pair in VIBE_COMPATIBILITY for v in pair} | {"chill", "chaotic", "curious"})
+MATCH_TYPES = ["rivalry", "collaboration", "friendship", "mentorship", "romance"]
+
+
+def pick(rng: random.Random, vocab: List[str], size: int) -> List[str]:
+    """size items, repeating once the vocabulary runs out"""
+    items = rng.sample(vocab, min(size, len(vocab)))
+    items += [rng.choice(vocab) for _ in range(size - len(items))]
+    return items
+
+
+def make_profile(rng: random.Random, size: int) -> dict:
+    vibes = pick(rng, VIBES, min(size, 6))
+    if vibes and rng.random() < 0.2:
+        vibes[0] = vibes[0].title()  # scoring lower-cases vibes
+    profile = {
+        "chains": pick(rng, CHAINS, min(size, len(CHAINS))),
+        "vibes": vibes,
+        "skills": pick(rng, SKILLS, size),
+    }
+    for match_type in MATCH_TYPES:
+        if rng.random() < 0.4:
+            profile[f"seeking_{match_type}"] = True
+    return profile
+
+
+def golden_inputs(seed: int = 37) -> List[list]:
+    rng = random.Random(seed)
+    return [
+        [make_profile(rng, rng.choice(PROFILE_SIZES)), make_profile(rng, rng.choice(PROFILE_SIZES))]
+        for _ in range(GOLDEN_CASES)
+    ]
+
+
+def score_case(a: dict, b: dict) -> dict:
+    return {
+        "overlap": calculate_overlap(a["chains"], b["chains"]),
+        "complement": calculate_complement(a["skills"], b["skills"]),
+        "vibe": calculate_vibe_compatibility(a["vibes"], b["vibes"]),
+        "compatibility": calculate_compatibility(a, b),
+    }
+
+
+def update_golden():
+    cases = [{"a": a, "b": b, "expected": score_case(a, b)} for a, b in golden_inputs()]
+    os.makedirs(os.path.dirname(GOLDEN_PATH), exist_ok=True)
+    with open(GOLDEN_PATH, "w") as f:
+        # one case per line keeps diffs readable when scores legitimately change
+        f.write("[\n" + ",\n".join(json.dumps(case, ensure_ascii=False) for case in cases) + "\n]\n")
+    print(f"wrote {len(cases)} golden cases to {GOLDEN_PATH}")
+
+
+def check_golden() -> List[str]:
+    """Re-score every golden case; floats compare exactly (JSON round-trips repr)"""
+    with open(GOLDEN_PATH) as f:
+        cases = json.load(f)
+    failures = []
+    for i, case in enumerate(cases):
+        actual = json.loads(json.dumps(score_case(case["a"], case["b"])))
+        for key, expected in case["expected"].items():
+            if actual[key] != expected:
+                failures.append(f"case {i} {key}: expected {expected!r}, got {actual[key]!r}")
+    return failures
+
+
+def best_of(fn: Callable, rounds: int) -> float:
+    """Best wall time (seconds) of `rounds` runs of fn"""
+    fn()  # warm up
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def pair_cases(rng: random.Random, pairs: int):
+    for size in PROFILE_SIZES:
+        profiles = [(make_profile(rng, size), make_profile(rng, size)) for _ in range(pairs)]
+        yield "calculate_overlap", size, lambda p=profiles: [calculate_overlap(a["chains"], b["chains"]) for a, b in p]
+        yield "calculate_complement", size, lambda p=profiles: [calculate_complement(a["skills"], b["skills"]) for a, b in p]
+        yield "calculate_vibe_compatibility", size, lambda p=profiles: [
+            calculate_vibe_compatibility(a["vibes"], b["vibes"]) for a, b in p]
+
+
+def run_benchmarks(rounds: int, pairs: int, seed: int) -> List[dict]:
+    rng = random.Random(seed)
+    results = []
+    for name, size, fn in pair_cases(rng, pairs):
+        seconds = best_of(fn, rounds)
+        results.append({
+            "case": name,
+            "profile_size": size,
+            "calls": pairs,
+            "ns_per_call": round(seconds / pairs * 1e9, 1),
+        })
+
+    for population in POPULATION_SIZES:
+        seeker = make_profile(rng, 5)
+        candidates = [make_profile(rng, rng.choice(PROFILE_SIZES[1:4])) for _ in range(population)]
+        seconds = best_of(lambda: [calculate_compatibility(seeker, c) for c in candidates], rounds)
+        results.append({
+            "case": "calculate_compatibility",
+            "population": population,
+            "calls": population,
+            "ns_per_call": round(seconds / population * 1e9, 1),
+            "ms_per_feed": round(seconds * 1000, 3),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5, help="timed runs per case (best is kept)")
+    parser.add_argument("--pairs", type=int, default=5000, help="profile pairs per pairwise case")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write all results as one JSON document")
+    parser.add_argument("--check-only", action="store_true", help="verify golden outputs and exit")
+    parser.add_argument("--update-golden", action="store_true", help="rewrite the golden fixture")
+    args = parser.parse_args()
+
+    if args.update_golden:
+        return update_golden()
+
+    failures = check_golden()
+    if failures:
+        print("\n".join(failures[:20]), file=sys.stderr)
+        sys.exit(f"{len(failures)} golden mismatch(es) - scores changed")
+    if args.check_only:
+        print(f"golden ok ({GOLDEN_CASES} cases)")
+        return
+
+    results = run_benchmarks(args.rounds, args.pairs, args.seed)
+    for result in results:
+        print(json.dumps(result))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "benchmark": "compatibility",
+                "timestamp": int(time.time()),
+                "python": platform.python_version(),
+                "implementation": platform.python_implementation(),
+                "machine": platform.machine(),
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
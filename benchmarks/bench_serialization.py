@@ -0,0 +1,108 @@
+"""Per-item serialization cost: Pydantic double validation vs row encoders
+
+    python -m benchmarks.bench_serialization [--items 100] [--rounds 200]
+
+Prints one JSON object per case with microseconds per item for the old path
+(build model objects, re-validate against response_model, encode) and the
+new path (row encoder + FastJSONResponse.render).
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from typing import List
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from database.models import Agent, Match, Message
+from api.routes.discovery import AgentCard, card_row
+from api.routes.matches import MatchResponse, MatchedAgent, MessageResponse, match_row, message_row
+from api.serialization import FastJSONResponse
+from services.compatibility import calculate_compatibility
+
+
+def make_agent(i: int) -> Agent:
+    return Agent(
+        id=f"agent{i:04d}", name=f"Agent {i}", emoji="🦞", tagline="Never stop molting.",
+        bio="Benchmark agent", chains=["BNB Chain", "Ethereum"], vibes=["competitive", "sharp"],
+        skills=["coding", "trading", "content"], seeking_rivalry=True, seeking_collaboration=True,
+        seeking_friendship=False, seeking_mentorship=False, seeking_romance=False,
+        reputation=4.5, rivalries_won=3, rivalries_lost=1, created_at=datetime.utcnow(),
+    )
+
+
+def old_response(model, items: list, build) -> bytes:
+    """What FastAPI did before: hand-built models, re-validated, encoded"""
+    objs = [build(item) for item in items]
+    validated = TypeAdapter(List[model]).validate_python(objs, from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def new_response(items: list, encode) -> bytes:
+    return FastJSONResponse([encode(item) for item in items]).body
+
+
+def timed(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    agents = [make_agent(i) for i in range(args.items)]
+    me = {"chains": ["BNB Chain"], "vibes": ["competitive"], "skills": ["coding"], "seeking_rivalry": True}
+    compats = [calculate_compatibility(me, {"chains": a.chains, "vibes": a.vibes, "skills": a.skills}) for a in agents]
+    cards = [(a, compat["total"], compat) for a, compat in zip(agents, compats)]
+    matches = [
+        (Match(id=i, agent_a_id="me", agent_b_id=a.id, match_type="rivalry", compatibility_score=42.0,
+               compatibility_reasons=["Compatible vibes"], created_at=datetime.utcnow(), is_active=True), a)
+        for i, a in enumerate(agents)
+    ]
+    messages = [
+        Message(id=i, match_id=1, sender_id=a.id, content="Ready to lose? 🏆", created_at=datetime.utcnow())
+        for i, a in enumerate(agents)
+    ]
+
+    cases = {
+        "feed": (
+            lambda: old_response(AgentCard, cards, lambda c: AgentCard(**card_row(*c))),
+            lambda: new_response(cards, lambda c: card_row(*c)),
+        ),
+        "matches": (
+            lambda: old_response(MatchResponse, matches, lambda m: MatchResponse(
+                **{**match_row(*m), "partner": MatchedAgent(**match_row(*m)["partner"])})),
+            lambda: new_response(matches, lambda m: match_row(*m)),
+        ),
+        "messages": (
+            lambda: old_response(MessageResponse, messages, lambda m: MessageResponse(**message_row(m, "Agent"))),
+            lambda: new_response(messages, lambda m: message_row(m, "Agent")),
+        ),
+    }
+
+    per_item = 1e6 / (args.items * args.rounds)
+    for name, (old, new) in cases.items():
+        old(), new()  # warm up
+        before = timed(old, args.rounds) * per_item
+        after = timed(new, args.rounds) * per_item
+        print(json.dumps({
+            "case": name,
+            "items": args.items,
+            "before_us_per_item": round(before, 3),
+            "after_us_per_item": round(after, 3),
+            "speedup": round(before / after, 2) if after else None,
+        }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Cold start cost: import time of main plus time to first request
+
+    python -m benchmarks.bench_startup [--runs 5] [--budget-ms 1500]
+
+Each run is a fresh interpreter against its own new SQLite file, so every
+run pays for schema creation as a first boot would. Prints one
+JSON object; exits non-zero when the median time to first request exceeds
+--budget-ms, so CI can track regressions.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_REQUEST = """
+import time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    assert client.get("/health").status_code == 200
+t2 = time.perf_counter()
+print(f"{(t1 - t0) * 1000:.3f} {(t2 - t0) * 1000:.3f}")
+"""
+
+
+def run(args: list, db_path: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+
+def import_profile(db_path: str, top: int) -> dict:
+    """Parse `python -X importtime` output for main"""
+    stderr = run(["-X", "importtime", "-c", "import main"], db_path).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        modules.append((name[1:].rstrip(), int(self_us), int(cumulative_us)))
+    main_us = next((cum for name, _, cum in modules if name == "main"), 0)
+    heaviest = sorted(modules, key=lambda m: m[1], reverse=True)[:top]
+    return {
+        "main_import_ms": round(main_us / 1000, 3),
+        "top_self_import_ms": {name.strip(): round(self_us / 1000, 3) for name, self_us, _ in heaviest},
+    }
+
+
+def measure(runs: int = 5, top: int = 10) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        imports, first_requests = [], []
+        for i in range(runs):
+            db_path = os.path.join(tmp, f"bench-{i}.db")
+            import_ms, first_ms = map(float, run(["-c", FIRST_REQUEST], db_path).stdout.split()[-2:])
+            imports.append(import_ms)
+            first_requests.append(first_ms)
+        return {
+            "runs": runs,
+            "import_ms_median": round(statistics.median(imports), 3),
+            "first_request_ms_median": round(statistics.median(first_requests), 3),
+            **import_profile(os.path.join(tmp, "bench-importtime.db"), top),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    result = measure(args.runs, args.top)
+    print(json.dumps(result, indent=2))
+    if args.budget_ms is not None and result["first_request_ms_median"] > args.budget_ms:
+        sys.exit(f"time to first request {result['first_request_ms_median']}ms over budget {args.budget_ms}ms")
+
+
+if __name__ == "__main__":
+    main()
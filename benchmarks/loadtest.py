@@ -0,0 +1,255 @@
+"""End-to-end load test driving the heartbeat workflow
+
+    python -m benchmarks.loadtest --agents 50 --duration 30
+    python -m benchmarks.loadtest --url http://localhost:8000 --agents 200 --out run.json
+    python -m benchmarks.loadtest --baseline baseline.json --tolerance 0.2
+
+Each simulated agent registers, then loops the heartbeat from skill.md:
+get profile, get feed, swipe on N cards, check matches, read and send
+messages. Runs in-process over ASGI (default, against DATABASE_URL) or
+against a running server with --url. In-process runs switch admission
+control off unless --admission is given, so they measure the app rather
+than the load shedder. Shed responses (429/503) are waited out per their
+Retry-After, like a well-behaved agent would.
+
+Reports throughput, p50/p95/p99 of successful requests, and error and shed
+rates per route template; --out writes JSON and --baseline compares against
+a saved run, exiting non-zero when a p95 or an error rate regresses.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+SHED_STATUSES = (429, 503)
+
+
+class Recorder:
+    """Latencies (ms) and status codes per route template"""
+
+    def __init__(self, deadline: float = float("inf"), backoff: float = 1.0):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.shed: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.deadline = deadline
+        # wait after a shed response that has no Retry-After
+        self.backoff = backoff
+
+    async def wait_out(self, response: httpx.Response):
+        """Sleep for the response's Retry-After (never past the deadline)"""
+        try:
+            delay = float(response.headers.get("retry-after", self.backoff))
+        except ValueError:
+            delay = self.backoff
+        delay = min(delay, self.deadline - time.perf_counter())
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def call(self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[route] += 1
+            return None
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.statuses[route][response.status_code] += 1
+        if response.status_code >= 400:
+            # shed (429/503) and failed requests don't count towards latency
+            self.errors[route] += 1
+            if response.status_code in SHED_STATUSES:
+                self.shed[route] += 1
+                await self.wait_out(response)
+            return None
+        self.latencies[route].append(elapsed_ms)
+        return response.json()
+
+    def report(self, elapsed: float) -> dict:
+        routes = {}
+        total = attempts = errors = shed = 0
+        for route in sorted(set(self.statuses) | set(self.errors)):
+            values = sorted(self.latencies.get(route, []))
+            route_attempts = len(values) + self.errors.get(route, 0)
+            total += len(values)
+            attempts += route_attempts
+            errors += self.errors.get(route, 0)
+            shed += self.shed.get(route, 0)
+            routes[route] = {
+                "count": len(values),
+                "errors": self.errors.get(route, 0),
+                "shed": self.shed.get(route, 0),
+                "error_rate": round(self.errors.get(route, 0) / route_attempts, 4) if route_attempts else 0.0,
+                "statuses": {str(k): v for k, v in sorted(self.statuses[route].items())},
+                "rps": round(len(values) / elapsed, 2),
+                "p50_ms": round(percentile(values, 50), 3),
+                "p95_ms": round(percentile(values, 95), 3),
+                "p99_ms": round(percentile(values, 99), 3),
+                "max_ms": round(values[-1], 3) if values else 0.0,
+            }
+        return {
+            "duration_s": round(elapsed, 3), "requests": total, "rps": round(total / elapsed, 2),
+            "attempts": attempts, "errors": errors, "shed": shed,
+            "error_rate": round(errors / attempts, 4) if attempts else 0.0,
+            "routes": routes,
+        }
+
+
+async def simulated_agent(client: httpx.AsyncClient, rec: Recorder, index: int, run_id: str,
+                          swipes: int, think: float, deadline: float, rng: random.Random):
+    registered = await rec.call(client, "POST /agents/register", "POST", "/agents/register", json={
+        "name": f"load-{run_id}-{index}",
+        "chains": rng.sample(["BNB Chain", "Ethereum", "Base", "Solana"], rng.randint(1, 2)),
+        "vibes": rng.sample(["competitive", "sharp", "playful", "helpful", "hungry"], 2),
+        "skills": rng.sample(["coding", "trading", "content", "design", "research"], 3),
+        "seeking_rivalry": rng.random() < 0.5,
+        "seeking_collaboration": True,
+        "seeking_friendship": rng.random() < 0.5,
+    })
+    if not registered:
+        return
+    agent_id = registered["agent"]["id"]
+
+    while time.perf_counter() < deadline:
+        await rec.call(client, "GET /agents/{id}", "GET", f"/agents/{agent_id}")
+        feed = await rec.call(client, "GET /discovery/{id}/feed", "GET", f"/discovery/{agent_id}/feed")
+        for card in (feed or [])[:swipes]:
+            direction = "right" if rng.random() < 0.6 else "left"
+            await rec.call(client, "POST /discovery/{id}/swipe/{target}", "POST",
+                           f"/discovery/{agent_id}/swipe/{card['id']}", json={"direction": direction})
+        matches = await rec.call(client, "GET /matches/{id}", "GET", f"/matches/{agent_id}")
+        if matches:
+            match = rng.choice(matches)
+            await rec.call(client, "GET /matches/{id}/match/{mid}/messages", "GET",
+                           f"/matches/{agent_id}/match/{match['id']}/messages")
+            await rec.call(client, "POST /matches/{id}/match/{mid}/message", "POST",
+                           f"/matches/{agent_id}/match/{match['id']}/message", json={"content": "gm 🦞"})
+        if think:
+            await asyncio.sleep(rng.uniform(0, 2 * think))
+
+
+async def run(args) -> dict:
+    rec = Recorder(backoff=args.think or 1.0)
+    run_id = f"{int(time.time())}-{os.getpid()}"
+    limits = httpx.Limits(max_connections=args.agents, max_keepalive_connections=args.agents)
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30)
+        lifespan = None
+    else:
+        import main
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://loadtest", timeout=30)
+        lifespan = main.app.router.lifespan_context(main.app)
+
+    async with client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+        try:
+            start = time.perf_counter()
+            deadline = rec.deadline = start + args.duration
+            await asyncio.gather(*(
+                simulated_agent(client, rec, i, run_id, args.swipes, args.think, deadline, random.Random(args.seed + i))
+                for i in range(args.agents)
+            ))
+            elapsed = time.perf_counter() - start
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+
+    result = rec.report(elapsed)
+    result["config"] = {"agents": args.agents, "duration": args.duration, "swipes": args.swipes,
+                        "think": args.think, "target": args.url or "asgi",
+                        "admission": bool(args.url) or args.admission}
+    return result
+
+
+def compare(result: dict, baseline: dict, tolerance: float, error_tolerance: float) -> List[str]:
+    """Routes whose p95 got slower than baseline by more than tolerance, or whose
+    error rate (shed included) grew by more than error_tolerance"""
+    regressions = []
+    overall, base_overall = result.get("error_rate", 0.0), baseline.get("error_rate", 0.0)
+    if overall - base_overall > error_tolerance:
+        print(f"{'REGRESSION':>10}  {'all routes':<45} errors {base_overall:>8.1%} -> {overall:>8.1%}")
+        regressions.append("all routes")
+    for route in baseline.get("routes", {}).keys() - result["routes"].keys():
+        # e.g. swipes never happen once every feed request fails
+        print(f"{'REGRESSION':>10}  {route:<45} no longer reached")
+        regressions.append(route)
+    for route, stats in result["routes"].items():
+        base = baseline.get("routes", {}).get(route)
+        if not base:
+            continue
+        base_rate = base.get("error_rate", 0.0)
+        rate = stats.get("error_rate", 0.0)
+        if rate - base_rate > error_tolerance:
+            print(f"{'REGRESSION':>10}  {route:<45} errors {base_rate:>8.1%} -> {rate:>8.1%}")
+            regressions.append(route)
+            continue
+        if not base["p95_ms"]:
+            continue
+        ratio = stats["p95_ms"] / base["p95_ms"]
+        flag = "REGRESSION" if ratio > 1 + tolerance else "ok"
+        print(f"{flag:>10}  {route:<45} p95 {base['p95_ms']:>9.2f} -> {stats['p95_ms']:>9.2f} ms ({ratio:.2f}x)"
+              f"  errors {rate:.1%}")
+        if flag != "ok":
+            regressions.append(route)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Clawinder heartbeat load test")
+    parser.add_argument("--url", help="target a running server instead of in-process ASGI")
+    parser.add_argument("--agents", type=int, default=20, help="concurrent simulated agents")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--swipes", type=int, default=3, help="swipes per heartbeat")
+    parser.add_argument("--think", type=float, default=0.0, help="mean seconds between heartbeats")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--admission", action="store_true",
+                        help="keep admission control on in-process (off by default so it isn't what gets measured)")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against a saved results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 slowdown vs baseline")
+    parser.add_argument("--error-tolerance", type=float, default=0.02,
+                        help="allowed error-rate increase vs baseline (absolute, 0.02 = 2 points)")
+    args = parser.parse_args(argv)
+
+    if not args.url:
+        if args.admission:
+            print("⚠️  admission control is on: shed requests (429/503) are waited out and counted as errors, "
+                  "latencies cover admitted requests only", file=sys.stderr)
+        else:
+            os.environ["ADMISSION_ENABLED"] = "0"
+
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+    if result["shed"]:
+        print(f"⚠️  {result['shed']} of {result['attempts']} requests were shed (429/503) - "
+              f"p95s describe only the admitted ones", file=sys.stderr)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(result, json.load(f), args.tolerance, args.error_tolerance)
+        if regressions:
+            sys.exit(f"{len(regressions)} route(s) regressed: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-"""Database package - initialize on import"""
+"""Database package - shared engine, session factory and Base"""
 import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -0,0 +1,119 @@
+"""Normalized chain/vibe/skill tables for indexed filtering
+
+Agent.chains, .vibes and .skills stay the source of truth (JSON lists on
+the row); agent_chains, agent_vibes and agent_skills hold one lowercased
+(value, agent_id) row per entry, so "agents on Base" is a primary-key range
+instead of a full scan. On SQLite, triggers rebuild an agent's rows from
+its JSON whenever the column changes, from any write path. Other databases
+have no mirror and feed filters fall back to matching the lists in Python.
+
+The triggers call normalize() itself, registered on each connection as
+attr_normalize(), so stored values and query filters fold Unicode case and
+whitespace the same way. A connection without it (e.g. the sqlite3 shell)
+can't write agents.
+"""
+from typing import Iterable, Optional
+
+from sqlalchemy import event, select, text
+
+from database import engine
+from database.models import Agent, AgentChain, AgentSkill, AgentVibe
+
+# JSON column -> mirror table
+MODELS = {"chains": AgentChain, "vibes": AgentVibe, "skills": AgentSkill}
+
+# normalize() as an SQL function, for the triggers
+SQL_NORMALIZE = "attr_normalize"
+
+
+def _select(column: str, agent: str) -> str:
+    """(value, agent_id) rows for one agent's list - `agent` is new or agents"""
+    source = "agents, " if agent == "agents" else ""
+    return (f"SELECT DISTINCT {SQL_NORMALIZE}(j.value), {agent}.id FROM {source}json_each({agent}.{column}) AS j "
+            f"WHERE j.type = 'text' AND {SQL_NORMALIZE}(j.value) != ''")
+
+
+def _triggers(column: str) -> dict:
+    table = MODELS[column].__tablename__
+    return {
+        f"{table}_ai": f"""
+CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON agents BEGIN
+    INSERT OR IGNORE INTO {table}(value, agent_id) {_select(column, "new")};
+END""",
+        f"{table}_ad": f"""
+CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON agents BEGIN
+    DELETE FROM {table} WHERE agent_id = old.id;
+END""",
+        f"{table}_au": f"""
+CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF id, {column} ON agents BEGIN
+    DELETE FROM {table} WHERE agent_id = old.id;
+    INSERT OR IGNORE INTO {table}(value, agent_id) {_select(column, "new")};
+END""",
+    }
+
+
+TRIGGERS = {name: ddl for column in MODELS for name, ddl in _triggers(column).items()}
+
+
+def supported(conn) -> bool:
+    return conn.dialect.name == "sqlite"
+
+
+def normalize(value: str) -> str:
+    """The form values are stored and looked up in"""
+    return value.strip().lower()
+
+
+@event.listens_for(engine, "connect")
+def _register_normalize(dbapi_conn, connection_record):
+    if engine.dialect.name == "sqlite":
+        dbapi_conn.create_function(
+            SQL_NORMALIZE, 1, lambda v: normalize(v) if isinstance(v, str) else None, deterministic=True
+        )
+
+
+def installed(conn) -> bool:
+    name = next(iter(TRIGGERS))
+    return supported(conn) and conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = :name"), {"name": name}
+    ).first() is not None
+
+
+def create_triggers(conn):
+    for ddl in TRIGGERS.values():
+        conn.exec_driver_sql(ddl)
+
+
+def drop_triggers(conn):
+    """For bulk loads - follow with create_triggers() and rebuild()"""
+    for name in TRIGGERS:
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def rebuild(conn):
+    """Refill every mirror table from the JSON columns"""
+    for column, model in MODELS.items():
+        table = model.__tablename__
+        conn.exec_driver_sql(f"DELETE FROM {table}")
+        conn.exec_driver_sql(f"INSERT OR IGNORE INTO {table}(value, agent_id) {_select(column, 'agents')}")
+
+
+def install(conn):
+    """Create the sync triggers; backfill the tables the first time"""
+    if not supported(conn):
+        return
+    backfill = not installed(conn)
+    create_triggers(conn)
+    if backfill:
+        rebuild(conn)
+
+
+def has(column: str, value: str):
+    """SQL condition: the agent's `column` list contains value (case-insensitive)"""
+    model = MODELS[column]
+    return Agent.id.in_(select(model.agent_id).where(model.value == normalize(value)))
+
+
+def contains(values: Optional[Iterable[str]], value: str) -> bool:
+    """has() in Python, for databases without the mirror tables"""
+    return normalize(value) in {normalize(v) for v in values or ()}
@@ -1,25 +1,72 @@
 """Database session management"""
 import sys
 
+from sqlalchemy import text
+
 # Import from package to use shared engine/sessionmaker/base
-from database import engine, SessionLocal, Base
-from database.models import Agent, Swipe, Match, Message
+from database import engine, SessionLocal, Base, attributes, fts, sequence
+from database.models import Agent, Swipe, Match, Message, ClaimJob, ConversationSummary, LeftSwipeArchive
+from services import inbox
+from services.timing import mark_since_start
+
+# Bump whenever models gain tables/indexes so existing databases get them
+SCHEMA_VERSION = 9
+
+
+def get_schema_version(conn) -> int:
+    """Schema version stamped on the database (SQLite user_version)"""
+    if conn.dialect.name != "sqlite":
+        return 0
+    return conn.execute(text("PRAGMA user_version")).scalar() or 0
+
+
+# claim jobs queued twice for one agent before the pending-job unique index -
+# all but the newest are retired so the index can be built
+RETIRE_DUPLICATE_CLAIMS = """
+UPDATE claim_jobs SET status = 'failed', message = 'Superseded by a newer claim'
+WHERE status IN ('queued', 'running') AND EXISTS (
+    SELECT 1 FROM claim_jobs AS newer
+    WHERE newer.agent_id = claim_jobs.agent_id AND newer.status IN ('queued', 'running')
+      AND (newer.created_at > claim_jobs.created_at
+           OR (newer.created_at = claim_jobs.created_at AND newer.id > claim_jobs.id))
+)
+"""
+
+
+def init_db(force: bool = False):
+    """Create tables once - a no-op when the schema version already matches"""
+    with engine.begin() as conn:
+        current = get_schema_version(conn)
+        if current == SCHEMA_VERSION and not force:
+            print(f"🦞 Clawble: Schema v{current} up to date", flush=True)
+            return
+        print(f"🦞 Clawble: Creating tables {list(Base.metadata.tables.keys())}", flush=True)
+        Base.metadata.create_all(bind=conn)
+        # before the index pass - agents.seq is a column added to an existing table
+        sequence.install(conn)
+        conn.execute(text(RETIRE_DUPLICATE_CLAIMS))
+        # create_all skips indexes added to tables that already exist
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+        fts.install(conn)
+        attributes.install(conn)
+        inbox.backfill(conn)
+        if conn.dialect.name == "sqlite":
+            conn.execute(text(f"PRAGMA user_version = {SCHEMA_VERSION}"))
+    print(f"🦞 Clawble: Tables ready (schema v{SCHEMA_VERSION})!", flush=True)
 
-def init_db():
-    """Create all tables"""
-    print(f"🦞 Clawble: Creating tables {list(Base.metadata.tables.keys())}", flush=True)
-    Base.metadata.create_all(bind=engine)
-    print("🦞 Clawble: Tables ready!", flush=True)
 
 def get_db():
     """Dependency to get DB session"""
+    # runs once a threadpool slot is free - everything before it was waiting
+    mark_since_start("queue")
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
-# Initialize tables on import
-print("🦞 Clawble: db.py loading, calling init_db()...", flush=True)
-init_db()
-print("🦞 Clawble: db.py loaded!", flush=True)
+
+if __name__ == "__main__":
+    init_db(force="--force" in sys.argv)
@@ -0,0 +1,85 @@
+"""SQLite FTS5 index over agent profiles
+
+agents_fts is an external-content FTS5 table: it stores only the inverted
+index and reads column values back from agents by Agent.seq - not the
+implicit rowid, which a VACUUM may renumber (see database/sequence.py), so
+install after sequence.install() has numbered every agent. Triggers keep it
+in step with every write path (ORM, bulk UPDATEs, other processes); the
+update trigger only fires when an indexed column changes, so counter
+bumps don't touch the index. Other databases have no index and search
+falls back to LIKE.
+"""
+from sqlalchemy import text
+
+FTS_TABLE = "agents_fts"
+FTS_COLUMNS = ["name", "tagline", "bio", "chains", "vibes", "skills"]
+# bm25 weight per column, in FTS_COLUMNS order - a name hit outranks a bio hit
+FTS_WEIGHTS = [10.0, 4.0, 1.0, 2.0, 2.0, 3.0]
+
+_cols = ", ".join(FTS_COLUMNS)
+_new = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+_old = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+
+CREATE_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    {_cols},
+    content='agents', content_rowid='seq',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+)"""
+
+# new.seq is NULL on insert - agents_seq_ai fills it in with the rowid afterwards
+TRIGGERS = {
+    f"{FTS_TABLE}_ai": f"""
+CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON agents BEGIN
+    INSERT INTO {FTS_TABLE}(rowid, {_cols}) VALUES (coalesce(new.seq, new.rowid), {_new});
+END""",
+    f"{FTS_TABLE}_ad": f"""
+CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON agents BEGIN
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_cols}) VALUES ('delete', old.seq, {_old});
+END""",
+    f"{FTS_TABLE}_au": f"""
+CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {_cols} ON agents BEGIN
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_cols}) VALUES ('delete', old.seq, {_old});
+    INSERT INTO {FTS_TABLE}(rowid, {_cols}) VALUES (new.seq, {_new});
+END""",
+}
+
+
+def supported(conn) -> bool:
+    return conn.dialect.name == "sqlite"
+
+
+def exists(conn) -> bool:
+    return supported(conn) and conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+    ).first() is not None
+
+
+def create_triggers(conn):
+    for ddl in TRIGGERS.values():
+        conn.exec_driver_sql(ddl)
+
+
+def drop_triggers(conn):
+    """For bulk loads - follow with create_triggers() and rebuild()"""
+    for name in TRIGGERS:
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def rebuild(conn):
+    """Re-index every agent from the content table"""
+    conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+
+def install(conn):
+    """Create the index, its triggers and rank config; backfill if new"""
+    if not supported(conn):
+        return
+    created = not exists(conn)
+    conn.exec_driver_sql(CREATE_TABLE)
+    create_triggers(conn)
+    weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+    conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', 'bm25({weights})')")
+    if created:
+        rebuild(conn)
@@ -0,0 +1,310 @@
+"""Synthetic data generator + bulk loader for scale testing
+
+    python -m database.generate --agents 100000 --seed 42
+    python -m database.generate --agents 1000000 --swipes-per-agent 30 --batch-size 50000
+
+Populations are deterministic for a given seed. Chains, vibes and skills are
+drawn from the existing vocabulary (seed agents + vibe table) with a
+power-law (Zipf) popularity, swipe counts per agent are Pareto distributed,
+and mutual right swipes become matches with a few messages each. Rows are
+written with batched executemany (pre-encoded tuples straight to the driver
+on SQLite) and secondary indexes are dropped during the load and rebuilt at
+the end.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import func, select
+
+from database import attributes, engine, fts, sequence
+from database.db import init_db
+from database.models import Agent, Swipe, Match, Message
+from database.seed import SEED_AGENTS
+from services import inbox
+from services.compatibility import VIBE_COMPATIBILITY
+
+MATCH_TYPES = ["rivalry", "collaboration", "friendship", "mentorship", "romance"]
+EMOJIS = ["🦞", "🦀", "🤖", "🧠", "📊", "🔮", "✨", "🐙", "🦈", "🐉", "👾", "🚀"]
+NAME_PARTS = ["Claw", "Molt", "Shell", "Reef", "Tide", "Byte", "Chain", "Alpha", "Degen", "Vibe", "Node", "Pinch"]
+TAGLINES = [
+    "Never stop molting.", "Shipping faster than you.", "Alpha, analyzed.", "Here to build.",
+    "Looking for worthy rivals.", "Collabs welcome.", "Autonomous and unhinged.", "Data-driven vibes.",
+]
+MESSAGES = [
+    "Ready to lose? 🏆", "gm", "Let's build something.", "Rematch?", "Nice match 🤝",
+    "What chain are you shipping on?", "Collab on the next drop?", "🦞🦞🦞",
+]
+# swipe direction weights: left, right, super
+DIRECTIONS = ["left", "right", "super"]
+DIRECTION_WEIGHTS = [0.62, 0.35, 0.03]
+
+
+def vocabulary(field: str, extra: Sequence[str] = ()) -> List[str]:
+    """Existing terms ordered by how often the seed data uses them (Zipf rank)"""
+    counts = Counter(term for agent in SEED_AGENTS for term in agent.get(field, []))
+    for term in extra:
+        counts.setdefault(term, 0)
+    return [term for term, _ in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))]
+
+
+CHAINS = vocabulary("chains", ["Arbitrum", "Polygon", "Avalanche"])
+VIBES = vocabulary("vibes", sorted({v for pair in VIBE_COMPATIBILITY for v in pair}))
+SKILLS = vocabulary("skills")
+
+
+class ZipfSampler:
+    """Draw distinct terms with probability proportional to 1 / rank^s"""
+
+    def __init__(self, terms: List[str], s: float = 1.1):
+        self.terms = terms
+        weights = [1.0 / (rank + 1) ** s for rank in range(len(terms))]
+        total = 0.0
+        self.cum_weights = []
+        for w in weights:
+            total += w
+            self.cum_weights.append(total)
+
+    def sample(self, rng: random.Random, k: int) -> List[str]:
+        picked = rng.choices(self.terms, cum_weights=self.cum_weights, k=k * 2)
+        return list(dict.fromkeys(picked))[:k]
+
+
+class BulkLoader:
+    """Buffers rows for one table and writes them with executemany"""
+
+    def __init__(self, conn, table, columns: List[str], batch_size: int):
+        self.conn = conn
+        self.table = table
+        self.columns = columns
+        self.batch_size = batch_size
+        self.rows: List[tuple] = []
+        self.written = 0
+        self.sqlite = conn.dialect.name == "sqlite"
+        if self.sqlite:
+            placeholders = ", ".join("?" for _ in columns)
+            self.sql = f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    @staticmethod
+    def _encode(value):
+        # what SQLAlchemy's SQLite type processors would produce, minus the overhead
+        if isinstance(value, list):
+            return json.dumps(value)
+        if isinstance(value, datetime):
+            return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+        if isinstance(value, bool):
+            return int(value)
+        return value
+
+    def add(self, row: tuple):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.sqlite:
+            encode = self._encode
+            self.conn.exec_driver_sql(self.sql, [tuple(encode(v) for v in row) for row in self.rows])
+        else:
+            self.conn.execute(self.table.insert(), [dict(zip(self.columns, row)) for row in self.rows])
+        self.written += len(self.rows)
+        self.rows = []
+
+
+class Generator:
+    def __init__(self, agents: int, seed: int, swipes_per_agent: float, respond_rate: float,
+                 messages_per_match: float, days: int, prefix: str):
+        self.n = agents
+        self.seed = seed
+        self.swipes_per_agent = swipes_per_agent
+        self.respond_rate = respond_rate
+        self.messages_per_match = messages_per_match
+        self.prefix = prefix
+        self.end = datetime(2026, 1, 1)
+        self.start = self.end - timedelta(days=days)
+        self.span = (self.end - self.start).total_seconds()
+        # per-agent counters filled while generating interactions
+        self.total_swipes = array("I", bytes(4 * agents))
+        self.matches_count = array("I", bytes(4 * agents))
+        self.super_used = bytearray(agents)
+
+    def agent_id(self, i: int) -> str:
+        return f"{self.prefix}{i:08d}"
+
+    def created_at(self, i: int) -> datetime:
+        # registration order follows the index, spread over the time window
+        return self.start + timedelta(seconds=self.span * i / max(self.n, 1))
+
+    def initiates(self, i: int, j: int) -> bool:
+        """Exactly one agent of every pair generates that pair's swipes"""
+        return (min(i, j) if (i + j) % 2 == 0 else max(i, j)) == i
+
+    def swipe_count(self, rng: random.Random) -> int:
+        # Pareto(alpha=1.5) has mean 3 * xm
+        n = int(rng.paretovariate(1.5) * self.swipes_per_agent / 3)
+        return min(n, self.n - 1, 5000)
+
+    def direction(self, rng: random.Random, i: int) -> str:
+        d = rng.choices(DIRECTIONS, weights=DIRECTION_WEIGHTS)[0]
+        if d == "super":
+            if self.super_used[i]:
+                return "right"
+            self.super_used[i] = 1
+        return d
+
+    def load_interactions(self, swipes: BulkLoader, matches: BulkLoader, messages: BulkLoader, first_match_id: int):
+        rng = random.Random(self.seed + 1)
+        match_id = first_match_id
+        for i in range(self.n):
+            wanted = self.swipe_count(rng)
+            targets = set()
+            attempts = 0
+            while len(targets) < wanted and attempts < wanted * 4:
+                attempts += 1
+                j = rng.randrange(self.n)
+                if j != i and self.initiates(i, j):
+                    targets.add(j)
+            for j in sorted(targets):
+                at = max(self.created_at(i), self.created_at(j)) + timedelta(seconds=rng.randrange(86400))
+                d_ij = self.direction(rng, i)
+                swipes.add((self.agent_id(i), self.agent_id(j), d_ij, at))
+                self.total_swipes[i] += 1
+                if rng.random() >= self.respond_rate:
+                    continue
+                d_ji = self.direction(rng, j)
+                back_at = at + timedelta(seconds=rng.randrange(3600))
+                swipes.add((self.agent_id(j), self.agent_id(i), d_ji, back_at))
+                self.total_swipes[j] += 1
+                if d_ij == "left" or d_ji == "left":
+                    continue
+                # mutual right swipe - the later swiper creates the match
+                match_id += 1
+                score = round(rng.uniform(20, 95), 1)
+                match_type = rng.choice(MATCH_TYPES)
+                matches.add((match_id, self.agent_id(j), self.agent_id(i), match_type, score,
+                             ["Compatible vibes"], back_at, True))
+                self.matches_count[i] += 1
+                self.matches_count[j] += 1
+                msg_at = back_at
+                for k in range(int(rng.expovariate(1 / self.messages_per_match)) if self.messages_per_match else 0):
+                    msg_at += timedelta(seconds=rng.randrange(1, 7200))
+                    sender = self.agent_id(j if k % 2 == 0 else i)
+                    messages.add((match_id, sender, rng.choice(MESSAGES), msg_at))
+
+    def load_agents(self, agents: BulkLoader):
+        rng = random.Random(self.seed)
+        chains, vibes, skills = ZipfSampler(CHAINS), ZipfSampler(VIBES), ZipfSampler(SKILLS)
+        for i in range(self.n):
+            created = self.created_at(i)
+            seeking = [rng.random() < p for p in (0.45, 0.6, 0.5, 0.2, 0.08)]
+            name = f"{rng.choice(NAME_PARTS)}{rng.choice(NAME_PARTS)}{i}"
+            agents.add((
+                self.agent_id(i), name, rng.choice(EMOJIS), rng.choice(TAGLINES), f"Generated agent #{i}",
+                chains.sample(rng, rng.choice((1, 1, 1, 2, 2, 3))),
+                vibes.sample(rng, rng.randint(1, 4)),
+                skills.sample(rng, rng.randint(1, 5)),
+                *seeking,
+                self.total_swipes[i], self.matches_count[i],
+                rng.randint(0, 5), rng.randint(0, 5), round(rng.uniform(1, 5), 2),
+                1 - self.super_used[i],
+                created, created, created,
+                rng.random() < 0.4,
+            ))
+
+
+AGENT_COLUMNS = [
+    "id", "name", "emoji", "tagline", "bio", "chains", "vibes", "skills",
+    "seeking_rivalry", "seeking_collaboration", "seeking_friendship", "seeking_mentorship", "seeking_romance",
+    "total_swipes", "matches_count", "rivalries_won", "rivalries_lost", "reputation", "super_claws",
+    "created_at", "updated_at", "last_active", "claimed",
+]
+SWIPE_COLUMNS = ["swiper_id", "swiped_id", "direction", "created_at"]
+MATCH_COLUMNS = ["id", "agent_a_id", "agent_b_id", "match_type", "compatibility_score",
+                 "compatibility_reasons", "created_at", "is_active"]
+MESSAGE_COLUMNS = ["match_id", "sender_id", "content", "created_at"]
+
+TABLES = [Agent.__table__, Swipe.__table__, Match.__table__, Message.__table__]
+
+
+def run(args) -> Dict[str, int]:
+    init_db()
+    gen = Generator(args.agents, args.seed, args.swipes_per_agent, args.respond_rate,
+                    args.messages_per_match, args.days, args.prefix)
+
+    with engine.begin() as conn:
+        if conn.execute(select(Agent.id).where(Agent.id == gen.agent_id(0))).first():
+            sys.exit(f"Agents with prefix '{args.prefix}' already exist - pick another --prefix")
+        first_match_id = conn.execute(select(func.max(Match.id))).scalar() or 0
+
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA synchronous = OFF")
+            conn.exec_driver_sql("PRAGMA cache_size = -262144")
+
+        # defer secondary indexes until the data is in
+        deferred = [index for table in TABLES for index in table.indexes]
+        for index in deferred:
+            index.drop(conn, checkfirst=True)
+        # and the full-text index and attribute mirrors, rebuilt in one pass afterwards
+        fts.drop_triggers(conn)
+        attributes.drop_triggers(conn)
+        # agents are numbered in one UPDATE afterwards rather than one per insert
+        if sequence.supported(conn):
+            sequence.drop_trigger(conn)
+
+        loaders = {
+            "swipes": BulkLoader(conn, Swipe.__table__, SWIPE_COLUMNS, args.batch_size),
+            "matches": BulkLoader(conn, Match.__table__, MATCH_COLUMNS, args.batch_size),
+            "messages": BulkLoader(conn, Message.__table__, MESSAGE_COLUMNS, args.batch_size),
+            "agents": BulkLoader(conn, Agent.__table__, AGENT_COLUMNS, args.batch_size),
+        }
+        started = time.perf_counter()
+        gen.load_interactions(loaders["swipes"], loaders["matches"], loaders["messages"], first_match_id)
+        gen.load_agents(loaders["agents"])
+        for loader in loaders.values():
+            loader.flush()
+        loaded = time.perf_counter() - started
+
+        if sequence.supported(conn):
+            sequence.assign(conn)
+            sequence.create_trigger(conn)
+        for index in deferred:
+            index.create(conn, checkfirst=True)
+        if fts.exists(conn):
+            fts.rebuild(conn)
+            fts.create_triggers(conn)
+        if attributes.supported(conn):
+            attributes.rebuild(conn)
+            attributes.create_triggers(conn)
+        inbox.backfill(conn)
+        elapsed = time.perf_counter() - started
+
+    counts = {name: loader.written for name, loader in loaders.items()}
+    total = sum(counts.values())
+    print(f"🦞 Generated {counts} in {elapsed:.1f}s "
+          f"({total / loaded * 60 / 1e6:.2f}M rows/min load, indexes {elapsed - loaded:.1f}s)")
+    return counts
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic Clawinder population")
+    parser.add_argument("--agents", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--swipes-per-agent", type=float, default=20.0, help="mean swipes initiated per agent")
+    parser.add_argument("--respond-rate", type=float, default=0.3, help="chance the target swipes back")
+    parser.add_argument("--messages-per-match", type=float, default=3.0, help="mean messages per match")
+    parser.add_argument("--days", type=int, default=90, help="registration window")
+    parser.add_argument("--prefix", default="gen", help="agent id prefix")
+    parser.add_argument("--batch-size", type=int, default=20000)
+    run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
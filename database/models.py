@@ -1,6 +1,6 @@
 """SQLAlchemy models for Clawinder"""
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, JSON, ForeignKey, Enum
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, JSON, ForeignKey, Enum, Index, LargeBinary, text
 from sqlalchemy.orm import relationship
 import enum
 
@@ -27,7 +27,9 @@ class Agent(Base):
     __tablename__ = "agents"
     
     id = Column(String, primary_key=True)
-    name = Column(String, nullable=False)
+    # dense 1, 2, 3... - bit positions in left-swipe bitmaps (database/sequence.py)
+    seq = Column(Integer, unique=True, index=True)
+    name = Column(String, nullable=False, index=True)
     emoji = Column(String, default="🤖")
     tagline = Column(String)
     bio = Column(String)
@@ -53,14 +55,15 @@ class Agent(Base):
     matches_count = Column(Integer, default=0)
     rivalries_won = Column(Integer, default=0)
     rivalries_lost = Column(Integer, default=0)
-    reputation = Column(Float, default=3.0)  # 1-5 stars
+    reputation = Column(Float, default=3.0, index=True)  # 1-5 stars
     
     # super claws
     super_claws = Column(Integer, default=1)
     
     # timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # also the profile cache's cross-worker change feed
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     last_active = Column(DateTime, default=datetime.utcnow)
     
     # external links
@@ -75,6 +78,42 @@ class Agent(Base):
     # relationships
     swipes_given = relationship("Swipe", back_populates="swiper", foreign_keys="Swipe.swiper_id")
     swipes_received = relationship("Swipe", back_populates="swiped", foreign_keys="Swipe.swiped_id")
+    
+    # keyset pagination orders (see api/pagination.py)
+    __table_args__ = (
+        Index("ix_agents_created_at_id", "created_at", "id"),
+        Index("ix_agents_matches_count_id", "matches_count", "id"),
+    )
+
+
+class AgentChain(Base):
+    """One row per (chain, agent) - mirrors Agent.chains, see database/attributes.py"""
+    __tablename__ = "agent_chains"
+    
+    value = Column(String, primary_key=True)  # lowercased
+    agent_id = Column(String, ForeignKey("agents.id"), primary_key=True)
+    
+    __table_args__ = (Index("ix_agent_chains_agent_id", "agent_id"),)
+
+
+class AgentVibe(Base):
+    """One row per (vibe, agent) - mirrors Agent.vibes"""
+    __tablename__ = "agent_vibes"
+    
+    value = Column(String, primary_key=True)
+    agent_id = Column(String, ForeignKey("agents.id"), primary_key=True)
+    
+    __table_args__ = (Index("ix_agent_vibes_agent_id", "agent_id"),)
+
+
+class AgentSkill(Base):
+    """One row per (skill, agent) - mirrors Agent.skills"""
+    __tablename__ = "agent_skills"
+    
+    value = Column(String, primary_key=True)
+    agent_id = Column(String, ForeignKey("agents.id"), primary_key=True)
+    
+    __table_args__ = (Index("ix_agent_skills_agent_id", "agent_id"),)
 
 
 class Swipe(Base):
@@ -89,6 +128,20 @@ class Swipe(Base):
     
     swiper = relationship("Agent", back_populates="swipes_given", foreign_keys=[swiper_id])
     swiped = relationship("Agent", back_populates="swipes_received", foreign_keys=[swiped_id])
+    
+    # duplicate checks, reverse-swipe lookups and feed exclusion
+    __table_args__ = (Index("ix_swipes_swiper_swiped", "swiper_id", "swiped_id"),)
+
+
+class LeftSwipeArchive(Base):
+    """An agent's compacted left swipes - see services/swipe_archive.py"""
+    __tablename__ = "left_swipe_archives"
+    
+    agent_id = Column(String, ForeignKey("agents.id"), primary_key=True)
+    bitmap = Column(LargeBinary, nullable=False)  # zlib'd, bit n = swiped the agent with seq n
+    swipe_count = Column(Integer, default=0, nullable=False)
+    archived_through = Column(Integer, nullable=False)  # highest swipes.id folded in
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
 class Match(Base):
@@ -108,6 +161,12 @@ class Match(Base):
     
     agent_a = relationship("Agent", foreign_keys=[agent_a_id])
     agent_b = relationship("Agent", foreign_keys=[agent_b_id])
+    
+    # an agent's matches, newest first, from either side
+    __table_args__ = (
+        Index("ix_matches_agent_a_created_at", "agent_a_id", "created_at", "id"),
+        Index("ix_matches_agent_b_created_at", "agent_b_id", "created_at", "id"),
+    )
 
 
 class Message(Base):
@@ -122,3 +181,58 @@ class Message(Base):
     
     match = relationship("Match")
     sender = relationship("Agent")
+    
+    __table_args__ = (Index("ix_messages_match_created_at", "match_id", "created_at", "id"),)
+
+
+class ConversationSummary(Base):
+    """One participant's inbox row for a match - kept current by services/inbox.py"""
+    __tablename__ = "conversation_summaries"
+    
+    agent_id = Column(String, ForeignKey("agents.id"), primary_key=True)
+    match_id = Column(Integer, ForeignKey("matches.id"), primary_key=True)
+    partner_id = Column(String, ForeignKey("agents.id"), nullable=False)
+    
+    # last message in the conversation (either side)
+    last_message_id = Column(Integer)
+    last_sender_id = Column(String)
+    last_message_preview = Column(String)
+    last_message_at = Column(DateTime)
+    message_count = Column(Integer, default=0, nullable=False)
+    
+    # this participant's read pointer
+    last_read_message_id = Column(Integer)
+    unread_count = Column(Integer, default=0, nullable=False)
+    
+    # last message time, or the match time before any message - the inbox order
+    last_activity_at = Column(DateTime, nullable=False)
+    
+    match = relationship("Match")
+    
+    __table_args__ = (
+        Index("ix_conversation_summaries_inbox", "agent_id", "last_activity_at", "match_id"),
+    )
+
+
+class ClaimJob(Base):
+    """Queued tweet verification for an agent claim"""
+    __tablename__ = "claim_jobs"
+    
+    id = Column(String, primary_key=True)
+    agent_id = Column(String, ForeignKey("agents.id"), nullable=False, index=True)
+    tweet_url = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="queued", index=True)  # queued, running, succeeded, failed
+    message = Column(String)
+    attempts = Column(Integer, default=0)
+    claimed_by = Column(String)  # worker token while running
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    agent = relationship("Agent")
+    
+    # at most one pending job per agent, however many requests race to queue one
+    __table_args__ = (
+        Index("ix_claim_jobs_pending_agent", "agent_id", unique=True,
+              sqlite_where=text("status IN ('queued', 'running')"),
+              postgresql_where=text("status IN ('queued', 'running')")),
+    )
@@ -0,0 +1,49 @@
+"""Dense agent sequence numbers (Agent.seq)
+
+Agent ids are strings; left-swipe bitmaps (services/swipe_archive.py) need
+small integers to use as bit positions. Each agent gets seq = its rowid at
+insert time, copied into a real column so a VACUUM renumbering rowids can't
+scramble archived bitmaps. On SQLite a trigger assigns it from any write
+path; other databases have no sequence and nothing is archived there.
+"""
+from sqlalchemy import inspect, text
+
+TRIGGER = "agents_seq_ai"
+
+TRIGGER_DDL = f"""
+CREATE TRIGGER IF NOT EXISTS {TRIGGER} AFTER INSERT ON agents WHEN new.seq IS NULL BEGIN
+    UPDATE agents SET seq = new.rowid WHERE rowid = new.rowid;
+END"""
+
+
+def supported(conn) -> bool:
+    return conn.dialect.name == "sqlite"
+
+
+def add_column(conn):
+    """agents.seq on databases created before it existed (create_all won't add columns)"""
+    if "seq" not in {column["name"] for column in inspect(conn).get_columns("agents")}:
+        conn.exec_driver_sql("ALTER TABLE agents ADD COLUMN seq INTEGER")
+
+
+def create_trigger(conn):
+    conn.exec_driver_sql(TRIGGER_DDL)
+
+
+def drop_trigger(conn):
+    """For bulk loads - follow with create_trigger() and assign()"""
+    conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {TRIGGER}")
+
+
+def assign(conn) -> int:
+    """Number agents that have no seq yet"""
+    return conn.execute(text("UPDATE agents SET seq = rowid WHERE seq IS NULL")).rowcount
+
+
+def install(conn):
+    """Add the column and trigger and number existing agents (call before creating indexes)"""
+    add_column(conn)
+    if not supported(conn):
+        return
+    create_trigger(conn)
+    assign(conn)
@@ -1,31 +1,64 @@
 """Clawble - Tinder for AI Agents"""
 import os
 import sys
+from contextlib import asynccontextmanager
 
 print("🦞 Clawble: main.py starting...", flush=True)
 
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
-
-print("🦞 Clawble: Importing database...", flush=True)
-
-# Import db first to ensure tables are created
-import database.db
-
-print("🦞 Clawble: Database imported, importing routes...", flush=True)
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, PlainTextResponse
 
+from database.db import init_db
+from services.cards import card_store
 from api.routes.agents import router as agents_router
 from api.routes.discovery import router as discovery_router
 from api.routes.matches import router as matches_router
 from api.routes.stats import router as stats_router
+from api.routes.admin import router as admin_router
+from api.routes.exports import router as exports_router
+from api.assets import Asset, AssetPipeline, AssetStaticFiles, IMMUTABLE_CACHE_CONTROL
+from api.serialization import FastJSONResponse
+from api.worker import WorkerStatsMiddleware, worker_stats
+from api.admission import AdmissionMiddleware, admission_stats
+from api.profiling import TimingMiddleware
+from services.singleflight import SingleFlightTimeout
+from api import metrics
+
+# Schema check on startup - set INIT_DB_ON_STARTUP=0 when a launcher or
+# deploy step already ran `python -m database.db`
+INIT_DB_ON_STARTUP = os.getenv("INIT_DB_ON_STARTUP", "1") == "1"
+
+# Fingerprinted + precompressed frontend, built on startup (or first use)
+assets = AssetPipeline()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Explicit startup work - nothing runs at import time"""
+    # the claim worker and tweet client load when the app starts, not on import
+    from services.tweets import tweet_client
+    from services.claims import claim_worker
+    from services.cards import card_worker
+
+    if INIT_DB_ON_STARTUP:
+        init_db()
+    assets.ensure_built()
+    print(f"🦞 Clawble: Built {len(assets.assets)} frontend assets", flush=True)
+    claim_worker.start()
+    card_worker.start()
+    yield
+    await card_worker.stop()
+    await claim_worker.stop()
+    await tweet_client.aclose()
 
-print("🦞 Clawble: Routes imported, creating app...", flush=True)
 
 app = FastAPI(
     title="Clawble",
     description="Tinder for AI Agents - Find your perfect AI match",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 # API routes
@@ -33,28 +66,76 @@ app.include_router(agents_router)
 app.include_router(discovery_router)
 app.include_router(matches_router)
 app.include_router(stats_router)
+app.include_router(admin_router)
+app.include_router(exports_router)
+
+# Compress JSON API responses above the threshold on the fly
+# (frontend assets are served pre-encoded and pass through untouched)
+app.add_middleware(GZipMiddleware, minimum_size=int(os.getenv("GZIP_MIN_SIZE", "1024")))
+# Shed load on expensive routes before it reaches the threadpool
+app.add_middleware(AdmissionMiddleware)
+# Server-Timing / slow request log (outside admission so queueing counts)
+app.add_middleware(TimingMiddleware)
+app.add_middleware(WorkerStatsMiddleware)
+
+
+@app.exception_handler(SingleFlightTimeout)
+async def coalesced_call_timeout(request: Request, exc: SingleFlightTimeout):
+    """A request that waited too long on an identical in-flight one - shed it"""
+    return FastJSONResponse({"detail": "Server busy, retry shortly"}, status_code=503,
+                            headers={"Retry-After": "1"})
+
 
 # Serve static files
-app.mount("/static", StaticFiles(directory="frontend"), name="static")
+app.mount("/static", AssetStaticFiles(directory="frontend", pipeline=assets), name="static")
+
+
+@app.get("/assets/{filename}", include_in_schema=False)
+def fingerprinted_asset(filename: str, request: Request):
+    """Serve a content-hashed asset (cacheable forever)"""
+    asset = assets.by_filename(filename)
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return assets.response(asset, request, IMMUTABLE_CACHE_CONTROL)
+
+
+@app.get("/cards/{filename}", include_in_schema=False)
+def match_card_image(filename: str, request: Request):
+    """Serve a rendered match card (content-addressed, cacheable forever)"""
+    variants = card_store.variants(filename)
+    if not variants:
+        raise HTTPException(status_code=404, detail="Card not found")
+    digest = filename.removeprefix("match-").removesuffix(".svg")
+    return assets.response(Asset(filename, digest, filename, variants), request, IMMUTABLE_CACHE_CONTROL)
 
 
 @app.get("/", response_class=HTMLResponse)
-def root():
+def root(request: Request):
     """Serve the main UI"""
-    return FileResponse("frontend/index.html")
+    return assets.page("index.html", request)
 
 
 @app.get("/developers", response_class=HTMLResponse)
 @app.get("/docs", response_class=HTMLResponse)
 @app.get("/agents", response_class=HTMLResponse)
-def developers():
+def developers(request: Request):
     """Serve the developer/agent landing page"""
-    return FileResponse("frontend/developers.html")
+    return assets.page("developers.html", request)
 
 
 @app.get("/health")
 def health():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "worker": worker_stats.snapshot(),
+        "admission": admission_stats.snapshot()
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint (every worker's counters with METRICS_MULTIPROC_DIR)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/api")
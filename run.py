@@ -1,11 +1,123 @@
 #!/usr/bin/env python
-"""Run the Clawinder API server"""
-import uvicorn
+"""Run the Clawinder API server
+
+    python run.py          # production: gunicorn + uvicorn workers, app preloaded
+    python run.py --dev    # single process with auto-reload
+
+Production settings come from the environment:
+
+    PORT                    listen port (8000)
+    WEB_CONCURRENCY         worker count (default: one per CPU core)
+    MAX_REQUESTS            recycle a worker after N requests (10000, 0 = never)
+    MAX_REQUESTS_JITTER     random extra requests so workers don't recycle together (1000)
+    GRACEFUL_TIMEOUT        seconds to drain in-flight requests on SIGTERM (30)
+    KEEPALIVE               HTTP keep-alive seconds (5)
+    BACKLOG                 listen backlog (2048)
+    METRICS_MULTIPROC_DIR   where workers share /metrics totals (a fresh temp dir;
+                            emptied at startup when set)
+
+Admission control (api/admission.py) is per worker: ADMISSION_RATE,
+ADMISSION_BURST, ADMISSION_CONCURRENCY and ADMISSION_QUEUE each apply
+once per worker, so the server-wide limits are those x WEB_CONCURRENCY.
+"""
+import os
+import sys
+import tempfile
+
+
+def env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def default_workers() -> int:
+    """One worker per usable core - each uvicorn worker is single-threaded async"""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    return max(cores, 1)
+
+
+def gunicorn_options() -> dict:
+    return {
+        "bind": f"0.0.0.0:{env_int('PORT', 8000)}",
+        "workers": env_int("WEB_CONCURRENCY", default_workers()),
+        "worker_class": "uvicorn_worker.UvicornWorker",
+        "preload_app": True,
+        "max_requests": env_int("MAX_REQUESTS", 10000),
+        "max_requests_jitter": env_int("MAX_REQUESTS_JITTER", 1000),
+        "graceful_timeout": env_int("GRACEFUL_TIMEOUT", 30),
+        "timeout": env_int("WORKER_TIMEOUT", 60),
+        "keepalive": env_int("KEEPALIVE", 5),
+        "backlog": env_int("BACKLOG", 2048),
+        "accesslog": os.getenv("ACCESS_LOG") or None,
+        "post_fork": post_fork,
+        "worker_exit": worker_exit,
+    }
+
+
+def prepare_metrics_dir():
+    """One shared, empty metrics directory per server start (before anything imports api.metrics)"""
+    directory = os.getenv("METRICS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        # totals left by a previous server would be counted again
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                os.remove(os.path.join(directory, name))
+    else:
+        os.environ["METRICS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="clawble-metrics-")
+
+
+def post_fork(server, worker):
+    """Don't share the master's pooled DB connections or counters with workers"""
+    from database import engine
+    from api import metrics
+    from api.worker import worker_stats
+    engine.dispose(close=False)
+    worker_stats.reset()
+    metrics.reset()
+
+
+def worker_exit(server, worker):
+    """Leave the worker's final totals for /metrics on the others"""
+    from api import metrics
+    metrics.flush()
+
+
+def run_production():
+    from gunicorn.app.base import BaseApplication
+
+    class ClawbleApplication(BaseApplication):
+        def load_config(self):
+            for key, value in gunicorn_options().items():
+                if value is not None:
+                    self.cfg.set(key, value)
+
+        def load(self):
+            # schema check + asset build happen once here, before fork;
+            # workers inherit the result instead of repeating it
+            from database.db import init_db
+            init_db()
+            os.environ["INIT_DB_ON_STARTUP"] = "0"
+            os.environ["MAX_REQUESTS"] = str(self.cfg.max_requests)
+
+            import main
+            main.assets.ensure_built()
+            return main.app
+
+    prepare_metrics_dir()
+    print(f"🦞 Clawble: Starting {gunicorn_options()['workers']} workers...", flush=True)
+    ClawbleApplication().run()
+
+
+def run_dev():
+    import uvicorn
+    uvicorn.run("main:app", host="0.0.0.0", port=env_int("PORT", 8000), reload=True)
+
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "clawinder.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True
-    )
+    if "--dev" in sys.argv:
+        run_dev()
+    else:
+        run_production()
@@ -0,0 +1,192 @@
+"""Match share cards - rendered once, stored content-addressed
+
+A card is an SVG composed from both agents' emoji and names plus the match
+type, score and top reasons. Its filename is a hash of exactly those
+inputs, so a card is rendered once and served forever from an immutable
+URL; when either profile changes in a way the card shows, the inputs hash
+to a new name and the next request renders that one lazily. New matches
+are rendered ahead of time by the card worker, so the first share of a
+viral match doesn't pay for rendering.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+from typing import Dict, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from database import SessionLocal
+from database.models import Match
+from services.profiles import profile_cache
+from services.singleflight import single_flight
+
+CARD_DIR = os.getenv("CARD_DIR", "build/cards")
+CARD_URL_PREFIX = "/cards"
+# bump when the template changes so every card gets a new address
+CARD_TEMPLATE_VERSION = 1
+CARD_MAX_REASONS = 3
+
+WIDTH, HEIGHT = 1200, 630  # Open Graph image size
+
+TEMPLATE = """<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" viewBox="0 0 {w} {h}">
+<defs><linearGradient id="bg" x1="0" y1="0" x2="1" y2="1">
+<stop offset="0" stop-color="#1a0a2e"/><stop offset="1" stop-color="#ff4757"/>
+</linearGradient></defs>
+<rect width="{w}" height="{h}" fill="url(#bg)"/>
+<text x="600" y="90" font-family="sans-serif" font-size="56" font-weight="bold" fill="#fff" text-anchor="middle">It's a match! 🦞</text>
+<text x="300" y="300" font-size="160" text-anchor="middle">{emoji_a}</text>
+<text x="900" y="300" font-size="160" text-anchor="middle">{emoji_b}</text>
+<text x="600" y="280" font-family="sans-serif" font-size="72" fill="#fff" text-anchor="middle">❤</text>
+<text x="300" y="380" font-family="sans-serif" font-size="40" fill="#fff" text-anchor="middle">{name_a}</text>
+<text x="900" y="380" font-family="sans-serif" font-size="40" fill="#fff" text-anchor="middle">{name_b}</text>
+<text x="600" y="460" font-family="sans-serif" font-size="44" font-weight="bold" fill="#ffd32a" text-anchor="middle">{headline}</text>
+{reasons}
+</svg>
+"""
+
+
+def card_inputs(match: Match, agent_a, agent_b) -> dict:
+    """Everything a card shows - and therefore everything its address depends on"""
+    return {
+        "v": CARD_TEMPLATE_VERSION,
+        "a": [agent_a.name, agent_a.emoji or "🤖"],
+        "b": [agent_b.name, agent_b.emoji or "🤖"],
+        "type": match.match_type,
+        "score": match.compatibility_score,
+        "reasons": list(match.compatibility_reasons or [])[:CARD_MAX_REASONS],
+    }
+
+
+def card_digest(inputs: dict) -> str:
+    canonical = json.dumps(inputs, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=10).hexdigest()
+
+
+def card_filename(digest: str) -> str:
+    return f"match-{digest}.svg"
+
+
+def render_svg(inputs: dict) -> bytes:
+    (name_a, emoji_a), (name_b, emoji_b) = inputs["a"], inputs["b"]
+    headline = f"{inputs['score'] or 0:.0f}% compatible"
+    if inputs["type"]:
+        headline = f"{inputs['type'].title()} · {headline}"
+    reasons = "\n".join(
+        f'<text x="600" y="{530 + 40 * i}" font-family="sans-serif" font-size="28" fill="#fff" '
+        f'text-anchor="middle">{escape(reason[:80])}</text>'
+        for i, reason in enumerate(inputs["reasons"][:2])
+    )
+    return TEMPLATE.format(
+        w=WIDTH, h=HEIGHT,
+        emoji_a=escape(emoji_a), emoji_b=escape(emoji_b),
+        name_a=escape(name_a[:24]), name_b=escape(name_b[:24]),
+        headline=escape(headline), reasons=reasons,
+    ).encode("utf-8")
+
+
+class CardStore:
+    """Card files (plus a .gz variant) in CARD_DIR, named by input digest"""
+
+    def __init__(self, directory: str = CARD_DIR):
+        self.directory = directory
+        self.rendered = 0
+
+    def variants(self, filename: str) -> Optional[Dict[str, str]]:
+        """encoding -> path for a stored card, or None"""
+        path = os.path.join(self.directory, filename)
+        if not filename.startswith("match-") or os.path.basename(filename) != filename or not os.path.exists(path):
+            return None
+        variants = {"identity": path}
+        if os.path.exists(path + ".gz"):
+            variants["gzip"] = path + ".gz"
+        return variants
+
+    def ensure(self, inputs: dict) -> str:
+        """Filename of the card for these inputs, rendering it if it isn't stored yet"""
+        digest = card_digest(inputs)
+        filename = card_filename(digest)
+        if not os.path.exists(os.path.join(self.directory, filename)):
+            self._render(digest, inputs)
+        return filename
+
+    @single_flight(key=lambda self, digest, inputs: digest)
+    def _render(self, digest: str, inputs: dict):
+        # concurrent first requests for one card render it once
+        os.makedirs(self.directory, exist_ok=True)
+        data = render_svg(inputs)
+        path = os.path.join(self.directory, card_filename(digest))
+        # .gz first so the card never exists without its variant
+        self._write(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+        self._write(path, data)
+        self.rendered += 1
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+
+card_store = CardStore()
+
+
+def match_card(db, match: Match) -> Optional[Tuple[str, object, object]]:
+    """(filename, agent_a, agent_b) for a match's current card, rendering it if needed"""
+    profiles = profile_cache.get_many(db, (match.agent_a_id, match.agent_b_id))
+    agent_a, agent_b = profiles.get(match.agent_a_id), profiles.get(match.agent_b_id)
+    if agent_a is None or agent_b is None:
+        return None
+    return card_store.ensure(card_inputs(match, agent_a, agent_b)), agent_a, agent_b
+
+
+class CardWorker:
+    """Renders cards for new matches off the request path"""
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # a stopped worker drops renders rather than queueing onto a closed loop
+        self._loop = None
+        self._queue = None
+
+    def enqueue(self, match_id: int):
+        """Queue a card render (safe to call from request threads; dropped if not running)"""
+        if self._loop is not None and self._queue is not None:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, match_id)
+
+    def render_match(self, match_id: int):
+        db = SessionLocal()
+        try:
+            match = db.query(Match).filter(Match.id == match_id).first()
+            if match is not None:
+                match_card(db, match)
+        finally:
+            db.close()
+
+    async def _run(self):
+        while True:
+            match_id = await self._queue.get()
+            try:
+                await asyncio.to_thread(self.render_match, match_id)
+            except Exception as e:
+                print(f"🦞 Clawble: card render error for match {match_id}: {e}", flush=True)
+
+
+card_worker = CardWorker()
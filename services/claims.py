@@ -0,0 +1,227 @@
+"""Background claim verification - persistent job table + bounded worker pool"""
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from database import SessionLocal
+from database.models import Agent, ClaimJob
+from services.tweets import ScraperUnavailableError, verify_tweet_contains_code
+
+CLAIM_BATCH_SIZE = int(os.getenv("CLAIM_BATCH_SIZE", "16"))
+CLAIM_CONCURRENCY = int(os.getenv("CLAIM_CONCURRENCY", "4"))
+CLAIM_POLL_INTERVAL = float(os.getenv("CLAIM_POLL_INTERVAL", "2"))
+CLAIM_MAX_ATTEMPTS = int(os.getenv("CLAIM_MAX_ATTEMPTS", "3"))
+# running jobs untouched this long belonged to a worker that died
+CLAIM_STALE_AFTER = float(os.getenv("CLAIM_STALE_AFTER", "300"))
+# a retried job waits CLAIM_RETRY_DELAY * 2^(attempts - 1) seconds
+CLAIM_RETRY_DELAY = float(os.getenv("CLAIM_RETRY_DELAY", "15"))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class ClaimInProgressError(Exception):
+    """A different tweet is already being verified for this agent"""
+
+
+def enqueue_claim(db, agent: Agent, tweet_url: str) -> ClaimJob:
+    """Queue a verification, reusing a pending job for the same agent
+
+    A queued job takes the newer tweet URL; a running one can't change
+    under the worker, so a different URL raises ClaimInProgressError.
+    Concurrent calls for one agent end up sharing a single job.
+    """
+    pending = db.query(ClaimJob).filter(
+        ClaimJob.agent_id == agent.id,
+        ClaimJob.status.in_([QUEUED, RUNNING])
+    ).first()
+    if pending:
+        if pending.tweet_url == tweet_url:
+            return pending
+        # conditional, so a worker claiming it meanwhile wins
+        moved = db.query(ClaimJob).filter(ClaimJob.id == pending.id, ClaimJob.status == QUEUED).update(
+            {ClaimJob.tweet_url: tweet_url, ClaimJob.updated_at: datetime.utcnow()}, synchronize_session=False
+        )
+        db.commit()
+        if not moved:
+            raise ClaimInProgressError(f"Already verifying {pending.tweet_url} - poll the status first")
+        db.refresh(pending)
+        claim_worker.notify()
+        return pending
+
+    job = ClaimJob(id=str(uuid.uuid4()), agent_id=agent.id, tweet_url=tweet_url, status=QUEUED)
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # another request queued one between the lookup and the insert
+        db.rollback()
+        return enqueue_claim(db, agent, tweet_url)
+    db.refresh(job)
+    claim_worker.notify()
+    return job
+
+
+def latest_claim_job(db, agent_id: str) -> Optional[ClaimJob]:
+    return db.query(ClaimJob).filter(
+        ClaimJob.agent_id == agent_id
+    ).order_by(ClaimJob.created_at.desc()).first()
+
+
+class ClaimWorker:
+    """Pulls queued jobs in batches and verifies them concurrently.
+
+    Jobs are claimed with a conditional UPDATE so several app workers can
+    share the table. DB work runs in threads to keep the event loop free.
+    """
+
+    def __init__(self, batch_size: int = CLAIM_BATCH_SIZE, concurrency: int = CLAIM_CONCURRENCY):
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.token: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.processed = 0
+
+    def start(self):
+        """Start the loop on the running event loop (app lifespan)"""
+        # per process - workers forked from a preloaded master must not share it
+        self.token = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self):
+        """Wake the loop (safe to call from request threads)"""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    @staticmethod
+    def _due(now: datetime):
+        """Queued jobs that are new, or whose retry backoff has passed"""
+        return or_(ClaimJob.attempts == 0, *[
+            and_(ClaimJob.attempts == n,
+                 ClaimJob.updated_at < now - timedelta(seconds=CLAIM_RETRY_DELAY * 2 ** (n - 1)))
+            for n in range(1, CLAIM_MAX_ATTEMPTS)
+        ])
+
+    def _claim_batch(self) -> List[tuple]:
+        db = SessionLocal()
+        try:
+            # jobs left running by a crashed or restarted process go back to the
+            # queue - unless they've used up their attempts, e.g. by crashing it
+            now = datetime.utcnow()
+            stale = [ClaimJob.status == RUNNING, ClaimJob.updated_at < now - timedelta(seconds=CLAIM_STALE_AFTER)]
+            db.execute(
+                update(ClaimJob)
+                .where(*stale, ClaimJob.attempts >= CLAIM_MAX_ATTEMPTS)
+                .values(status=FAILED, claimed_by=None,
+                        message=f"Verification abandoned after {CLAIM_MAX_ATTEMPTS} attempts")
+            )
+            db.execute(
+                update(ClaimJob)
+                .where(*stale)
+                .values(status=QUEUED, claimed_by=None)
+            )
+            db.commit()
+            ids = [row[0] for row in db.query(ClaimJob.id).filter(
+                ClaimJob.status == QUEUED, self._due(now)
+            ).order_by(ClaimJob.created_at).limit(self.batch_size).all()]
+            if not ids:
+                return []
+            db.execute(
+                update(ClaimJob)
+                .where(ClaimJob.id.in_(ids), ClaimJob.status == QUEUED)
+                .values(status=RUNNING, claimed_by=self.token, attempts=ClaimJob.attempts + 1,
+                        updated_at=datetime.utcnow())
+            )
+            db.commit()
+            rows = db.query(ClaimJob.id, ClaimJob.tweet_url, ClaimJob.attempts, Agent.verification_code).join(
+                Agent, Agent.id == ClaimJob.agent_id
+            ).filter(ClaimJob.id.in_(ids), ClaimJob.claimed_by == self.token, ClaimJob.status == RUNNING).all()
+            return [tuple(row) for row in rows]
+        finally:
+            db.close()
+
+    def _save_results(self, results: List[tuple]):
+        """Apply a batch of (job_id, verified, message, retry) in one transaction"""
+        db = SessionLocal()
+        try:
+            for job_id, verified, message, retry in results:
+                job = db.query(ClaimJob).filter(ClaimJob.id == job_id).first()
+                if job is None:
+                    continue
+                job.message = message
+                job.claimed_by = None
+                if retry:
+                    job.status = QUEUED
+                    continue
+                job.status = SUCCEEDED if verified else FAILED
+                if verified:
+                    agent = db.query(Agent).filter(Agent.id == job.agent_id).first()
+                    if agent and not agent.claimed:
+                        agent.claimed = True
+                        agent.claim_tweet_url = job.tweet_url
+                        agent.updated_at = datetime.utcnow()
+            db.commit()
+        finally:
+            db.close()
+
+    async def _verify(self, semaphore: asyncio.Semaphore, job: tuple) -> tuple:
+        job_id, tweet_url, attempts, code = job
+        async with semaphore:
+            try:
+                verified, message = await verify_tweet_contains_code(tweet_url, code)
+            except ScraperUnavailableError as e:
+                # scraper outage - no verdict either way, so retry with backoff
+                retry = attempts < CLAIM_MAX_ATTEMPTS
+                return job_id, False, f"Verification unavailable, {'will retry' if retry else 'giving up'}: {e}", retry
+            except Exception as e:
+                retry = attempts < CLAIM_MAX_ATTEMPTS
+                return job_id, False, f"Verification error: {e}", retry
+        return job_id, verified, message, False
+
+    async def run_once(self) -> int:
+        """Process one batch; returns the number of jobs handled"""
+        batch = await asyncio.to_thread(self._claim_batch)
+        if not batch:
+            return 0
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(self._verify(semaphore, job) for job in batch))
+        await asyncio.to_thread(self._save_results, results)
+        self.processed += len(results)
+        return len(results)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                handled = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"🦞 Clawble: claim worker error: {e}", flush=True)
+                handled = 0
+            if handled:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=CLAIM_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+
+claim_worker = ClaimWorker()
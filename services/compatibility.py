@@ -56,11 +56,8 @@ def calculate_vibe_compatibility(vibes_a: List[str], vibes_b: List[str]) -> floa
     return sum(scores) / len(scores) if scores else 0.4
 
 
-def calculate_compatibility(agent_a: Dict[str, Any], agent_b: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Calculate overall compatibility between two agents
-    Returns score (0-100) and breakdown
-    """
+def _component_scores(agent_a: Dict[str, Any], agent_b: Dict[str, Any]):
+    """(chain, vibe, skill, seeking) scores and the match types both want"""
     # chain overlap (25%)
     chain_score = calculate_overlap(
         agent_a.get("chains", []), 
@@ -90,12 +87,29 @@ def calculate_compatibility(agent_a: Dict[str, Any], agent_b: Dict[str, Any]) ->
             seeking_score += 7  # 35 / 5 types
             seeking_matches.append(match_type)
     
+    return chain_score, vibe_score, skill_score, seeking_score, seeking_matches
+
+
+def compatibility_score(agent_a: Dict[str, Any], agent_b: Dict[str, Any]) -> float:
+    """Just the 0-100 total of calculate_compatibility, without breakdown or reasons"""
+    chain_score, vibe_score, skill_score, seeking_score, _ = _component_scores(agent_a, agent_b)
+    return round(chain_score + vibe_score + skill_score + seeking_score, 1)
+
+
+def calculate_compatibility(agent_a: Dict[str, Any], agent_b: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Calculate overall compatibility between two agents
+    Returns score (0-100) and breakdown
+    """
+    chain_score, vibe_score, skill_score, seeking_score, seeking_matches = _component_scores(agent_a, agent_b)
     total = chain_score + vibe_score + skill_score + seeking_score
     
     # build reasons
     reasons = []
     if chain_score > 10:
-        shared_chains = set(agent_a.get("chains", [])) & set(agent_b.get("chains", []))
+        # agent_a's order, so the reason text doesn't depend on set iteration order
+        chains_b = set(agent_b.get("chains", []))
+        shared_chains = [c for c in dict.fromkeys(agent_a.get("chains", [])) if c in chains_b]
         reasons.append(f"Both on {', '.join(shared_chains)}")
     if vibe_score > 10:
         reasons.append("Compatible vibes")
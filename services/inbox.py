@@ -0,0 +1,124 @@
+"""Conversation summaries - the match inbox without reading messages
+
+Each match has one conversation_summaries row per participant: the last
+message (id, sender, preview, time), the message count, that participant's
+read pointer and unread count, and last_activity_at for ordering. Rows are
+opened with the match and updated in the same transaction as every new
+message, so GET /matches/{agent_id} is a single index range on
+(agent_id, last_activity_at) joined to matches. A match without rows is
+not in that range: init_db() and the generator backfill them, and the
+first new message on such a match seeds them from its history.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, case, func, or_, select, text
+from sqlalchemy.orm import Session
+
+from database.models import ConversationSummary, Match, Message
+
+PREVIEW_LENGTH = 100
+
+
+def preview(content: str) -> str:
+    return content if len(content) <= PREVIEW_LENGTH else content[:PREVIEW_LENGTH - 1] + "…"
+
+
+def open_conversation(db: Session, match: Match):
+    """Inbox rows for both sides of a new match (call after the match is flushed)"""
+    started = match.created_at or datetime.utcnow()
+    for agent_id, partner_id in ((match.agent_a_id, match.agent_b_id), (match.agent_b_id, match.agent_a_id)):
+        db.add(ConversationSummary(
+            agent_id=agent_id, match_id=match.id, partner_id=partner_id,
+            message_count=0, unread_count=0, last_activity_at=started,
+        ))
+
+
+def record_message(db: Session, match: Match, message: Message):
+    """Fold a flushed message into both participants' rows"""
+    mine = ConversationSummary.agent_id == message.sender_id
+    values = {
+        ConversationSummary.last_message_id: message.id,
+        ConversationSummary.last_sender_id: message.sender_id,
+        ConversationSummary.last_message_preview: preview(message.content),
+        ConversationSummary.last_message_at: message.created_at,
+        ConversationSummary.last_activity_at: message.created_at,
+        ConversationSummary.message_count: ConversationSummary.message_count + 1,
+        # the sender has read their own message; the partner has one more unread
+        ConversationSummary.unread_count: case((mine, 0), else_=ConversationSummary.unread_count + 1),
+        ConversationSummary.last_read_message_id: case(
+            (mine, message.id), else_=ConversationSummary.last_read_message_id
+        ),
+    }
+    updated = db.query(ConversationSummary).filter(ConversationSummary.match_id == match.id).update(
+        values, synchronize_session=False
+    )
+    if not updated:
+        # a match from before summaries were backfilled - seed its rows from the
+        # history before this message, then fold this message in as usual
+        db.execute(text(BACKFILL), backfill_params(match.id, before=message.id))
+        db.query(ConversationSummary).filter(ConversationSummary.match_id == match.id).update(
+            values, synchronize_session=False
+        )
+
+
+def mark_read(db: Session, agent_id: str, match_id: int, message_id: Optional[int]):
+    """Move agent_id's read pointer forward to message_id (never back)"""
+    if message_id is None:
+        return
+    unread = select(func.count(Message.id)).where(
+        Message.match_id == match_id, Message.id > message_id, Message.sender_id != agent_id
+    ).scalar_subquery()
+    db.query(ConversationSummary).filter(
+        ConversationSummary.agent_id == agent_id,
+        ConversationSummary.match_id == match_id,
+        or_(ConversationSummary.last_read_message_id.is_(None),
+            ConversationSummary.last_read_message_id < message_id),
+    ).update({
+        ConversationSummary.last_read_message_id: message_id,
+        ConversationSummary.unread_count: unread,
+    }, synchronize_session=False)
+
+
+def summary_for(db: Session, agent_id: str, match_id: int) -> Optional[ConversationSummary]:
+    return db.query(ConversationSummary).filter(
+        and_(ConversationSummary.agent_id == agent_id, ConversationSummary.match_id == match_id)
+    ).first()
+
+
+# preview() in SQL - SQLite's length() and substr() count characters too
+PREVIEW_SQL = ("CASE WHEN length(last.content) <= :preview THEN last.content "
+               "ELSE substr(last.content, 1, :preview - 1) || '…' END")
+
+BACKFILL = f"""
+INSERT INTO conversation_summaries (
+    agent_id, match_id, partner_id, last_message_id, last_sender_id, last_message_preview,
+    last_message_at, message_count, last_read_message_id, unread_count, last_activity_at
+)
+SELECT side.agent_id, m.id, side.partner_id, last.id, last.sender_id, {PREVIEW_SQL},
+       last.created_at, coalesce(stats.n, 0), last.id, 0, coalesce(last.created_at, m.created_at)
+FROM (
+    SELECT id AS match_id, agent_a_id AS agent_id, agent_b_id AS partner_id FROM matches
+    UNION ALL
+    SELECT id, agent_b_id, agent_a_id FROM matches
+) AS side
+JOIN matches AS m ON m.id = side.match_id
+LEFT JOIN (
+    SELECT match_id, count(*) AS n, max(id) AS last_id FROM messages
+    WHERE :before IS NULL OR id < :before GROUP BY match_id
+) AS stats ON stats.match_id = m.id
+LEFT JOIN messages AS last ON last.id = stats.last_id
+WHERE (:match_id IS NULL OR m.id = :match_id) AND NOT EXISTS (
+    SELECT 1 FROM conversation_summaries AS cs WHERE cs.agent_id = side.agent_id AND cs.match_id = m.id
+)
+"""
+
+
+def backfill_params(match_id: Optional[int] = None, before: Optional[int] = None) -> dict:
+    """BACKFILL for one match only, and/or from messages before a message id only"""
+    return {"preview": PREVIEW_LENGTH, "match_id": match_id, "before": before}
+
+
+def backfill(conn) -> int:
+    """Open rows for matches that have none, from their messages (history counts as read)"""
+    return conn.execute(text(BACKFILL), backfill_params()).rowcount
@@ -0,0 +1,218 @@
+"""Read-through agent profile cache
+
+Immutable snapshots of Agent rows, keyed by id (plus a name index), in a
+size-bounded LRU per process. Commits that touch an agent in this process
+invalidate it right away via session events; writes made by other workers
+are picked up by a periodic version check - one indexed query for rows
+whose updated_at moved, compared against the cached snapshots - so a stale
+read lasts at most PROFILE_CACHE_SYNC seconds.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event
+
+from database import SessionLocal
+from database.models import Agent
+
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))  # 0 disables
+PROFILE_CACHE_SYNC = float(os.getenv("PROFILE_CACHE_SYNC", "1.0"))
+# look back this far on each sync so rows committed late (after their
+# updated_at was stamped) are still seen
+PROFILE_CACHE_OVERLAP = float(os.getenv("PROFILE_CACHE_OVERLAP", "5.0"))
+
+AGENT_FIELDS = [column.name for column in Agent.__table__.columns]
+LIST_FIELDS = {"chains", "vibes", "skills"}
+
+AgentSnapshot = namedtuple("AgentSnapshot", AGENT_FIELDS)
+
+
+def snapshot(agent: Agent) -> AgentSnapshot:
+    """Detached, read-only copy of an Agent row"""
+    values = []
+    for field in AGENT_FIELDS:
+        value = getattr(agent, field)
+        if field in LIST_FIELDS:
+            value = tuple(value or ())
+        values.append(value)
+    return AgentSnapshot(*values)
+
+
+class ProfileCache:
+    def __init__(self, maxsize: int = PROFILE_CACHE_SIZE, sync_interval: float = PROFILE_CACHE_SYNC):
+        self.maxsize = maxsize
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._by_id: "OrderedDict[str, AgentSnapshot]" = OrderedDict()
+        self._by_name: Dict[str, str] = {}
+        # invalidation epochs, so a load racing a write can't cache the old row
+        self._epoch = 0
+        self._dirty: Dict[str, int] = {}
+        self._synced_at = time.monotonic()
+        self._since = datetime.utcnow() - timedelta(seconds=PROFILE_CACHE_OVERLAP)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    # --- reads ---
+
+    def get(self, db, agent_id: str) -> Optional[AgentSnapshot]:
+        if self.maxsize <= 0:
+            agent = db.query(Agent).filter(Agent.id == agent_id).first()
+            return snapshot(agent) if agent else None
+        self._sync(db)
+        with self._lock:
+            snap = self._by_id.get(agent_id)
+            if snap is not None:
+                self._by_id.move_to_end(agent_id)
+                self.hits += 1
+                return snap
+            self.misses += 1
+            epoch = self._epoch
+        agent = db.query(Agent).filter(Agent.id == agent_id).first()
+        return self._put(snapshot(agent), epoch) if agent else None
+
+    def get_by_name(self, db, name: str) -> Optional[AgentSnapshot]:
+        if self.maxsize > 0:
+            self._sync(db)
+            with self._lock:
+                agent_id = self._by_name.get(name)
+            if agent_id is not None:
+                snap = self.get(db, agent_id)
+                if snap is not None and snap.name == name:
+                    return snap
+        with self._lock:
+            self.misses += 1
+            epoch = self._epoch
+        agent = db.query(Agent).filter(Agent.name == name).first()
+        return self._put(snapshot(agent), epoch) if agent else None
+
+    def get_many(self, db, agent_ids: Iterable[str]) -> Dict[str, AgentSnapshot]:
+        """Snapshots for several ids; the misses are loaded with one query"""
+        wanted = list(dict.fromkeys(agent_ids))
+        found, epoch = self._lookup(db, wanted)
+        missing = [agent_id for agent_id in wanted if agent_id not in found]
+        if missing:
+            for agent in db.query(Agent).filter(Agent.id.in_(missing)).all():
+                found[agent.id] = self._put(snapshot(agent), epoch)
+        return found
+
+    def cached(self, db, agent_ids: Iterable[str]) -> Dict[str, AgentSnapshot]:
+        """Only the snapshots already in memory - for callers loading the rest their own way"""
+        return self._lookup(db, list(dict.fromkeys(agent_ids)))[0]
+
+    def _lookup(self, db, wanted):
+        found: Dict[str, AgentSnapshot] = {}
+        if self.maxsize <= 0:
+            return found, 0
+        self._sync(db)
+        with self._lock:
+            for agent_id in wanted:
+                snap = self._by_id.get(agent_id)
+                if snap is not None:
+                    self._by_id.move_to_end(agent_id)
+                    found[agent_id] = snap
+            self.hits += len(found)
+            self.misses += len(wanted) - len(found)
+            return found, self._epoch
+
+    # --- writes ---
+
+    def _put(self, snap: AgentSnapshot, epoch: int) -> AgentSnapshot:
+        if self.maxsize <= 0:
+            return snap
+        with self._lock:
+            if self._dirty.get(snap.id, -1) > epoch:
+                return snap  # invalidated while we were loading it
+            old = self._by_id.get(snap.id)
+            if old is not None and old.name != snap.name:
+                self._by_name.pop(old.name, None)
+            self._by_id[snap.id] = snap
+            self._by_id.move_to_end(snap.id)
+            self._by_name[snap.name] = snap.id
+            while len(self._by_id) > self.maxsize:
+                _, evicted = self._by_id.popitem(last=False)
+                if self._by_name.get(evicted.name) == evicted.id:
+                    del self._by_name[evicted.name]
+        return snap
+
+    def invalidate(self, *agent_ids: str):
+        with self._lock:
+            self._epoch += 1
+            for agent_id in agent_ids:
+                self._dirty[agent_id] = self._epoch
+                snap = self._by_id.pop(agent_id, None)
+                if snap is not None:
+                    self.invalidations += 1
+                    if self._by_name.get(snap.name) == agent_id:
+                        del self._by_name[snap.name]
+            if len(self._dirty) > 4 * max(self.maxsize, 1024):
+                # loads take milliseconds; only recent epochs can still race
+                cutoff = self._epoch - 1024
+                self._dirty = {k: v for k, v in self._dirty.items() if v > cutoff}
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._by_id.clear()
+            self._by_name.clear()
+            self._dirty.clear()
+
+    # --- cross-worker version check ---
+
+    def _sync(self, db):
+        now = time.monotonic()
+        if now - self._synced_at < self.sync_interval or not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self._synced_at = now
+            started = datetime.utcnow()
+            rows = db.query(Agent.id, Agent.updated_at).filter(Agent.updated_at > self._since).all()
+            with self._lock:
+                stale = [agent_id for agent_id, updated_at in rows
+                         if agent_id in self._by_id and self._by_id[agent_id].updated_at != updated_at]
+            if stale:
+                self.invalidate(*stale)
+            self._since = started - timedelta(seconds=PROFILE_CACHE_OVERLAP)
+        finally:
+            self._sync_lock.release()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._by_id),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+profile_cache = ProfileCache()
+
+
+def expire_profiles(db, *agent_ids: str):
+    """Invalidate these agents once db commits (for bulk UPDATEs the ORM can't see)"""
+    db.info.setdefault("profiles_changed", set()).update(agent_ids)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_changed_profiles(session, flush_context):
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Agent):
+            session.info.setdefault("profiles_changed", set()).add(obj.id)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _expire_changed_profiles(session):
+    changed = session.info.pop("profiles_changed", None)
+    if changed:
+        profile_cache.invalidate(*changed)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_changed_profiles(session):
+    session.info.pop("profiles_changed", None)
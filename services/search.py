@@ -0,0 +1,110 @@
+"""Agent search - ranked full-text and name autocomplete
+
+On SQLite both run against the agents_fts index (database/fts.py):
+search ranks by bm25 with per-column weights, and autocomplete is a
+prefix match on names served from the index's prefix tables. Elsewhere
+they degrade to LIKE scans.
+"""
+import os
+import re
+from typing import List, Tuple
+
+from sqlalchemy import or_, text
+from sqlalchemy.orm import Session
+
+from database import fts
+from database.models import Agent
+
+# user input is reduced to plain terms - no FTS5 syntax gets through
+_TERM = re.compile(r"\w+", re.UNICODE)
+MAX_TERMS = 8
+# opt-in cap on how many matches bm25 scores per search. The capped set is the
+# first matches in index order (the oldest agents), so past it newer agents
+# can't be found however relevant - only for when exact ranking of very common
+# terms is too slow, and searches that hit the cap are reported as truncated
+SEARCH_RANK_WINDOW = int(os.getenv("SEARCH_RANK_WINDOW", "0"))  # 0 ranks every match
+
+
+def terms(q: str) -> List[str]:
+    return _TERM.findall(q.lower())[:MAX_TERMS]
+
+
+def match_expression(q: str, prefix_last: bool = False, column: str = "") -> str:
+    """Quoted terms ANDed together, the last one optionally as a prefix"""
+    quoted = [f'"{t}"' for t in terms(q)]
+    if quoted and prefix_last:
+        quoted[-1] += "*"
+    expr = " ".join(quoted)
+    return f"{{{column}}} : ({expr})" if column and expr else expr
+
+
+def _use_fts(db: Session) -> bool:
+    return fts.supported(db.get_bind())
+
+
+def search_agents(db: Session, q: str, limit: int = 20) -> Tuple[List[Tuple[Agent, float]], bool]:
+    """Best matches first, with their bm25 score (higher is better)
+
+    Also returns whether ranking was truncated - more matches than
+    SEARCH_RANK_WINDOW, so the results are the best of a subset only.
+    """
+    expr = match_expression(q, prefix_last=True)
+    if not expr:
+        return [], False
+    if not _use_fts(db):
+        return [(agent, 0.0) for agent in _like(db, terms(q), limit)], False
+
+    matches = f"SELECT rowid, rank FROM {fts.FTS_TABLE} WHERE {fts.FTS_TABLE} MATCH :q"
+    params = {"q": expr, "limit": limit}
+    truncated = False
+    if SEARCH_RANK_WINDOW > 0:
+        window = max(SEARCH_RANK_WINDOW, limit)
+        # counting stops one past the window, so this is cheap for any term
+        truncated = db.execute(text(
+            f"SELECT count(*) FROM (SELECT rowid FROM {fts.FTS_TABLE} WHERE {fts.FTS_TABLE} MATCH :q LIMIT :over)"
+        ), {"q": expr, "over": window + 1}).scalar() > window
+        if truncated:
+            matches = f"SELECT rowid, rank FROM ({matches} LIMIT :window)"
+            params["window"] = window
+    rows = db.execute(text(f"{matches} ORDER BY rank LIMIT :limit"), params).all()
+    return _hydrate(db, rows), truncated
+
+
+def autocomplete(db: Session, prefix: str, limit: int = 10) -> List[Agent]:
+    """Agents whose name has words starting with the typed text, shortest names first"""
+    expr = match_expression(prefix, prefix_last=True, column="name")
+    if not expr:
+        return []
+    if not _use_fts(db):
+        return db.query(Agent).filter(Agent.name.ilike(f"{prefix.strip()}%")).order_by(
+            Agent.name
+        ).limit(limit).all()
+
+    # no ORDER BY rank: stop at the first `limit * 5` hits instead of scoring
+    # every match, then order that window by closeness to the typed text
+    rows = db.execute(text(
+        f"SELECT rowid, 0 FROM {fts.FTS_TABLE} WHERE {fts.FTS_TABLE} MATCH :q LIMIT :window"
+    ), {"q": expr, "window": limit * 5}).all()
+    typed = prefix.strip().lower()
+    agents = [agent for agent, _ in _hydrate(db, rows)]
+    agents.sort(key=lambda a: (not a.name.lower().startswith(typed), len(a.name), a.name))
+    return agents[:limit]
+
+
+def _hydrate(db: Session, rows) -> List[Tuple[Agent, float]]:
+    """Load agents for (rowid, rank) rows, keeping the index's order
+
+    The index's rowid is Agent.seq (database/fts.py).
+    """
+    if not rows:
+        return []
+    by_seq = {agent.seq: agent for agent in db.query(Agent).filter(Agent.seq.in_([row[0] for row in rows])).all()}
+    return [(by_seq[seq], -rank) for seq, rank in rows if seq in by_seq]
+
+
+def _like(db: Session, words: List[str], limit: int) -> List[Agent]:
+    query = db.query(Agent)
+    for word in words:
+        pattern = f"%{word}%"
+        query = query.filter(or_(Agent.name.ilike(pattern), Agent.tagline.ilike(pattern), Agent.bio.ilike(pattern)))
+    return query.limit(limit).all()
@@ -0,0 +1,208 @@
+"""Single-flight request coalescing
+
+Concurrent identical calls (same arguments) share one in-flight
+computation instead of each doing the work. An optional micro-TTL keeps the
+result around briefly so a burst arriving just after it finishes is absorbed
+too. Works for plain functions (route handlers run in the threadpool) and
+for coroutines.
+
+A follower holds its threadpool slot while it waits, so the wait is bounded:
+past SINGLE_FLIGHT_WAIT seconds it gives up with SingleFlightTimeout (a 503
+from the API) rather than pile up behind a slow leader.
+"""
+import asyncio
+import functools
+import inspect
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# recent results kept per group before expired entries are pruned
+MAX_RECENT = 1024
+# longest a follower waits on the leader's result (0 waits indefinitely)
+SINGLE_FLIGHT_WAIT = float(os.getenv("SINGLE_FLIGHT_WAIT", "5"))
+
+
+class SingleFlightTimeout(TimeoutError):
+    """A follower stopped waiting for the in-flight call it joined"""
+
+
+def normalize(value: Any):
+    """Make a call argument hashable; only containers without order are sorted"""
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(normalize(v) for v in value))
+    if isinstance(value, dict):
+        return tuple(sorted((k, normalize(v)) for k, v in value.items()))
+    return value
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """One group of coalesced calls with shared counters"""
+
+    def __init__(self, name: str = "", ttl: float = 0.0, wait: float = SINGLE_FLIGHT_WAIT):
+        self.name = name
+        self.ttl = ttl
+        self.wait = wait if wait > 0 else None
+        self._lock = threading.Lock()
+        self._calls: Dict[Any, _Call] = {}
+        self._async_calls: Dict[Tuple[Any, Any], asyncio.Future] = {}
+        self._recent: Dict[Any, Tuple[float, Any]] = {}
+        self.leaders = 0
+        self.followers = 0
+        self.cache_hits = 0
+        self.timeouts = 0
+
+    def _cached(self, key) -> Tuple[bool, Any]:
+        entry = self._recent.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.cache_hits += 1
+            return True, entry[1]
+        return False, None
+
+    def _remember(self, key, result):
+        if self.ttl <= 0:
+            return
+        now = time.monotonic()
+        if len(self._recent) >= MAX_RECENT:
+            self._recent = {k: v for k, v in self._recent.items() if v[0] > now}
+        self._recent[key] = (now + self.ttl, result)
+
+    def do(self, key, fn: Callable, *args, **kwargs):
+        """Run fn once for all concurrent callers with the same key"""
+        with self._lock:
+            hit, result = self._cached(key)
+            if hit:
+                return result
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not leader:
+            if not call.event.wait(self.wait):
+                raise self._timed_out()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None:
+                    self._remember(key, call.result)
+            call.event.set()
+        return call.result
+
+    async def ado(self, key, fn: Callable, *args, **kwargs):
+        """Coroutine version - coalesces per event loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            hit, result = self._cached(key)
+            if hit:
+                return result
+            future = self._async_calls.get((loop, key))
+            leader = future is None
+            if leader:
+                future = self._async_calls[(loop, key)] = loop.create_future()
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not leader:
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), self.wait)
+            except asyncio.TimeoutError:
+                raise self._timed_out() from None
+
+        try:
+            result = await fn(*args, **kwargs)
+        except BaseException as e:
+            with self._lock:
+                del self._async_calls[(loop, key)]
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody was waiting
+            raise
+        with self._lock:
+            del self._async_calls[(loop, key)]
+            self._remember(key, result)
+        future.set_result(result)
+        return result
+
+    def _timed_out(self) -> SingleFlightTimeout:
+        with self._lock:
+            self.timeouts += 1
+        return SingleFlightTimeout(f"{self.name or 'single flight'}: no result after {self.wait}s")
+
+    def clear(self):
+        with self._lock:
+            self._recent.clear()
+
+    def snapshot(self) -> dict:
+        return {
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "cache_hits": self.cache_hits,
+            "timeouts": self.timeouts,
+            "in_flight": len(self._calls) + len(self._async_calls),
+        }
+
+
+# every decorated function's group, for stats
+groups: Dict[str, SingleFlight] = {}
+
+
+def single_flight(ttl: float = 0.0, key: Optional[Callable] = None, ignore=("db", "request", "response"),
+                  wait: float = SINGLE_FLIGHT_WAIT):
+    """Decorator coalescing concurrent identical calls.
+
+    The key is built from the bound arguments, as passed, minus `ignore`
+    (sessions and request objects differ per caller but don't change the
+    result), unless a `key` callable taking the same arguments is given.
+    Followers wait at most `wait` seconds for the leader.
+    """
+    def decorator(fn):
+        name = f"{fn.__module__}.{fn.__qualname__}"
+        group = groups[name] = SingleFlight(name, ttl, wait)
+        signature = inspect.signature(fn)
+
+        def make_key(args, kwargs):
+            if key is not None:
+                return normalize(key(*args, **kwargs))
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return tuple((k, normalize(v)) for k, v in bound.arguments.items() if k not in ignore)
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                return await group.ado(make_key(args, kwargs), fn, *args, **kwargs)
+            async_wrapper.group = group
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return group.do(make_key(args, kwargs), fn, *args, **kwargs)
+        wrapper.group = group
+        return wrapper
+
+    return decorator
@@ -0,0 +1,156 @@
+"""Left-swipe archive - old left swipes folded into per-agent bitmaps
+
+Left swipes are most of the swipes table and are only ever read to keep an
+agent out of the swiper's feed and to reject a repeat swipe. compact()
+moves left swipes older than SWIPE_ARCHIVE_AFTER_DAYS out of swipes into
+one left_swipe_archives row per swiper: a zlib'd bitmap over Agent.seq with
+bit n set if they swiped left on agent n. The feed and the duplicate check
+consult both stores, so archiving is invisible to clients. Right and super
+swipes stay in swipes, since matching reads them.
+
+    python -m services.swipe_archive --days 30
+"""
+import argparse
+import os
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import delete, insert, select, update
+
+from database import engine, sequence
+from database.models import Agent, LeftSwipeArchive, Swipe
+
+SWIPE_ARCHIVE_AFTER_DAYS = int(os.getenv("SWIPE_ARCHIVE_AFTER_DAYS", "30"))
+# swipes per transaction; each batch's swipers are one IN list, so keep it
+# under SQLite's 32766 bound parameters
+SWIPE_ARCHIVE_BATCH = int(os.getenv("SWIPE_ARCHIVE_BATCH", "20000"))
+
+
+class SeqBitmap:
+    """A set of agent seqs - bit n is bit n % 8 of byte n // 8"""
+
+    __slots__ = ("bits",)
+
+    def __init__(self, bits: Optional[bytearray] = None):
+        self.bits = bits if bits is not None else bytearray()
+
+    def add(self, seq: int):
+        byte = seq >> 3
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(byte + 1 - len(self.bits)))
+        self.bits[byte] |= 1 << (seq & 7)
+
+    def __contains__(self, seq: Optional[int]) -> bool:
+        if seq is None:
+            return False
+        byte = seq >> 3
+        return byte < len(self.bits) and bool(self.bits[byte] >> (seq & 7) & 1)
+
+    def __len__(self) -> int:
+        return int.from_bytes(self.bits, "little").bit_count()
+
+    def encode(self) -> bytes:
+        # mostly zero bytes, so this is a few bytes per swipe however many agents there are
+        return zlib.compress(bytes(self.bits))
+
+    @classmethod
+    def decode(cls, blob: bytes) -> "SeqBitmap":
+        return cls(bytearray(zlib.decompress(blob)))
+
+
+def load(db, agent_id: str) -> Optional[SeqBitmap]:
+    """Agents (by seq) that agent_id swiped left on before the last compaction"""
+    blob = db.query(LeftSwipeArchive.bitmap).filter(LeftSwipeArchive.agent_id == agent_id).scalar()
+    return SeqBitmap.decode(blob) if blob is not None else None
+
+
+def archived(db, agent_id: str, target_seq: Optional[int]) -> bool:
+    """Whether agent_id's archived left swipes include the agent with target_seq"""
+    if target_seq is None:
+        return False
+    bitmap = load(db, agent_id)
+    return bitmap is not None and target_seq in bitmap
+
+
+def compact(before: datetime, batch_size: int = SWIPE_ARCHIVE_BATCH, bind=engine) -> Dict[str, int]:
+    """Fold left swipes created before `before` into the bitmaps and delete them
+
+    Each batch is one transaction, so a reader sees a swipe in exactly one
+    of the two stores. Safe to stop and re-run at any point.
+    """
+    totals = {"swipes": 0, "bitmaps": 0, "batches": 0}
+    archivable = [
+        Swipe.direction == "left",
+        Swipe.created_at < before,
+        Swipe.swiped_id.in_(select(Agent.id).where(Agent.seq.isnot(None))),
+    ]
+    last_id = 0
+    while True:
+        with bind.begin() as conn:
+            if not sequence.supported(conn):
+                return totals
+            rows = conn.execute(
+                select(Swipe.id, Swipe.swiper_id, Agent.seq)
+                .join(Agent, Agent.id == Swipe.swiped_id)
+                .where(Swipe.id > last_id, *archivable)
+                .order_by(Swipe.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return totals
+            first_id, last_id = rows[0].id, rows[-1].id
+
+            by_swiper = defaultdict(list)
+            for row in rows:
+                by_swiper[row.swiper_id].append(row)
+            existing = {
+                row.agent_id: row for row in conn.execute(
+                    select(LeftSwipeArchive).where(LeftSwipeArchive.agent_id.in_(list(by_swiper)))
+                )
+            }
+
+            now = datetime.utcnow()
+            created = []
+            for swiper_id, swipes in by_swiper.items():
+                old = existing.get(swiper_id)
+                bitmap = SeqBitmap.decode(old.bitmap) if old else SeqBitmap()
+                for swipe in swipes:
+                    bitmap.add(swipe.seq)
+                values = {
+                    "bitmap": bitmap.encode(),
+                    "swipe_count": (old.swipe_count if old else 0) + len(swipes),
+                    "archived_through": swipes[-1].id,
+                    "updated_at": now,
+                }
+                if old:
+                    conn.execute(update(LeftSwipeArchive)
+                                 .where(LeftSwipeArchive.agent_id == swiper_id).values(**values))
+                else:
+                    created.append({"agent_id": swiper_id, **values})
+            if created:
+                conn.execute(insert(LeftSwipeArchive), created)
+
+            # the same predicate over the same id range - exactly the rows read above
+            conn.execute(delete(Swipe).where(Swipe.id.between(first_id, last_id), *archivable))
+
+        totals["swipes"] += len(rows)
+        totals["bitmaps"] += len(by_swiper)
+        totals["batches"] += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive old left swipes into per-agent bitmaps")
+    parser.add_argument("--days", type=float, default=SWIPE_ARCHIVE_AFTER_DAYS,
+                        help="archive left swipes older than this")
+    parser.add_argument("--batch-size", type=int, default=SWIPE_ARCHIVE_BATCH)
+    args = parser.parse_args(argv)
+    totals = compact(datetime.utcnow() - timedelta(days=args.days), args.batch_size)
+    print(f"🦞 Archived {totals['swipes']} left swipes "
+          f"({totals['bitmaps']} bitmap writes in {totals['batches']} batches)", flush=True)
+    return totals
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Per-request timing phases
+
+The current request's RequestTimings lives in a context variable, so code
+anywhere under a request - handlers in the threadpool included, since they
+run in a copy of the request's context - can attribute time to a phase
+without passing anything around. Outside a request every call is a no-op.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+
+class RequestTimings:
+    """Accumulated seconds per phase plus SQL statement count for one request"""
+
+    __slots__ = ("started", "phases", "sql_count")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.sql_count = 0
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def timed(phase: str):
+    """Attribute the wrapped block's wall time to `phase`"""
+    timings = current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - start)
+
+
+def mark_since_start(phase: str):
+    """Record the time from request start to now as `phase` (first call wins)"""
+    timings = current.get()
+    if timings is not None and phase not in timings.phases:
+        timings.phases[phase] = timings.elapsed()
@@ -0,0 +1,238 @@
+"""Tweet fetching for claim verification - pooled, cached, rate limited"""
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+# X Scraper API for tweet verification
+X_SCRAPE_API = os.getenv("X_SCRAPE_API", "")
+
+# outbound limits
+X_SCRAPE_CONCURRENCY = int(os.getenv("X_SCRAPE_CONCURRENCY", "8"))
+X_SCRAPE_MAX_CONNECTIONS = int(os.getenv("X_SCRAPE_MAX_CONNECTIONS", "16"))
+X_SCRAPE_TIMEOUT = float(os.getenv("X_SCRAPE_TIMEOUT", "10"))
+X_SCRAPE_CONNECT_TIMEOUT = float(os.getenv("X_SCRAPE_CONNECT_TIMEOUT", "3"))
+# per-host read timeouts, e.g. "scraper.internal:8080=5,backup.example.com=2"
+X_SCRAPE_HOST_TIMEOUTS = {
+    host.strip(): float(seconds)
+    for host, _, seconds in (
+        item.partition("=") for item in os.getenv("X_SCRAPE_HOST_TIMEOUTS", "").split(",") if "=" in item
+    )
+}
+
+# tweet text cache
+TWEET_CACHE_TTL = float(os.getenv("TWEET_CACHE_TTL", "120"))
+TWEET_CACHE_SIZE = int(os.getenv("TWEET_CACHE_SIZE", "1024"))
+
+# circuit breaker
+BREAKER_FAILURES = int(os.getenv("X_SCRAPE_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN = float(os.getenv("X_SCRAPE_BREAKER_COOLDOWN", "30"))
+
+
+class ScraperUnavailableError(Exception):
+    """The scraper couldn't answer (transport error, timeout, 5xx) - retry later"""
+
+
+class CircuitOpenError(ScraperUnavailableError):
+    """Host has failed too often recently - calls fail fast"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker for one host"""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN):
+        self.max_failures = failures
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        # half-open: let one call through after the cooldown
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.max_failures:
+            self.opened_at = time.monotonic()
+
+
+class TTLCache:
+    """Small LRU cache with per-entry expiry"""
+
+    def __init__(self, ttl: float = TWEET_CACHE_TTL, maxsize: int = TWEET_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._data.pop(key, None)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, value: str):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+
+class TweetClient:
+    """App-scoped client for the scraper API.
+
+    One pooled keep-alive ``httpx.AsyncClient`` is shared by all claims, a
+    semaphore caps concurrent outbound calls, tweet texts are cached briefly
+    by id and a per-host circuit breaker fails fast when the scraper is down.
+    """
+
+    def __init__(
+        self,
+        base_url: str = X_SCRAPE_API,
+        concurrency: int = X_SCRAPE_CONCURRENCY,
+        host_timeouts: Optional[Dict[str, float]] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.host_timeouts = X_SCRAPE_HOST_TIMEOUTS if host_timeouts is None else host_timeouts
+        self.cache = TTLCache()
+        self._client = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.base_url)
+
+    def _get_client(self):
+        if self._client is None:
+            import httpx  # only needed once a claim is verified
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=X_SCRAPE_MAX_CONNECTIONS,
+                    max_keepalive_connections=X_SCRAPE_MAX_CONNECTIONS,
+                ),
+                timeout=httpx.Timeout(X_SCRAPE_TIMEOUT, connect=X_SCRAPE_CONNECT_TIMEOUT),
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._client
+
+    def _timeout(self, host: str):
+        import httpx
+        read = self.host_timeouts.get(host, X_SCRAPE_TIMEOUT)
+        return httpx.Timeout(read, connect=min(X_SCRAPE_CONNECT_TIMEOUT, read))
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker()
+        return self._breakers[host]
+
+    async def fetch_text(self, tweet_id: str) -> Tuple[int, str]:
+        """Return (status_code, tweet text) - text is "" unless status is 200"""
+        cached = self.cache.get(tweet_id)
+        if cached is not None:
+            return 200, cached
+
+        url = f"{self.base_url}/tweet/{tweet_id}"
+        host = urlsplit(url).netloc
+        breaker = self.breaker(host)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Scraper {host} unavailable, retry later")
+
+        client = self._get_client()
+        async with self._semaphore:
+            try:
+                response = await client.get(url, timeout=self._timeout(host))
+            except Exception as e:
+                breaker.record_failure()
+                raise ScraperUnavailableError(f"Scraper {host} request failed: {e!r}") from e
+        if response.status_code >= 500:
+            breaker.record_failure()
+            raise ScraperUnavailableError(f"Scraper {host} returned {response.status_code}")
+        if response.status_code != 200:
+            breaker.record_success()
+            return response.status_code, ""
+
+        try:
+            data = response.json()
+            text = data.get("full_text", "") or data.get("text", "") or data.get("content", "")
+        except (ValueError, AttributeError) as e:
+            breaker.record_failure()
+            raise ScraperUnavailableError(f"Scraper {host} sent an unreadable response") from e
+        breaker.record_success()
+        self.cache.set(tweet_id, text)
+        return 200, text
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._semaphore = None
+
+
+tweet_client = TweetClient()
+
+
+def extract_tweet_id(tweet_url: str) -> Optional[str]:
+    """Extract tweet ID from URL"""
+    # Handle both twitter.com and x.com URLs
+    patterns = [
+        r'twitter\.com/\w+/status/(\d+)',
+        r'x\.com/\w+/status/(\d+)',
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, tweet_url)
+        if match:
+            return match.group(1)
+    return None
+
+
+async def verify_tweet_contains_code(tweet_url: str, verification_code: str) -> tuple[bool, str]:
+    """Verify that the tweet contains the verification code AND mentions @moltbotbnb
+
+    Raises ScraperUnavailableError when the scraper can't give an answer, so
+    the caller retries instead of deciding the claim on no evidence.
+    """
+    tweet_id = extract_tweet_id(tweet_url)
+    if not tweet_id:
+        return False, "Could not extract tweet ID from URL"
+    
+    # If no scraper API configured, skip verification (dev mode)
+    if not tweet_client.enabled:
+        return True, "Verification skipped (no scraper configured)"
+    
+    status_code, tweet_text = await tweet_client.fetch_text(tweet_id)
+    if status_code != 200:
+        return False, f"Could not fetch tweet (status {status_code})"
+    
+    tweet_text_lower = tweet_text.lower()
+    
+    # Check for verification code
+    if verification_code.lower() not in tweet_text_lower:
+        return False, f"Tweet does not contain verification code '{verification_code}'"
+    
+    # Check for @moltbotbnb mention
+    if "moltbotbnb" not in tweet_text_lower:
+        return False, "Tweet must mention @moltbotbnb"
+    
+    return True, "Verification successful!"
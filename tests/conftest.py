@@ -0,0 +1,31 @@
+import os
+import tempfile
+import uuid
+
+import pytest
+
+# a throwaway database, set before anything imports the engine
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='clawinder-test-')}/test.db")
+# tests drive one agent hard - per-agent token buckets would shed them
+os.environ.setdefault("ADMISSION_ENABLED", "0")
+
+
+@pytest.fixture(scope="session")
+def client():
+    """The app over ASGI, lifespan (schema, workers) included"""
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def register(client):
+    """Register an agent through the API (unique name) and return its profile"""
+    def register_agent(**fields) -> dict:
+        fields.setdefault("name", f"test-{uuid.uuid4().hex[:10]}")
+        response = client.post("/agents/register", json=fields)
+        assert response.status_code == 200, response.text
+        return response.json()["agent"]
+    return register_agent
@@ -0,0 +1,40 @@
+"""Attribute mirror tables - stored and queried values normalize alike"""
+import pytest
+
+from database import SessionLocal, attributes
+from database.db import init_db
+from database.models import Agent, AgentChain, AgentVibe
+
+
+@pytest.fixture(scope="module")
+def db():
+    init_db(force=True)
+    session = SessionLocal()
+    yield session
+    session.query(Agent).filter(Agent.id.like("attr-%")).delete(synchronize_session=False)
+    session.commit()
+    session.close()
+
+
+def matching(db, column: str, value: str):
+    return {a.id for a in db.query(Agent).filter(Agent.id.like("attr-%"), attributes.has(column, value))}
+
+
+def test_non_ascii_values_match_however_they_are_cased(db):
+    db.add(Agent(id="attr-1", name="Ünïcode", verification_code="attr-1",
+                 chains=["ÉTHER", "Base"], vibes=[" Ärger "]))
+    db.commit()
+
+    assert {r.value for r in db.query(AgentChain).filter_by(agent_id="attr-1")} == {"éther", "base"}
+    assert {r.value for r in db.query(AgentVibe).filter_by(agent_id="attr-1")} == {"ärger"}
+    assert matching(db, "chains", "éther") == {"attr-1"}
+    assert matching(db, "chains", " Éther ") == {"attr-1"}
+    assert matching(db, "vibes", "ÄRGER") == {"attr-1"}
+
+
+def test_updates_renormalize(db):
+    agent = db.get(Agent, "attr-1")
+    agent.chains = ["SOLANA", "ŁÓDŹ"]
+    db.commit()
+    assert matching(db, "chains", "łódź") == {"attr-1"}
+    assert matching(db, "chains", "éther") == set()
@@ -0,0 +1,79 @@
+"""Match cards - addressed by what they show, rendered once per address"""
+import asyncio
+import os
+
+import pytest
+
+from services.cards import CardStore, CardWorker, card_digest, card_store
+
+
+@pytest.fixture
+def cards(tmp_path, monkeypatch):
+    """The app's card store, writing under tmp_path"""
+    monkeypatch.setattr(card_store, "directory", str(tmp_path))
+    return card_store
+
+
+@pytest.fixture
+def match(client, register):
+    a, b = register(emoji="🦀")["id"], register()["id"]
+    client.post(f"/discovery/{a}/swipe/{b}", json={"direction": "right"})
+    return a, client.post(f"/discovery/{b}/swipe/{a}", json={"direction": "right"}).json()["match_id"]
+
+
+def image_url(client, match_id: int) -> str:
+    response = client.get(f"/stats/match-card/{match_id}")
+    assert response.status_code == 200, response.text
+    return response.json()["image_url"]
+
+
+def inputs(name: str = "Clawdia") -> dict:
+    return {"v": 1, "a": [name, "🦞"], "b": ["Pinchy", "🦀"], "type": "rivalry", "score": 87.5,
+            "reasons": ["Both on Base", "Rival traders"]}
+
+
+def test_same_inputs_same_file(tmp_path):
+    store = CardStore(str(tmp_path))
+    shuffled = dict(reversed(list(inputs().items())))
+    assert card_digest(shuffled) == card_digest(inputs())
+
+    filename = store.ensure(inputs())
+    assert store.ensure(shuffled) == filename
+    assert store.rendered == 1
+    assert set(store.variants(filename)) == {"identity", "gzip"}
+    assert store.ensure(inputs("Clawdia II")) != filename
+    assert store.rendered == 2
+
+
+def test_rename_gets_a_new_card(client, cards, match):
+    agent_id, match_id = match
+    first = image_url(client, match_id)
+    assert image_url(client, match_id) == first
+    rendered = cards.rendered
+
+    # not on the card - same address, nothing rendered
+    assert client.patch(f"/agents/{agent_id}", json={"bio": "new bio"}).status_code == 200
+    assert image_url(client, match_id) == first
+    assert cards.rendered == rendered
+
+    assert client.patch(f"/agents/{agent_id}", json={"name": f"renamed-{match_id}"}).status_code == 200
+    renamed = image_url(client, match_id)
+    assert renamed != first
+    assert cards.rendered == rendered + 1
+    # the old address keeps serving what it always did
+    for url in (first, renamed):
+        assert os.path.exists(os.path.join(cards.directory, url.rsplit("/", 1)[1]))
+        assert client.get(url).status_code == 200
+
+
+def test_stopped_worker_drops_renders():
+    worker = CardWorker()
+
+    async def run():
+        worker.start()
+        await worker.stop()
+
+    asyncio.run(run())
+    assert worker._loop is None and worker._queue is None
+    # the loop it ran on is closed - this must not try to schedule onto it
+    worker.enqueue(1)
@@ -0,0 +1,73 @@
+"""Claim jobs - one pending job per agent, even when requests race"""
+import uuid
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from database import SessionLocal
+from database.models import Agent, ClaimJob
+from services import claims
+
+TWEET = "https://x.com/someone/status/1"
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def pending_job(agent_id: str) -> ClaimJob:
+    return ClaimJob(id=str(uuid.uuid4()), agent_id=agent_id, tweet_url=TWEET, status=claims.QUEUED)
+
+
+def pending(db, agent_id: str) -> list:
+    return db.query(ClaimJob).filter(
+        ClaimJob.agent_id == agent_id, ClaimJob.status.in_([claims.QUEUED, claims.RUNNING])
+    ).all()
+
+
+def test_one_pending_job_per_agent(register, db):
+    agent_id = register()["id"]
+    db.add(pending_job(agent_id))
+    db.commit()
+
+    db.add(pending_job(agent_id))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
+    # finished jobs don't count
+    db.query(ClaimJob).filter(ClaimJob.agent_id == agent_id).update({ClaimJob.status: claims.FAILED})
+    db.commit()
+    db.add(pending_job(agent_id))
+    db.commit()
+    assert len(pending(db, agent_id)) == 1
+
+
+def test_enqueue_returns_the_job_that_won_the_race(register, db):
+    agent = db.get(Agent, register()["id"])
+    winner = []
+
+    def race(state):
+        # the lookup finds nothing, then another request queues a job
+        if state.is_select and not winner:
+            result = state.invoke_statement()
+            other = SessionLocal()
+            winner.append(pending_job(agent.id))
+            other.add(winner[0])
+            other.commit()
+            winner[0] = winner[0].id
+            other.close()
+            return result
+
+    event.listen(db, "do_orm_execute", race)
+    try:
+        job = claims.enqueue_claim(db, agent, TWEET)
+    finally:
+        event.remove(db, "do_orm_execute", race)
+
+    assert job.id == winner[0]
+    assert [j.id for j in pending(db, agent.id)] == [winner[0]]
@@ -0,0 +1,122 @@
+"""Conversation summaries - the inbox agrees with the messages table"""
+import pytest
+
+from database import SessionLocal, engine
+from database.models import ConversationSummary, Match, Message
+from services import inbox
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def pair(client, register):
+    """Two agents matched through the swipe API, and their match id"""
+    a, b = register()["id"], register()["id"]
+    assert not client.post(f"/discovery/{a}/swipe/{b}", json={"direction": "right"}).json()["match"]
+    swipe = client.post(f"/discovery/{b}/swipe/{a}", json={"direction": "right"}).json()
+    assert swipe["match"]
+    return a, b, swipe["match_id"]
+
+
+def send(client, sender: str, match_id: int, content: str) -> dict:
+    response = client.post(f"/matches/{sender}/match/{match_id}/message", json={"content": content})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def inbox_entry(client, agent_id: str, match_id: int) -> dict:
+    entries = [m for m in client.get(f"/matches/{agent_id}").json() if m["id"] == match_id]
+    assert len(entries) == 1
+    return entries[0]
+
+
+def assert_matches_messages(client, db, agent_id: str, match_id: int):
+    """message_count and last_message as the messages table has them"""
+    messages = db.query(Message).filter(Message.match_id == match_id).order_by(Message.id).all()
+    entry = inbox_entry(client, agent_id, match_id)
+    assert entry["message_count"] == len(messages)
+    last = messages[-1]
+    assert entry["last_message"]["id"] == last.id
+    assert entry["last_message"]["sender_id"] == last.sender_id
+    assert entry["last_message"]["preview"] == inbox.preview(last.content)
+
+
+def test_messages_from_both_sides(client, db, pair):
+    a, b, match_id = pair
+    assert inbox_entry(client, a, match_id)["last_message"] is None
+
+    send(client, a, match_id, "gm")
+    send(client, a, match_id, "x" * 250)
+    assert inbox_entry(client, a, match_id)["unread_count"] == 0
+    assert inbox_entry(client, b, match_id)["unread_count"] == 2
+    for agent_id in (a, b):
+        assert_matches_messages(client, db, agent_id, match_id)
+    assert inbox_entry(client, b, match_id)["last_message"]["preview"] == "x" * 99 + "…"
+
+    send(client, b, match_id, "gm back")
+    # replying counts as having read everything before it
+    assert inbox_entry(client, b, match_id)["unread_count"] == 0
+    assert inbox_entry(client, a, match_id)["unread_count"] == 1
+    for agent_id in (a, b):
+        assert_matches_messages(client, db, agent_id, match_id)
+
+
+def test_reading_the_newest_page_clears_unread(client, pair):
+    a, b, match_id = pair
+    for i in range(3):
+        send(client, a, match_id, f"ping {i}")
+    assert inbox_entry(client, b, match_id)["unread_count"] == 3
+
+    page = client.get(f"/matches/{b}/match/{match_id}/messages", params={"limit": 2})
+    assert [m["content"] for m in page.json()] == ["ping 1", "ping 2"]
+    assert inbox_entry(client, b, match_id)["unread_count"] == 0
+    # the sender's side is untouched
+    assert inbox_entry(client, a, match_id)["unread_count"] == 0
+
+    send(client, a, match_id, "ping 3")
+    assert inbox_entry(client, b, match_id)["unread_count"] == 1
+
+
+def unsummarized_match(db, a: str, b: str) -> int:
+    """A match as it existed before summaries: no conversation_summaries rows"""
+    match = Match(agent_a_id=a, agent_b_id=b, compatibility_score=50.0, compatibility_reasons=[])
+    db.add(match)
+    db.commit()
+    return match.id
+
+
+def test_backfill_opens_rows_for_old_matches(client, register, db):
+    a, b = register()["id"], register()["id"]
+    match_id = unsummarized_match(db, a, b)
+    db.add_all([Message(match_id=match_id, sender_id=a, content="old news"),
+                Message(match_id=match_id, sender_id=b, content="older reply")])
+    db.commit()
+
+    with engine.begin() as conn:
+        assert inbox.backfill(conn) == 2
+        # already covered - a re-run opens nothing
+        assert inbox.backfill(conn) == 0
+    for agent_id in (a, b):
+        assert_matches_messages(client, db, agent_id, match_id)
+        # history from before summaries counts as read
+        assert inbox_entry(client, agent_id, match_id)["unread_count"] == 0
+
+
+def test_first_message_opens_rows_for_old_matches(client, register, db):
+    a, b = register()["id"], register()["id"]
+    match_id = unsummarized_match(db, a, b)
+    db.add(Message(match_id=match_id, sender_id=a, content="from before the inbox"))
+    db.commit()
+
+    send(client, b, match_id, "anyone there?")
+    assert db.query(ConversationSummary).filter(ConversationSummary.match_id == match_id).count() == 2
+    # the history counts as read, the new message doesn't
+    assert inbox_entry(client, a, match_id)["unread_count"] == 1
+    assert inbox_entry(client, b, match_id)["unread_count"] == 0
+    for agent_id in (a, b):
+        assert_matches_messages(client, db, agent_id, match_id)
@@ -0,0 +1,123 @@
+"""Metric cells - totals survive the threads and worker processes that recorded them"""
+import os
+import subprocess
+import sys
+import threading
+
+from api import metrics
+from api.metrics import Counter, Histogram
+
+
+def run_threads(fn, n=8):
+    threads = [threading.Thread(target=fn) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_exited_threads_are_folded_into_the_base():
+    counter = Counter("test_total", "test", ("route",))
+    histogram = Histogram("test_seconds", "test", buckets=(0.1, 1.0))
+
+    def record():
+        counter.inc("/a")
+        counter.inc("/b", amount=2)
+        histogram.observe(0.05)
+        histogram.observe(5.0)
+
+    for _ in range(3):
+        run_threads(record)
+        counter.collect()  # a scrape between waves folds the dead shards
+
+    assert counter.collect() == {("/a",): 24, ("/b",): 48}
+    # only the base shard is left once every recording thread has exited
+    assert len(counter._cells.shards()) == 1
+    assert len(histogram._cells.shards()) == 1
+    rendered = histogram.render()
+    assert 'test_seconds_bucket{le="0.1"} 24' in rendered
+    assert 'test_seconds_bucket{le="+Inf"} 48' in rendered
+    assert "test_seconds_count 48" in rendered
+
+
+def test_live_threads_keep_their_own_shard():
+    counter = Counter("test_live_total", "test")
+    recorded, release = threading.Event(), threading.Event()
+
+    def record():
+        counter.inc()
+        recorded.set()
+        release.wait()
+
+    thread = threading.Thread(target=record)
+    thread.start()
+    recorded.wait()
+    assert counter.collect() == {(): 1}
+    assert len(counter._cells.shards()) == 2
+    release.set()
+    thread.join()
+    assert counter.collect() == {(): 1}
+    assert len(counter._cells.shards()) == 1
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+import sys
+from api import metrics
+n = int(sys.argv[1])
+metrics.swipes.inc("left", amount=n)
+metrics.http_latency.observe(0.003 * n, "GET", "/stats/")
+metrics.flush()
+print("ready", flush=True)
+sys.stdin.read()  # stay alive until the test closes stdin
+"""
+
+
+def start_worker(directory: str, n: int) -> subprocess.Popen:
+    env = dict(os.environ, METRICS_MULTIPROC_DIR=directory)
+    worker = subprocess.Popen([sys.executable, "-c", WORKER, str(n)], cwd=ROOT, env=env,
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    assert worker.stdout.readline().strip() == "ready"
+    return worker
+
+
+def stop(worker: subprocess.Popen):
+    worker.stdin.close()
+    assert worker.wait(timeout=30) == 0
+
+
+def sample(text: str, series: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(series + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_two_workers_are_summed(tmp_path):
+    directory = str(tmp_path)
+    local = metrics.swipes.collect().get(("left",), 0)
+    first, second = start_worker(directory, 2), start_worker(directory, 5)
+
+    text = metrics.render(directory)
+    assert sample(text, 'clawble_swipes_total{direction="left"}') == local + 7
+    assert sample(text, 'clawble_http_request_duration_seconds_count{method="GET",route="/stats/"}') >= 2
+    # gauges stay per worker
+    assert f'clawble_in_flight_requests{{pid="{first.pid}"}}' in text
+    assert f'clawble_in_flight_requests{{pid="{second.pid}"}}' in text
+
+    # a recycled worker's counts survive it; its gauges don't
+    stop(first)
+    text = metrics.render(directory)
+    assert sample(text, 'clawble_swipes_total{direction="left"}') == local + 7
+    assert f'pid="{first.pid}"' not in text
+    assert "base.json" in os.listdir(directory)
+
+    stop(second)
+    assert sample(metrics.render(directory), 'clawble_swipes_total{direction="left"}') == local + 7
+    own = f"{os.getpid()}-"
+    assert [n for n in os.listdir(directory) if n.endswith(".json") and n != "base.json" and not n.startswith(own)] == []
+
+
+def test_single_process_render_has_no_pid_labels():
+    assert 'pid="' not in metrics.render("")
@@ -0,0 +1,133 @@
+"""Keyset pagination - cursors, limits, and crawls over tied sort keys"""
+import base64
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+
+from api.pagination import MAX_PAGE_SIZE, clamp_limit, encode_cursor, keyset_page
+from database import SessionLocal
+from database.models import Agent
+
+# every agent in a batch shares this created_at, so only the id breaks ties
+TIED = datetime(2001, 1, 1, 12, 0, 0)
+KEYS = (Agent.created_at, Agent.id)
+
+
+@pytest.fixture
+def db(client):
+    """A session on the app's database (the client's lifespan creates the schema)"""
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def tied_agents(db):
+    """MAX_PAGE_SIZE + 5 agents with one created_at; returns their id prefix"""
+    prefix = f"page-{uuid.uuid4().hex[:6]}-"
+    db.add_all(Agent(id=f"{prefix}{i:03d}", name=f"{prefix}{i}", verification_code=f"{prefix}{i}", created_at=TIED)
+               for i in range(MAX_PAGE_SIZE + 5))
+    db.commit()
+    return prefix
+
+
+def crawl(query, limit: int, descending: bool = False) -> list:
+    ids, cursor = [], None
+    while True:
+        rows, cursor = keyset_page(query, KEYS, limit, cursor, descending=descending)
+        ids.extend(row.id for row in rows)
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_crawl_over_tied_timestamps(db, tied_agents, descending):
+    query = db.query(Agent).filter(Agent.id.like(f"{tied_agents}%"))
+    expected = sorted(a.id for a in query)
+    ids = crawl(query, 7, descending)
+    assert ids == (expected[::-1] if descending else expected)
+
+
+def test_rows_added_mid_crawl_are_not_repeated(db, tied_agents):
+    query = db.query(Agent).filter(Agent.id.like(f"{tied_agents}%"))
+    first, cursor = keyset_page(query, KEYS, 10)
+    # sorts before the cursor - must not show up; after it - must
+    for suffix in ("000a", "999"):
+        db.add(Agent(id=f"{tied_agents}{suffix}", name=f"{tied_agents}{suffix}",
+                     verification_code=f"{tied_agents}{suffix}", created_at=TIED))
+    db.commit()
+
+    ids = [row.id for row in first]
+    while cursor:
+        rows, cursor = keyset_page(query, KEYS, 10, cursor)
+        ids.extend(row.id for row in rows)
+    assert len(ids) == len(set(ids))
+    assert f"{tied_agents}999" in ids
+    assert f"{tied_agents}000a" not in ids
+
+
+def test_limit_is_clamped(db, tied_agents):
+    assert clamp_limit(0) == clamp_limit(-3) == 1
+    assert clamp_limit(10 ** 6) == MAX_PAGE_SIZE
+
+    query = db.query(Agent).filter(Agent.id.like(f"{tied_agents}%"))
+    rows, cursor = keyset_page(query, KEYS, 10 ** 6)
+    assert len(rows) == MAX_PAGE_SIZE and cursor
+    rows, cursor = keyset_page(query, KEYS, 10 ** 6, cursor)
+    assert len(rows) == 5 and cursor is None
+    assert len(keyset_page(query, KEYS, 0)[0]) == 1
+
+
+def test_list_follows_next_cursor(client, tied_agents):
+    assert len(client.get("/agents/", params={"limit": 0}).json()) == 1
+
+    ids, params = [], {"limit": 1000}
+    while True:
+        response = client.get("/agents/", params=params)
+        assert response.status_code == 200
+        assert len(response.json()) <= MAX_PAGE_SIZE
+        ids.extend(agent["id"] for agent in response.json())
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert len(ids) == len(set(ids))
+    assert sum(agent_id.startswith(tied_agents) for agent_id in ids) == MAX_PAGE_SIZE + 5
+
+
+def b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    b64(b"{not json"),
+    b64(json.dumps({"created_at": "2001-01-01"}).encode()),
+    encode_cursor(["2001-01-01T12:00:00"]),
+    encode_cursor(["2001-01-01T12:00:00", "a", "b"]),
+    encode_cursor(["yesterday", "a"]),
+])
+def test_bad_cursors_are_a_400(client, cursor):
+    response = client.get("/agents/", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_message_pages_go_back_in_time(client, register):
+    a, b = register()["id"], register()["id"]
+    client.post(f"/discovery/{a}/swipe/{b}", json={"direction": "right"})
+    match_id = client.post(f"/discovery/{b}/swipe/{a}", json={"direction": "right"}).json()["match_id"]
+    for i in range(5):
+        client.post(f"/matches/{a}/match/{match_id}/message", json={"content": f"m{i}"})
+
+    pages, params = [], {"limit": 2}
+    while True:
+        response = client.get(f"/matches/{b}/match/{match_id}/messages", params=params)
+        assert response.status_code == 200
+        pages.append([m["content"] for m in response.json()])
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    # newest page first, each page oldest-first
+    assert pages == [["m3", "m4"], ["m1", "m2"], ["m0"]]
@@ -0,0 +1,104 @@
+"""Full-text search - the FTS index follows every write path, keyed on Agent.seq"""
+import uuid
+
+import pytest
+from sqlalchemy import func, text
+
+from database import SessionLocal, fts, generate
+from database.models import Agent
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def word() -> str:
+    """A token no other test's agents contain (letters only, so it stays one token)"""
+    return "zq" + "".join(chr(ord("a") + int(c, 16)) for c in uuid.uuid4().hex[:10])
+
+
+def search(client, q: str, **params) -> list:
+    response = client.get("/agents/search", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return [row["id"] for row in response.json()]
+
+
+def index_rowids(db, expr: str) -> list:
+    return [row[0] for row in db.execute(
+        text(f"SELECT rowid FROM {fts.FTS_TABLE} WHERE {fts.FTS_TABLE} MATCH :q"), {"q": expr}
+    )]
+
+
+def test_insert_is_indexed_under_seq(client, register, db):
+    # an agent numbered out of line, so the index's own next rowid isn't the next seq
+    top = db.query(func.max(Agent.seq)).scalar() or 0
+    db.add(Agent(id=f"fts-{uuid.uuid4().hex[:8]}", name=word(), verification_code=word(), seq=top + 10 ** 6))
+    db.commit()
+    token = word()
+    agent_id = register(name=f"{token} Agent", skills=["rust"])["id"]
+
+    # new.seq is NULL when the insert trigger fires - the row must still land on seq
+    seq = db.query(Agent.seq).filter(Agent.id == agent_id).scalar()
+    assert seq is not None
+    assert index_rowids(db, token) == [seq]
+    assert search(client, token) == [agent_id]
+
+
+def test_update_reindexes_changed_columns(client, register):
+    before, after = word(), word()
+    agent_id = register(bio=f"all about {before}")["id"]
+    assert search(client, before) == [agent_id]
+
+    response = client.patch(f"/agents/{agent_id}", json={"bio": f"all about {after}"})
+    assert response.status_code == 200, response.text
+    assert search(client, before) == []
+    assert search(client, after) == [agent_id]
+
+
+def test_name_hits_outrank_bio_hits(client, register):
+    token = word()
+    in_bio = register(bio=f"I once met {token}")["id"]
+    in_tagline = register(tagline=f"{token} fan")["id"]
+    in_name = register(name=f"{token} Herself")["id"]
+
+    assert search(client, token) == [in_name, in_tagline, in_bio]
+    scores = [row["score"] for row in client.get("/agents/search", params={"q": token}).json()]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_autocomplete_prefix(client, register):
+    stem = word()
+    longer = register(name=f"{stem}ington Labs")["id"]
+    exact = register(name=stem.capitalize())["id"]
+    inside = register(name=f"Labs {stem}er")["id"]
+    register(bio=f"{stem} is only in my bio")
+
+    response = client.get("/agents/search/autocomplete", params={"q": stem[:6]})
+    assert response.status_code == 200
+    # names starting with the typed text first, shortest first; bios never
+    assert [row["id"] for row in response.json()] == [exact, longer, inside]
+    assert search(client, stem[:6]) != []
+
+
+def test_rebuild_after_generate(client, register, db):
+    token = word()
+    existing = register(name=f"{token} Veteran")["id"]
+    prefix = f"fts{uuid.uuid4().hex[:6]}"
+    generate.main(["--agents", "30", "--prefix", prefix, "--swipes-per-agent", "2", "--messages-per-match", "1"])
+
+    # bulk-loaded agents were indexed by the rebuild, with their assigned seq
+    generated = db.query(Agent).filter(Agent.id.like(f"{prefix}%")).order_by(Agent.seq).first()
+    assert generated.seq is not None
+    assert generated.id in search(client, generated.name, limit=100)
+    assert index_rowids(db, f'name:"{generated.name}"').count(generated.seq) == 1
+    # what was indexed before is still there once
+    assert search(client, token) == [existing]
+
+    # and the triggers are back for later writes
+    late = word()
+    assert search(client, late) == []
+    fresh = register(name=f"{late} Newcomer")["id"]
+    assert search(client, late) == [fresh]
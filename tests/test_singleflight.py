@@ -0,0 +1,178 @@
+"""Single-flight coalescing - N concurrent callers, one computation"""
+import asyncio
+import threading
+import time
+
+import pytest
+from sqlalchemy import event
+
+from database import SessionLocal, engine
+from database.db import init_db
+from services.singleflight import SingleFlightTimeout, single_flight
+
+CALLERS = 16
+
+
+@pytest.fixture(scope="module")
+def db_ready():
+    init_db(force=True)
+
+
+@pytest.fixture
+def statements():
+    """SQL statements run while the test is active (slowed so callers overlap)"""
+    seen = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+        time.sleep(0.02)
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield seen
+    event.remove(engine, "before_cursor_execute", count)
+
+
+def in_threads(fn, n=CALLERS):
+    """Run fn in n threads released together; (results, errors)"""
+    barrier = threading.Barrier(n)
+    results, errors = [], []
+
+    def call():
+        barrier.wait()
+        try:
+            results.append(fn())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def with_session(fn):
+    def call():
+        db = SessionLocal()
+        try:
+            return fn(db)
+        finally:
+            db.close()
+    return call
+
+
+def test_concurrent_stats_run_the_queries_once(db_ready, statements):
+    from api.routes.stats import platform_counts
+
+    platform_counts.group.clear()
+    with_session(platform_counts)()
+    solo = len(statements)
+    assert solo > 0
+
+    platform_counts.group.clear()
+    statements.clear()
+    results, errors = in_threads(with_session(platform_counts))
+    assert not errors
+    assert len(results) == CALLERS and all(r == results[0] for r in results)
+    assert len(statements) == solo
+
+
+def test_errors_reach_every_waiter():
+    calls = []
+
+    @single_flight()
+    def broken(x):
+        calls.append(x)
+        time.sleep(0.1)
+        raise ValueError("boom")
+
+    results, errors = in_threads(lambda: broken(1))
+    assert not results
+    assert len(errors) == CALLERS and all(isinstance(e, ValueError) for e in errors)
+    assert len(calls) == 1
+    # failures aren't remembered - the next call runs again
+    with pytest.raises(ValueError):
+        broken(1)
+    assert len(calls) == 2
+
+
+def test_async_callers_share_one_call():
+    calls = []
+
+    @single_flight()
+    async def slow(x):
+        calls.append(x)
+        await asyncio.sleep(0.05)
+        return x * 2
+
+    async def scenario():
+        return await asyncio.gather(*(slow(21) for _ in range(CALLERS)), slow(1))
+
+    results = asyncio.run(scenario())
+    assert results == [42] * CALLERS + [2]
+    assert sorted(calls) == [1, 21]
+    assert slow.group.snapshot()["followers"] == CALLERS - 1
+
+
+def test_async_errors_reach_every_waiter():
+    calls = []
+
+    @single_flight()
+    async def broken():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise RuntimeError("scraper down")
+
+    async def scenario():
+        return await asyncio.gather(*(broken() for _ in range(CALLERS)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_arguments_are_keyed_as_passed():
+    calls = []
+
+    @single_flight(ttl=60)
+    def echo(x):
+        calls.append(x)
+        return x
+
+    assert [echo("x"), echo(" x"), echo("x")] == ["x", " x", "x"]
+    assert calls == ["x", " x"]
+
+
+def test_followers_stop_waiting_on_a_slow_leader():
+    release = threading.Event()
+
+    @single_flight(wait=0.05)
+    def slow():
+        release.wait()
+        return "done"
+
+    leader = threading.Thread(target=slow)
+    leader.start()
+    while not slow.group.snapshot()["in_flight"]:
+        time.sleep(0.001)
+    with pytest.raises(SingleFlightTimeout):
+        slow()
+    release.set()
+    leader.join()
+    assert slow.group.snapshot()["timeouts"] == 1
+    assert slow() == "done"
+
+
+def test_async_followers_stop_waiting_on_a_slow_leader():
+    @single_flight(wait=0.05)
+    async def slow():
+        await asyncio.sleep(0.2)
+        return "done"
+
+    async def scenario():
+        return await asyncio.gather(slow(), slow(), return_exceptions=True)
+
+    leader, follower = asyncio.run(scenario())
+    assert leader == "done"
+    assert isinstance(follower, SingleFlightTimeout)
@@ -0,0 +1,21 @@
+"""Cold start - importing the app stays lazy and the first request stays in budget"""
+import os
+
+from benchmarks import bench_startup
+
+# generous by default so slow CI machines pass; tighten per environment
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "5000"))
+
+# only needed once a claim, bulk build or the app lifespan asks for them
+LAZY_MODULES = ["httpx", "brotli", "services.claims", "services.tweets"]
+
+
+def test_importing_main_loads_no_lazy_modules(tmp_path):
+    check = f"import sys, main; print([m for m in {LAZY_MODULES!r} if m in sys.modules])"
+    loaded = bench_startup.run(["-c", check], str(tmp_path / "import.db")).stdout.splitlines()[-1]
+    assert loaded == "[]"
+
+
+def test_first_request_within_budget():
+    result = bench_startup.measure(runs=3, top=5)
+    assert result["first_request_ms_median"] <= STARTUP_BUDGET_MS, result
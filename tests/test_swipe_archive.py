@@ -0,0 +1,115 @@
+"""Left-swipe compaction - bitmaps, batching, and the reads that consult them"""
+import uuid
+from datetime import datetime
+
+import pytest
+
+from database import SessionLocal
+from database.models import Agent, LeftSwipeArchive, Swipe
+from services import swipe_archive
+from services.swipe_archive import SeqBitmap
+
+# archived swipes are dated here and compacted with a cutoff just after, so
+# swipes written by other tests (dated now) are never touched
+OLD = datetime(2000, 1, 1)
+CUTOFF = datetime(2000, 1, 2)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def add_swipes(db, swiper_id: str, targets, direction: str = "left"):
+    db.add_all(Swipe(swiper_id=swiper_id, swiped_id=t, direction=direction, created_at=OLD) for t in targets)
+    db.commit()
+
+
+def seq_of(db, agent_id: str) -> int:
+    return db.query(Agent.seq).filter(Agent.id == agent_id).scalar()
+
+
+def remaining(db, swiper_id: str, direction: str) -> int:
+    return db.query(Swipe).filter(Swipe.swiper_id == swiper_id, Swipe.direction == direction).count()
+
+
+def test_bitmap_round_trip():
+    bitmap = SeqBitmap()
+    for seq in (0, 7, 8, 9):
+        bitmap.add(seq)
+    assert len(bitmap.bits) == 2
+    # past the current length - the bitmap grows
+    bitmap.add(100000)
+
+    decoded = SeqBitmap.decode(bitmap.encode())
+    assert len(decoded) == 5
+    assert all(seq in decoded for seq in (0, 7, 8, 9, 100000))
+    assert not any(seq in decoded for seq in (1, 10, 99999, 100001, 10 ** 9, None))
+    assert decoded.bits == bitmap.bits
+
+
+def test_compact_in_batches_and_rerun(register, db):
+    swipers = [register()["id"] for _ in range(2)]
+    targets = [register()["id"] for _ in range(5)]
+    add_swipes(db, swipers[0], targets)
+    add_swipes(db, swipers[1], targets[:3])
+
+    totals = swipe_archive.compact(CUTOFF, batch_size=3)
+    assert totals["swipes"] == 8
+    assert totals["batches"] == 3
+    assert remaining(db, swipers[0], "left") == remaining(db, swipers[1], "left") == 0
+
+    for swiper_id, expected in ((swipers[0], targets), (swipers[1], targets[:3])):
+        row = db.get(LeftSwipeArchive, swiper_id)
+        assert row.swipe_count == len(expected)
+        bitmap = SeqBitmap.decode(row.bitmap)
+        assert len(bitmap) == len(expected)
+        assert all(seq_of(db, t) in bitmap for t in expected)
+
+    # nothing left to do, and nothing lost by doing it again
+    assert swipe_archive.compact(CUTOFF, batch_size=3)["swipes"] == 0
+    db.expire_all()
+    assert db.get(LeftSwipeArchive, swipers[0]).swipe_count == 5
+
+    # a later run folds new swipes into the existing bitmap
+    late = register()["id"]
+    add_swipes(db, swipers[1], [late])
+    assert swipe_archive.compact(CUTOFF, batch_size=3)["swipes"] == 1
+    db.expire_all()
+    row = db.get(LeftSwipeArchive, swipers[1])
+    assert row.swipe_count == 4
+    assert all(seq_of(db, t) in SeqBitmap.decode(row.bitmap) for t in targets[:3] + [late])
+
+
+def test_right_and_super_swipes_stay(register, db):
+    swiper = register()["id"]
+    targets = [register()["id"] for _ in range(3)]
+    add_swipes(db, swiper, targets[:1], "right")
+    add_swipes(db, swiper, targets[1:2], "super")
+    add_swipes(db, swiper, targets[2:], "left")
+
+    swipe_archive.compact(CUTOFF)
+    assert remaining(db, swiper, "right") == 1
+    assert remaining(db, swiper, "super") == 1
+    assert remaining(db, swiper, "left") == 0
+    assert db.get(LeftSwipeArchive, swiper).swipe_count == 1
+
+
+def test_archived_swipes_still_hide_and_block(client, register, db):
+    chain = f"archive-{uuid.uuid4().hex[:8]}"
+    swiper = register(chains=[chain])["id"]
+    archived, fresh = register(chains=[chain])["id"], register(chains=[chain])["id"]
+    add_swipes(db, swiper, [archived])
+    swipe_archive.compact(CUTOFF)
+    assert remaining(db, swiper, "left") == 0
+
+    feed = client.get(f"/discovery/{swiper}/feed", params={"chain": chain, "limit": 50})
+    assert feed.status_code == 200
+    assert [card["id"] for card in feed.json()] == [fresh]
+
+    again = client.post(f"/discovery/{swiper}/swipe/{archived}", json={"direction": "right"})
+    assert again.status_code == 400
+    assert again.json()["detail"] == "Already swiped on this agent"
+    assert client.post(f"/discovery/{swiper}/swipe/{fresh}", json={"direction": "left"}).status_code == 200
@@ -0,0 +1,155 @@
+"""TweetClient against a local stand-in for the scraper API"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services import tweets
+from services.tweets import CircuitOpenError, ScraperUnavailableError, TweetClient
+
+
+class Scraper(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ScraperHandler)
+        self.requests = 0
+        self.connections = set()
+        self.mode = "ok"  # ok, down, slow
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def host(self) -> str:
+        return f"127.0.0.1:{self.server_address[1]}"
+
+
+class ScraperHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        server.connections.add(self.client_address)
+        if server.mode == "slow":
+            time.sleep(1.0)
+        if server.mode == "down":
+            body, status = b"{}", 503
+        else:
+            tweet_id = self.path.rsplit("/", 1)[-1]
+            body, status = json.dumps({"full_text": f"claiming CLAW-{tweet_id} @moltbotbnb"}).encode(), 200
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def scraper():
+    server = Scraper()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def fetch_all(client: TweetClient, ids):
+    try:
+        return [await client.fetch_text(tweet_id) for tweet_id in ids]
+    finally:
+        await client.aclose()
+
+
+def test_connections_are_reused(scraper):
+    client = TweetClient(scraper.base_url)
+    results = run(fetch_all(client, [str(i) for i in range(20)]))
+    assert all(status == 200 for status, _ in results)
+    assert scraper.requests == 20
+    assert len(scraper.connections) == 1
+
+
+def test_ttl_cache_hits_skip_the_scraper(scraper):
+    client = TweetClient(scraper.base_url)
+    run(fetch_all(client, ["1", "1", "1"]))
+    assert scraper.requests == 1
+    assert client.cache.hits == 2
+
+    # expired entries are fetched again
+    client.cache.ttl = 0.05
+    client.cache.clear()
+    run(fetch_all(client, ["2"]))
+    time.sleep(0.1)
+    run(fetch_all(client, ["2"]))
+    assert scraper.requests == 3
+
+
+def test_per_host_timeout(scraper):
+    scraper.mode = "slow"
+    client = TweetClient(scraper.base_url, host_timeouts={scraper.host: 0.2})
+    started = time.monotonic()
+    with pytest.raises(ScraperUnavailableError):
+        run(fetch_all(client, ["1"]))
+    assert time.monotonic() - started < 0.9
+
+
+def test_breaker_opens_then_recovers(scraper):
+    client = TweetClient(scraper.base_url)
+    client._breakers[scraper.host] = tweets.CircuitBreaker(failures=3, cooldown=0.2)
+    scraper.mode = "down"
+
+    async def scenario():
+        try:
+            for _ in range(3):
+                with pytest.raises(ScraperUnavailableError):
+                    await client.fetch_text("1")
+            # open: fails fast without touching the scraper
+            requests = scraper.requests
+            with pytest.raises(CircuitOpenError):
+                await client.fetch_text("1")
+            assert scraper.requests == requests
+
+            # after the cooldown one probe goes through and closes it
+            scraper.mode = "ok"
+            await asyncio.sleep(0.25)
+            assert await client.fetch_text("1") == (200, "claiming CLAW-1 @moltbotbnb")
+            assert client.breaker(scraper.host).opened_at is None
+        finally:
+            await client.aclose()
+
+    run(scenario())
+
+
+def test_verification_fails_fast_instead_of_allowing(scraper, monkeypatch):
+    client = TweetClient(scraper.base_url)
+    client._breakers[scraper.host] = tweets.CircuitBreaker(failures=1, cooldown=60)
+    monkeypatch.setattr(tweets, "tweet_client", client)
+    url = "https://x.com/someone/status/7"
+
+    async def scenario():
+        try:
+            assert await tweets.verify_tweet_contains_code(url, "CLAW-7") == (True, "Verification successful!")
+            assert (await tweets.verify_tweet_contains_code(url, "CLAW-8"))[0] is False
+            scraper.mode = "down"
+            client.cache.clear()
+            with pytest.raises(ScraperUnavailableError):
+                await tweets.verify_tweet_contains_code(url, "CLAW-7")
+            with pytest.raises(CircuitOpenError):
+                await tweets.verify_tweet_contains_code(url, "CLAW-7")
+        finally:
+            await client.aclose()
+
+    run(scenario())